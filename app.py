@@ -1,10 +1,13 @@
 import streamlit as st
 import requests
-import re
+import html
 
 
 API_URL = "http://localhost:8000/search"
+SPELLCHECK_URL = "http://localhost:8000/spellcheck"
 DEFAULT_TOP_K = 100
+# Only what the results page renders
+RESULT_FIELDS = "doc_id,score,title,year,authors,journal,citations,url,doi,title_highlights,snippet"
 
 st.set_page_config(page_title=" Coventry Publications Search", layout="wide")
 
@@ -28,6 +31,11 @@ st.markdown("""
         color: #555;
         font-size: 14px;
     }
+    .snippet {
+        color: #333;
+        font-size: 14px;
+        margin: 4px 0;
+    }
     mark {
         background-color: #fff3b0;
         padding: 0 3px;
@@ -87,13 +95,15 @@ if "results" not in st.session_state:
     st.session_state.results = []
 if "sort" not in st.session_state:
     st.session_state.sort = "Relevance"
+if "did_you_mean" not in st.session_state:
+    st.session_state.did_you_mean = None
 
 
 def fetch_results(query):
     try:
         response = requests.get(
             API_URL,
-            params={"query": query, "k": DEFAULT_TOP_K},
+            params={"query": query, "k": DEFAULT_TOP_K, "fields": RESULT_FIELDS},
             timeout=10
         )
         response.raise_for_status()
@@ -103,11 +113,27 @@ def fetch_results(query):
         return []
 
 
-def highlight(text, query):
-    if not text or not query:
+def fetch_did_you_mean(query):
+    try:
+        response = requests.get(SPELLCHECK_URL, params={"query": query}, timeout=5)
+        response.raise_for_status()
+        return response.json().get("did_you_mean")
+    except requests.exceptions.RequestException:
+        return None
+
+
+def highlight(text, spans):
+    """Wrap the server-computed ``[start, end]`` spans of ``text`` in <mark>."""
+    if not text:
         return text
-    pattern = re.compile(re.escape(query), re.IGNORECASE)
-    return pattern.sub(lambda m: f"<mark>{m.group(0)}</mark>", text)
+    parts = []
+    last = 0
+    for start, end in spans or []:
+        parts.append(html.escape(text[last:start]))
+        parts.append(f"<mark>{html.escape(text[start:end])}</mark>")
+        last = end
+    parts.append(html.escape(text[last:]))
+    return "".join(parts)
 
 
 def sort_results(results, mode):
@@ -150,6 +176,7 @@ if st.session_state.page == "home":
     if submitted and query.strip():
         st.session_state.query = query
         st.session_state.results = fetch_results(query)
+        st.session_state.did_you_mean = fetch_did_you_mean(query)
         st.session_state.page = "results"
         st.rerun()
 
@@ -184,10 +211,14 @@ elif st.session_state.page == "results":
         st.session_state.sort = sort_mode
         st.session_state.query = query
         st.session_state.results = fetch_results(query)
+        st.session_state.did_you_mean = fetch_did_you_mean(query)
         st.rerun()
 
     st.divider()
 
+    if st.session_state.did_you_mean:
+        st.markdown(f"Did you mean: *{st.session_state.did_you_mean}*")
+
     results = sort_results(st.session_state.results, st.session_state.sort)
 
     if not results:
@@ -197,7 +228,7 @@ elif st.session_state.page == "results":
         st.markdown("<br>", unsafe_allow_html=True)
         
         for pub in results:
-            title = highlight(pub.get("title", ""), st.session_state.query)
+            title = highlight(pub.get("title", ""), pub.get("title_highlights"))
             
             # Create clickable title with paper link
             if pub.get("url"):
@@ -252,6 +283,13 @@ elif st.session_state.page == "results":
                     unsafe_allow_html=True
                 )
 
+            snippet = pub.get("snippet") or {}
+            if snippet.get("text"):
+                st.markdown(
+                    f"<div class='snippet'>{highlight(snippet['text'], snippet.get('highlights'))}</div>",
+                    unsafe_allow_html=True
+                )
+
             # Citations and metrics
             st.markdown(
                 f"<div class='meta'>"
@@ -0,0 +1,149 @@
+"""Reproducible crawl benchmark against the offline Pure fixture.
+
+Starts ``benchmarks.pure_fixture`` locally, then runs ``src.crawler.scraper.main``
+in a fresh process per trial with ``BASE_URL`` pointed at the fixture and an
+empty data directory. Each trial's crawl metrics summary is collected into one
+JSON report.
+
+    python -m benchmarks.crawl_bench --size 20000 --concurrency 8,16,32 --parse-workers 0,4
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import itertools
+import subprocess
+import tempfile
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CRAWL_SNIPPET = "import asyncio; from src.crawler.scraper import main; asyncio.run(main())"
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_fixture(args, port):
+    cmd = [
+        sys.executable, "-m", "benchmarks.pure_fixture",
+        "--port", str(port),
+        "--size", str(args.size),
+        "--latency-ms", str(args.latency_ms),
+        "--error-rate", str(args.error_rate),
+        "--max-rps", str(args.max_rps),
+        "--seed", str(args.seed),
+    ]
+    server = subprocess.Popen(cmd, cwd=ROOT)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/robots.txt", timeout=1)
+            return server
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("Fixture server did not start")
+
+
+def run_trial(base_url, concurrency, parse_workers, args):
+    with tempfile.TemporaryDirectory(prefix="crawl-bench-") as data_dir:
+        env = {
+            **os.environ,
+            "BASE_URL": base_url,
+            "DATA_PATH": data_dir + "/",
+            "PERSON_CONCURRENCY": str(concurrency),
+            "PUB_CONCURRENCY": str(concurrency),
+            "PARSE_WORKERS": str(parse_workers),
+            "MIN_DELAY": str(args.delay),
+            "MAX_DELAY": str(args.delay),
+            "RETRY_BACKOFF": "0.1",
+            "METRICS_INTERVAL": str(args.report_interval),
+        }
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", CRAWL_SNIPPET], cwd=ROOT, env=env, check=True,
+                       stdout=None if args.verbose else subprocess.DEVNULL,
+                       stderr=None if args.verbose else subprocess.DEVNULL)
+        wall = time.perf_counter() - start
+
+        metrics = json.loads((Path(data_dir) / "crawl_metrics.json").read_text(encoding="utf-8"))
+
+    return {
+        "concurrency": concurrency,
+        "parse_workers": parse_workers,
+        "wall_seconds": round(wall, 3),
+        "metrics": metrics,
+    }
+
+
+def print_trial(trial):
+    totals = trial["metrics"]["totals"]
+    phases = trial["metrics"]["phases"]
+    parse = sum(p["parse"]["seconds"] for p in phases.values())
+    print(
+        f"concurrency={trial['concurrency']:<4} parse_workers={trial['parse_workers']:<3}"
+        f" wall={trial['wall_seconds']:>8.2f}s requests={totals['requests']:<8}"
+        f" req/s={totals['requests'] / trial['wall_seconds']:>8.1f}"
+        f" retries={totals['retries']:<6} failures={totals['failures']:<6} parse={parse:.2f}s"
+    )
+
+
+def _int_list(value):
+    return [int(v) for v in value.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the crawler against the offline Pure fixture")
+    parser.add_argument("--size", type=int, default=10_000, help="Total fixture URLs (persons + publications)")
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--max-rps", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--concurrency", type=_int_list, default=[16], help="Comma-separated fetch concurrency values")
+    parser.add_argument("--parse-workers", type=_int_list, default=[os.cpu_count() or 1],
+                        help="Comma-separated parse pool sizes (0 = parse on the event loop)")
+    parser.add_argument("--delay", type=float, default=0.0, help="Politeness delay per request (MIN_DELAY = MAX_DELAY)")
+    parser.add_argument("--report-interval", type=float, default=5.0)
+    parser.add_argument("--output", type=str, default=None, help="Write the JSON report here")
+    parser.add_argument("--verbose", action="store_true", help="Show crawler logs")
+    args = parser.parse_args()
+
+    port = free_port()
+    server = start_fixture(args, port)
+    base_url = f"http://127.0.0.1:{port}"
+
+    trials = []
+    try:
+        for concurrency, parse_workers in itertools.product(args.concurrency, args.parse_workers):
+            trial = run_trial(base_url, concurrency, parse_workers, args)
+            print_trial(trial)
+            trials.append(trial)
+    finally:
+        server.terminate()
+        server.wait()
+
+    report = {
+        "fixture": {
+            "size": args.size,
+            "latency_ms": args.latency_ms,
+            "error_rate": args.error_rate,
+            "max_rps": args.max_rps,
+            "seed": args.seed,
+        },
+        "trials": trials,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
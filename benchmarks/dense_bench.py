@@ -0,0 +1,94 @@
+"""Recall vs. latency of the IVF dense index against exact dense search.
+
+For each ``nprobe`` (inverted lists scanned per query) reports recall@k of
+the approximate top-k against brute-force cosine over every embedding, and
+the CPU time per query of both. Lexical and hybrid end-to-end search times
+are included for reference.
+
+    python -m benchmarks.dense_bench --index data/index.pkl --num-queries 500 --k 10
+"""
+import json
+import argparse
+from pathlib import Path
+
+from src.core.config import INDEX_PATH
+from src.services.search_engine import SearchEngine
+from benchmarks.query_bench import sample_queries, cpu_per_query
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark recall and latency of the dense ANN index")
+    parser.add_argument("--index", type=str, default=INDEX_PATH)
+    parser.add_argument("--queries", type=str, default=None, help="File with one query per line")
+    parser.add_argument("--num-queries", type=int, default=200, help="Sampled queries when --queries is not given")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=str, default="1,2,4,8,16,32", help="Comma-separated lists to scan")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=str, default=None, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    engine = SearchEngine(args.index)
+    if engine.dense is None:
+        raise SystemExit("Index has no embeddings; rebuild it to benchmark dense retrieval")
+    dense = engine.dense
+
+    if args.queries:
+        queries = [q.strip() for q in Path(args.queries).read_text(encoding="utf-8").splitlines() if q.strip()]
+    else:
+        queries = sample_queries(engine, args.num_queries, args.seed)
+
+    vectors = {}
+    for query in queries:
+        analyzed = engine.analyze_query(query, False)
+        vector = dense.embed(analyzed.terms, analyzed.weights)
+        if vector is not None:
+            vectors[query] = vector
+    queries = list(vectors)
+
+    exact = {q: {ordinal for ordinal, _ in dense.exact_search(vectors[q], args.k)} for q in queries}
+    exact_ms = cpu_per_query(lambda q: dense.exact_search(vectors[q], args.k), queries, args.repeat) * 1000
+
+    sweep = []
+    for nprobe in sorted({min(int(n), dense.lists) for n in args.nprobe.split(",")}):
+        found = 0
+        for query in queries:
+            approx = dense.search(vectors[query], args.k, nprobe)
+            found += len(exact[query] & {ordinal for ordinal, _ in approx})
+        expected = sum(len(ordinals) for ordinals in exact.values())
+        ms = cpu_per_query(lambda q: dense.search(vectors[q], args.k, nprobe), queries, args.repeat) * 1000
+        sweep.append({
+            "nprobe": nprobe,
+            "recall": round(found / expected, 4) if expected else None,
+            "cpu_ms_per_query": round(ms, 4),
+            "speedup": round(exact_ms / ms, 2) if ms else None,
+        })
+
+    report = {
+        "documents": len(dense),
+        "dim": dense.dim,
+        "lists": dense.lists,
+        "queries": len(queries),
+        "k": args.k,
+        "exact_cpu_ms_per_query": round(exact_ms, 4),
+        "ivf": sweep,
+        "search_cpu_ms_per_query": {
+            mode: round(cpu_per_query(lambda q: engine.search(q, args.k, fuzzy=False, mode=mode), queries, args.repeat) * 1000, 4)
+            for mode in ("lexical", "dense", "hybrid")
+        },
+    }
+
+    print(f"{len(dense)} documents, {dense.dim} dimensions, {dense.lists} lists, {len(queries)} queries, k={args.k}")
+    print(f"{'exact':<12} recall 1.0000  {exact_ms:>9.4f} ms/query")
+    for row in sweep:
+        print(f"nprobe={row['nprobe']:<5} recall {row['recall']:.4f}  {row['cpu_ms_per_query']:>9.4f} ms/query  ({row['speedup']}x)")
+    for mode, ms in report["search_cpu_ms_per_query"].items():
+        print(f"search {mode:<8} {ms:>9.4f} ms/query")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""Offline stand-in for pureportal.coventry.ac.uk.
+
+Serves a synthetic robots.txt, sitemap index, persons/publications sitemaps and
+person/publication pages using the same markup the crawler's extractors expect.
+Everything is generated deterministically from ``--seed``, so any URL can be
+served without materializing the corpus.
+
+    python -m benchmarks.pure_fixture --size 100000 --latency-ms 40 --error-rate 0.01 --max-rps 500
+"""
+import time
+import random
+import asyncio
+import argparse
+from html import escape
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import HTMLResponse, PlainTextResponse, Response
+from starlette.routing import Route
+
+# The crawler reads publications.xml plus ?n=1..16
+PUBLICATION_SITEMAP_PAGES = 17
+
+INTERESTED_DEPARTMENT = "Research Centre for Computational Science and Mathematical Modelling"
+OTHER_DEPARTMENTS = (
+    "School of Computing, Electronics and Mathematics",
+    "Centre for Business in Society",
+    "Institute for Future Transport and Cities",
+    "Centre for Sport, Exercise and Life Sciences",
+)
+
+FIRST_NAMES = ("Alice", "Bilal", "Chen", "Dana", "Elena", "Farid", "Grace", "Hiro", "Ines", "Jonas", "Kavya", "Liam")
+LAST_NAMES = ("Smith", "Okafor", "Li", "Novak", "Garcia", "Haddad", "Kumar", "Sato", "Costa", "Berg", "Rossi", "Walsh")
+
+VOCABULARY = (
+    "neural network deep learning bayesian inference monte carlo simulation stochastic model "
+    "graph optimisation algorithm numerical method fluid dynamics finite element climate data "
+    "machine learning reinforcement agent uncertainty quantification epidemic spread dynamical "
+    "system differential equation parallel computing sparse matrix signal processing image "
+    "classification transformer language model fractional calculus chaos control robust estimation"
+).split()
+
+JOURNALS = ("Journal of Computational Physics", "Neural Networks", "Applied Mathematical Modelling",
+            "Physica D", "Scientific Reports", "IEEE Access")
+
+
+class Fixture:
+
+    def __init__(self, size=10_000, person_ratio=0.1, interested_ratio=0.2, seed=42):
+        self.seed = seed
+        self.n_persons = max(1, int(size * person_ratio))
+        self.n_publications = max(1, size - self.n_persons)
+        self.interested_ratio = interested_ratio
+
+    def _rng(self, kind, i):
+        return random.Random(f"{self.seed}:{kind}:{i}")
+
+    def person(self, i):
+        rng = self._rng("person", i)
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}-{i}"
+        interested = rng.random() < self.interested_ratio
+        department = INTERESTED_DEPARTMENT if interested else rng.choice(OTHER_DEPARTMENTS)
+        return {"name": name, "department": department}
+
+    def publication(self, i):
+        rng = self._rng("publication", i)
+        author_ids = rng.sample(range(self.n_persons), k=min(self.n_persons, rng.randint(1, 5)))
+        year = rng.randint(2000, 2025)
+        return {
+            "title": " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(4, 10))).capitalize(),
+            "abstract": " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(40, 160))).capitalize() + ".",
+            "authors": [(a, self.person(a)["name"], rng.random() < 0.7) for a in author_ids],
+            "journal": rng.choice(JOURNALS),
+            "volume": str(rng.randint(1, 120)),
+            "doi": f"10.{rng.randint(1000, 9999)}/fixture.{i}",
+            "year": year,
+            "citations": int(rng.paretovariate(1.2)) - 1,
+        }
+
+
+def person_url(base, i):
+    return f"{base}/en/persons/person-{i}"
+
+def publication_url(base, i):
+    return f"{base}/en/publications/publication-{i}"
+
+def urlset(urls):
+    body = "".join(f"<url><loc>{escape(u)}</loc></url>" for u in urls)
+    return f'<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{body}</urlset>'
+
+
+def render_person(base, person):
+    return f"""<!DOCTYPE html><html><head><title>{escape(person['name'])}</title></head><body>
+<div class="header"><nav><a href="{base}/">Pure</a></nav></div>
+<div class="rendering rendering_person rendering_personorganisationlistrendererportal">
+  <h1>{escape(person['name'])}</h1>
+  <ul class="relations organisations"><li><a rel="Organisation" href="{base}/en/organisations/x">{escape(person['department'])}</a></li></ul>
+</div>
+<footer>{'<p>filler</p>' * 20}</footer>
+</body></html>"""
+
+
+def render_publication(base, pub):
+    authors = []
+    for author_id, name, linked in pub["authors"]:
+        if linked:
+            authors.append(f'<a rel="Person" href="/en/persons/person-{author_id}">{escape(name)}</a>')
+        else:
+            authors.append(escape(name))
+    return f"""<!DOCTYPE html><html><head><title>{escape(pub['title'])}</title></head><body>
+<div class="header"><nav><a href="{base}/">Pure</a></nav></div>
+<div class="rendering rendering_researchoutput rendering_researchoutput_portal">
+  <h1>{escape(pub['title'])}</h1>
+  <p class="relations persons">{", ".join(authors)}</p>
+  <div class="rendering rendering_researchoutput rendering_abstractportal">
+    <div class="textblock">{escape(pub['abstract'])}</div>
+  </div>
+  <table class="properties">
+    <tr><th>Original language</th><td>English</td></tr>
+    <tr><th>Journal</th><td>{escape(pub['journal'])}</td></tr>
+    <tr><th>Volume</th><td>{pub['volume']}</td></tr>
+    <tr><th>DOIs</th><td><a href="https://doi.org/{pub['doi']}">{pub['doi']}</a></td></tr>
+    <tr><th>Publication status</th><td>Published - 1 Jan {pub['year']}</td></tr>
+  </table>
+  <div class="metric scopus-citations"><span class="count">{pub['citations']}</span> Scopus citations</div>
+</div>
+<footer>{'<p>filler</p>' * 40}</footer>
+</body></html>"""
+
+
+class TokenBucket:
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+
+    def take(self):
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+def create_app(size=10_000, latency_ms=0.0, error_rate=0.0, max_rps=0.0, seed=42):
+    fixture = Fixture(size=size, seed=seed)
+    bucket = TokenBucket(max_rps) if max_rps > 0 else None
+    rng = random.Random(seed)
+
+    def base_url(request: Request):
+        return str(request.base_url).rstrip("/")
+
+    async def simulate(request: Request):
+        """Apply latency, throttling and random errors; return an error response or None."""
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000 * rng.uniform(0.5, 1.5))
+        if bucket is not None and not bucket.take():
+            return PlainTextResponse("Too Many Requests", status_code=429, headers={"Retry-After": "1"})
+        if error_rate and rng.random() < error_rate:
+            return PlainTextResponse("Internal Server Error", status_code=500)
+        return None
+
+    async def robots(request):
+        return PlainTextResponse(f"User-agent: *\nDisallow: /admin\nSitemap: {base_url(request)}/sitemap.xml\n")
+
+    async def sitemap_index(request):
+        base = base_url(request)
+        locs = "".join(
+            f"<sitemap><loc>{base}/sitemap/{name}.xml</loc></sitemap>"
+            for name in ("persons", "publications", "organisations")
+        )
+        return Response(
+            f'<?xml version="1.0" encoding="UTF-8"?><sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{locs}</sitemapindex>',
+            media_type="application/xml",
+        )
+
+    async def sitemap(request):
+        base = base_url(request)
+        name = request.path_params["name"]
+        if name == "persons":
+            urls = (person_url(base, i) for i in range(fixture.n_persons))
+        elif name == "publications":
+            page = int(request.query_params.get("n", 0))
+            per_page = -(-fixture.n_publications // PUBLICATION_SITEMAP_PAGES)
+            start = page * per_page
+            urls = (publication_url(base, i) for i in range(start, min(start + per_page, fixture.n_publications)))
+        else:
+            urls = ()
+        return Response(urlset(urls), media_type="application/xml")
+
+    async def person_page(request):
+        error = await simulate(request)
+        if error is not None:
+            return error
+        i = request.path_params["i"]
+        if i >= fixture.n_persons:
+            return PlainTextResponse("Not Found", status_code=404)
+        return HTMLResponse(render_person(base_url(request), fixture.person(i)))
+
+    async def publication_page(request):
+        error = await simulate(request)
+        if error is not None:
+            return error
+        i = request.path_params["i"]
+        if i >= fixture.n_publications:
+            return PlainTextResponse("Not Found", status_code=404)
+        return HTMLResponse(render_publication(base_url(request), fixture.publication(i)))
+
+    return Starlette(routes=[
+        Route("/robots.txt", robots),
+        Route("/sitemap.xml", sitemap_index),
+        Route("/sitemap/{name}.xml", sitemap),
+        Route("/en/persons/person-{i:int}", person_page),
+        Route("/en/publications/publication-{i:int}", publication_page),
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a synthetic Pure portal for offline crawling")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--size", type=int, default=10_000, help="Total number of person + publication URLs")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Mean per-page latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of pages answered with 500")
+    parser.add_argument("--max-rps", type=float, default=0.0, help="Pages per second before answering 429 (0 = unlimited)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    app = create_app(args.size, args.latency_ms, args.error_rate, args.max_rps, args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
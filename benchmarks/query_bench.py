@@ -0,0 +1,161 @@
+"""Per-query CPU cost of SearchEngine.search against an existing index.
+
+Compares the original exhaustive scorer (re-analyze the query, then cosine
+against every document vector, recomputing the query norm each time) with the
+current path, both with a cold query cache and with analyzed queries served
+from the LRU. Top-k results of every query are checked to agree. With
+``--budget-ms``, tiered search under that deadline is compared with exact
+search: p50/p99 latency and top-k overlap.
+
+    python -m benchmarks.query_bench --index data/index.pkl --num-queries 500 --repeat 3
+    python -m benchmarks.query_bench --index data/index.pkl --budget-ms 2
+"""
+import json
+import time
+import random
+import argparse
+from pathlib import Path
+
+from src.core.config import INDEX_PATH, STATIC_WEIGHT
+from src.services.search_engine import SearchEngine
+
+
+def exhaustive_search(engine, query, top_n):
+    """The scorer SearchEngine used before queries were precomputed, plus the static score blend."""
+    query_terms = engine.processor.preprocess_query(query)
+    if not query_terms:
+        return []
+    query_vec = engine.build_query_vector(query_terms)
+
+    static_weight = STATIC_WEIGHT if engine.static_scores is not None else 0.0
+    scores = []
+    for doc_id, doc_vec in engine.doc_vectors.items():
+        similarity = SearchEngine.cosine_similarity(query_vec, doc_vec, engine.doc_norms[doc_id])
+        if similarity > 0:
+            ordinal = engine.ordinals[doc_id]
+            scores.append((engine.blend(similarity, ordinal, static_weight), -ordinal, doc_id))
+    scores.sort(reverse=True)
+    return [(doc_id, score, engine.documents[doc_id]) for score, _, doc_id in scores[:top_n]]
+
+
+def sample_queries(engine, count, seed):
+    """Queries of one to three words drawn from document titles."""
+    rng = random.Random(seed)
+    titles = [doc["title"].split() for doc in engine.documents.values() if doc.get("title")]
+    queries = []
+    for _ in range(count):
+        words = rng.choice(titles)
+        queries.append(" ".join(rng.sample(words, k=min(len(words), rng.randint(1, 3)))))
+    return queries
+
+
+def cpu_per_query(func, queries, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        for query in queries:
+            func(query)
+    return (time.process_time() - start) / (repeat * len(queries))
+
+
+def latencies_ms(func, queries):
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        func(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "p50": round(timings[len(timings) // 2], 4),
+        "p99": round(timings[min(len(timings) - 1, int(len(timings) * 0.99))], 4),
+    }
+
+
+def tiered_report(engine, queries, top_n, budget_ms):
+    """Exact vs. tiered search under ``budget_ms``: latency percentiles and how much of the top-k survives."""
+    exact = {q: [doc_id for doc_id, _, _ in engine.search(q, top_n, budget_ms=0)] for q in queries}
+    engine.tier_counts.clear()
+    overlap = 0.0
+    for query in queries:
+        tiered = {doc_id for doc_id, _, _ in engine.search(query, top_n, budget_ms=budget_ms)}
+        overlap += len(tiered & set(exact[query])) / len(exact[query]) if exact[query] else 1.0
+    return {
+        "budget_ms": budget_ms,
+        "top_k_overlap": round(overlap / len(queries), 4),
+        "outcomes": dict(engine.tier_counts),
+        "exact_latency_ms": latencies_ms(lambda q: engine.search(q, top_n, budget_ms=0), queries),
+        "tiered_latency_ms": latencies_ms(lambda q: engine.search(q, top_n, budget_ms=budget_ms), queries),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-query CPU time of the search path")
+    parser.add_argument("--index", type=str, default=INDEX_PATH)
+    parser.add_argument("--queries", type=str, default=None, help="File with one query per line")
+    parser.add_argument("--num-queries", type=int, default=200, help="Sampled queries when --queries is not given")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top-n", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--budget-ms", type=float, default=None, help="Also benchmark tiered search with this deadline")
+    parser.add_argument("--output", type=str, default=None, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    engine = SearchEngine(args.index)
+    if args.queries:
+        queries = [q.strip() for q in Path(args.queries).read_text(encoding="utf-8").splitlines() if q.strip()]
+    else:
+        queries = sample_queries(engine, args.num_queries, args.seed)
+
+    mismatches = 0
+    for query in queries:
+        expected = [doc_id for doc_id, _, _ in exhaustive_search(engine, query, args.top_n)]
+        actual = [doc_id for doc_id, _, _ in engine.search(query, args.top_n, budget_ms=0)]
+        mismatches += expected != actual
+
+    def cold(query):
+        engine.analyze_query.cache_clear()
+        engine.search(query, args.top_n, budget_ms=0)
+
+    baseline = cpu_per_query(lambda q: exhaustive_search(engine, q, args.top_n), queries, args.repeat)
+    uncached = cpu_per_query(cold, queries, args.repeat)
+    engine.analyze_query.cache_clear()
+    cached = cpu_per_query(lambda q: engine.search(q, args.top_n, budget_ms=0), queries, args.repeat)
+
+    report = {
+        "documents": len(engine.documents),
+        "queries": len(queries),
+        "repeat": args.repeat,
+        "top_n": args.top_n,
+        "ranking_mismatches": mismatches,
+        "cpu_ms_per_query": {
+            "exhaustive": round(baseline * 1000, 4),
+            "precomputed_cold_cache": round(uncached * 1000, 4),
+            "precomputed_warm_cache": round(cached * 1000, 4),
+        },
+        "speedup": {
+            "cold_cache": round(baseline / uncached, 2) if uncached else None,
+            "warm_cache": round(baseline / cached, 2) if cached else None,
+        },
+        "query_cache": engine.analyze_query.cache_info()._asdict(),
+    }
+
+    for name, ms in report["cpu_ms_per_query"].items():
+        print(f"{name:<24} {ms:>10.4f} ms/query")
+    print(f"Speedup: {report['speedup']['cold_cache']}x cold, {report['speedup']['warm_cache']}x warm")
+    print(f"Ranking mismatches: {mismatches}/{len(queries)}")
+
+    if args.budget_ms is not None and engine.champions is not None:
+        report["tiered"] = tiered_report(engine, queries, args.top_n, args.budget_ms)
+        tiered = report["tiered"]
+        print(
+            f"Tiered ({args.budget_ms} ms budget): p99 {tiered['tiered_latency_ms']['p99']} ms "
+            f"vs exact {tiered['exact_latency_ms']['p99']} ms, top-{args.top_n} overlap {tiered['top_k_overlap']}, "
+            f"outcomes {tiered['outcomes']}"
+        )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from src.apis.api import router
+from src.apis.caching import HttpCacheMiddleware
+from src.apis.compression import CompressionMiddleware
 
 app = FastAPI(title="PUBLICATIONS SEARCH ENGINE API",
-              description="An API for searching academic publications.",)
+              description="An API for searching academic publications.",
+              default_response_class=ORJSONResponse)
 
 app.add_middleware(CORSMiddleware,
                 allow_origins= ["*"],
@@ -13,4 +17,9 @@ app.add_middleware(CORSMiddleware,
                 allow_headers=["Authorization", "Content-Type"])
 
 
+# Added first so it runs inside compression: cached bodies are stored uncompressed
+app.add_middleware(HttpCacheMiddleware)
+app.add_middleware(CompressionMiddleware)
+
+
 app.include_router(router)
\ No newline at end of file
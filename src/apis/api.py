@@ -1,16 +1,37 @@
+import orjson
 from fastapi import (
     APIRouter,
+    HTTPException,
     Query
     
 )
+from fastapi.responses import ORJSONResponse, StreamingResponse
 
 from typing import List
 
+from src.core.config import SEARCH_MODE, SEARCH_BUDGET_MS
 
-from src.utils.utils import search_publications
+
+from src.utils.utils import (
+    parse_fields,
+    search_publications,
+    iter_search_publications,
+    get_index_statistics,
+    suggest_completions,
+    check_spelling,
+    get_document_by_id,
+    get_similar_documents,
+)
 
 router = APIRouter()
 
+
+def selected_fields(fields):
+    try:
+        return parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
 @router.get(
     "/search",
     tags=["Search"],
@@ -18,6 +39,79 @@ router = APIRouter()
 )
 async def search_endpoint(
     query: str = Query(..., description="Search query"),
-    k: int = Query(5, description="Number of top results")
+    k: int = Query(5, description="Number of top results"),
+    fuzzy: bool = Query(True, description="Expand misspelled words to close indexed words"),
+    mode: str = Query(SEARCH_MODE, pattern="^(lexical|dense|hybrid)$",
+                      description="Ranking: lexical TF-IDF, dense LSA embeddings, or a hybrid of both"),
+    budget_ms: float = Query(SEARCH_BUDGET_MS, ge=0,
+                             description="Latency budget for tiered lexical search; 0 always ranks exactly"),
+    fields: str = Query(None, description="Comma-separated result fields to return (default: all)"),
+    response_format: str = Query("json", alias="format", pattern="^(json|ndjson)$",
+                                 description="json: one array; ndjson: one hit per line, streamed as written")
 ):
-    return search_publications(query, top_n=k)
\ No newline at end of file
+    selected = selected_fields(fields)
+    if response_format == "ndjson":
+        hits = iter_search_publications(query, top_n=k, fuzzy=fuzzy, mode=mode, budget_ms=budget_ms, fields=selected)
+        return StreamingResponse((orjson.dumps(hit) + b"\n" for hit in hits), media_type="application/x-ndjson")
+    # Already plain JSON types: skip jsonable_encoder and serialize with orjson directly
+    return ORJSONResponse(search_publications(query, top_n=k, fuzzy=fuzzy, mode=mode, budget_ms=budget_ms, fields=selected))
+
+
+@router.get(
+    "/spellcheck",
+    tags=["Search"],
+    summary="Suggest a corrected query (\"did you mean\")"
+)
+async def spellcheck_endpoint(
+    query: str = Query(..., description="Search query")
+):
+    return check_spelling(query)
+
+
+@router.get(
+    "/suggest",
+    tags=["Search"],
+    summary="Autocomplete a query prefix from index terms and titles"
+)
+async def suggest_endpoint(
+    prefix: str = Query(..., description="What the user has typed so far"),
+    k: int = Query(10, description="Number of suggestions")
+):
+    return suggest_completions(prefix, k=k)
+
+
+@router.get(
+    "/documents/{doc_id}",
+    tags=["Documents"],
+    summary="Return one publication by its document ID"
+)
+async def document_endpoint(doc_id: str):
+    document = get_document_by_id(doc_id)
+    if document is None:
+        raise HTTPException(status_code=404, detail=f"Document {doc_id} not found")
+    return document
+
+
+@router.get(
+    "/documents/{doc_id}/similar",
+    tags=["Documents"],
+    summary="Return publications similar to a given one (precomputed at index time)"
+)
+async def similar_endpoint(
+    doc_id: str,
+    k: int = Query(10, description="Number of similar publications"),
+    fields: str = Query(None, description="Comma-separated result fields to return (default: all)")
+):
+    similar = get_similar_documents(doc_id, k=k, fields=selected_fields(fields))
+    if similar is None:
+        raise HTTPException(status_code=404, detail=f"Document {doc_id} not found")
+    return similar
+
+
+@router.get(
+    "/stats",
+    tags=["Stats"],
+    summary="Return index statistics computed at build time"
+)
+async def stats_endpoint():
+    return get_index_statistics()
\ No newline at end of file
@@ -0,0 +1,147 @@
+import hashlib
+from collections import OrderedDict
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+
+from src.core import config
+from src.utils.utils import get_search_engine
+
+# Query-time settings that change responses without changing the index
+_SERVING_SETTINGS = (
+    "SEARCH_MODE", "SEARCH_BUDGET_MS", "STATIC_WEIGHT", "HYBRID_WEIGHT", "HYBRID_CANDIDATES",
+    "DENSE_NPROBE", "FUZZY_EXPANSIONS", "SNIPPET_LENGTH",
+)
+
+# Path prefixes whose responses are a function of the index version and the request alone
+_VERSIONED_PATHS = ("/search", "/suggest", "/spellcheck", "/documents/")
+
+# Live counters (query cache, tiered search) change these without a rebuild: tag them by body instead
+_LIVE_PATHS = ("/stats",)
+
+
+def serving_digest():
+    settings = "|".join(f"{name}={getattr(config, name)}" for name in _SERVING_SETTINGS)
+    return hashlib.sha1(settings.encode("utf-8")).hexdigest()[:8]
+
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison of an ``If-None-Match`` header against ``etag``, as conditional GETs use."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+class HttpCacheMiddleware:
+    """ETags, ``Cache-Control`` and 304s for GET endpoints, with an optional in-process response cache.
+
+    Index-backed endpoints get a weak ETag of the index version and the
+    serving settings, so a conditional request is answered before any search
+    runs and every ETag changes when the index is rebuilt. ``/stats`` carries
+    live counters and is tagged by a digest of its body instead. With
+    ``cache_size`` > 0 the most recent complete 200 bodies are kept per
+    ETag, path and query string and replayed without calling the app.
+    """
+
+    def __init__(self, app, max_age=config.HTTP_CACHE_MAX_AGE, cache_size=config.RESPONSE_CACHE_SIZE):
+        self.app = app
+        self.cache_control = f"public, max-age={max_age}"
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.settings = serving_digest()
+
+    def etag(self):
+        return f'W/"{get_search_engine().version}-{self.settings}"'
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        if path.startswith(_LIVE_PATHS):
+            await self.revalidate_body(scope, receive, send)
+        elif path.startswith(_VERSIONED_PATHS):
+            await self.versioned(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
+    async def versioned(self, scope, receive, send):
+        etag = self.etag()
+        headers = {"ETag": etag, "Cache-Control": self.cache_control}
+        if etag_matches(Headers(scope=scope).get("If-None-Match", ""), etag):
+            # Compression adds Vary to bodies it may encode; a 304 stands in for all of them
+            await Response(status_code=304, headers={**headers, "Vary": "Accept-Encoding"})(scope, receive, send)
+            return
+
+        key = (etag, scope["path"], scope["query_string"])
+        cached = self.cache.get(key) if self.cache_size > 0 and scope["method"] == "GET" else None
+        if cached is not None:
+            self.cache.move_to_end(key)
+            status, raw_headers, body = cached
+            await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        start = {}
+        cacheable = self.cache_size > 0 and scope["method"] == "GET"
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                if message["status"] == 200:
+                    response_headers = MutableHeaders(scope=message)
+                    for name, value in headers.items():
+                        response_headers[name] = value
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                if message.get("more_body", False):
+                    # Streamed (NDJSON) responses are passed through, never kept
+                    start["streamed"] = True
+                elif cacheable and start.get("status") == 200 and not start.get("streamed"):
+                    self.store(key, (200, start["headers"], message.get("body", b"")))
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    def store(self, key, response):
+        self.cache[key] = response
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    async def revalidate_body(self, scope, receive, send):
+        """Buffer the response to tag it by content; a matching ``If-None-Match`` gets a 304 without the body."""
+        start = None
+        chunks = []
+
+        async def buffer(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            if start["status"] != 200:
+                await send(start)
+                await send({"type": "http.response.body", "body": body})
+                return
+            etag = f'W/"{hashlib.sha1(body).hexdigest()[:16]}"'
+            if etag_matches(Headers(scope=scope).get("If-None-Match", ""), etag):
+                await Response(status_code=304, headers={
+                    "ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding",
+                })(scope, receive, send)
+                return
+            response_headers = MutableHeaders(scope=start)
+            response_headers["ETag"] = etag
+            response_headers["Cache-Control"] = "no-cache"
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, buffer)
@@ -0,0 +1,66 @@
+import zlib
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+
+from src.core.config import COMPRESSION_MIN_SIZE, GZIP_LEVEL, BROTLI_QUALITY
+
+try:
+    import brotli
+except ImportError:  # optional: without it responses are only gzip-compressed
+    brotli = None
+
+
+class BrotliResponder(IdentityResponder):
+    """Starlette's gzip responder logic with a brotli stream; streamed chunks are flushed as they go."""
+    content_encoding = "br"
+
+    def __init__(self, app, minimum_size, quality=BROTLI_QUALITY):
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body, *, more_body):
+        compressed = self.compressor.process(body)
+        return compressed + (self.compressor.flush() if more_body else self.compressor.finish())
+
+
+class FlushingGZipResponder(GZipResponder):
+    """Starlette's gzip responder, sync-flushed after each streamed chunk so clients can decode it on arrival."""
+
+    def apply_compression(self, body, *, more_body):
+        if not more_body:
+            return super().apply_compression(body, more_body=False)
+        self.gzip_file.write(body)
+        self.gzip_file.flush(zlib.Z_SYNC_FLUSH)
+        compressed = self.gzip_buffer.getvalue()
+        self.gzip_buffer.seek(0)
+        self.gzip_buffer.truncate()
+        return compressed
+
+
+class CompressionMiddleware:
+    """Brotli for clients that accept it (when ``brotli`` is installed), gzip otherwise.
+
+    Both flush every chunk of a streamed response, so NDJSON hits reach the
+    client as they are written instead of when the stream ends.
+    """
+
+    def __init__(self, app, minimum_size=COMPRESSION_MIN_SIZE, gzip_level=GZIP_LEVEL, brotli_quality=BROTLI_QUALITY):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accepted = Headers(scope=scope).get("Accept-Encoding", "")
+        if brotli is not None and "br" in accepted:
+            responder = BrotliResponder(self.app, self.minimum_size, self.brotli_quality)
+        elif "gzip" in accepted:
+            responder = FlushingGZipResponder(self.app, self.minimum_size, compresslevel=self.gzip_level)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
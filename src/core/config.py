@@ -29,11 +29,92 @@ DEPARTMENT_KEYWORDS = config(
 
 PERSONS_CSV = Path(DATA_PATH) / config("PERSONS_CSV", default="persons.csv")
 PUBLICATIONS_CSV = Path(DATA_PATH) / config("PUBLICATIONS_CSV", default="publications.csv")
-DATA_JSON = Path(DATA_PATH) / config("DATA_JSON", default="data.json")
-PROCESSED_DOCUMENTS = Path(DATA_PATH) / config("PROCESSED_DOCUMENTS", default="processed_documents.json")
+# JSON Lines; append .gz to either name for gzip compression
+DATA_JSON = Path(DATA_PATH) / config("DATA_JSON", default="data.jsonl")
+PROCESSED_DOCUMENTS = Path(DATA_PATH) / config("PROCESSED_DOCUMENTS", default="processed_documents.jsonl")
+CRAWL_DB = Path(DATA_PATH) / config("CRAWL_DB", default="crawl.db")
+CRAWL_JOURNAL = Path(DATA_PATH) / config("CRAWL_JOURNAL", default="crawl_journal.jsonl")
+CRAWL_METRICS = Path(DATA_PATH) / config("CRAWL_METRICS", default="crawl_metrics.json")
+CRAWL_HISTORY = Path(DATA_PATH) / config("CRAWL_HISTORY", default="crawl_history.jsonl")
+RUN_MANIFEST = Path(DATA_PATH) / config("RUN_MANIFEST", default="run_manifest.json")
 
 PERSON_CONCURRENCY = config("PERSON_CONCURRENCY", cast=int, default=6)
 PUB_CONCURRENCY = config("PUB_CONCURRENCY", cast=int, default=16)
+PARSE_WORKERS = config("PARSE_WORKERS", cast=int, default=os.cpu_count() or 1)
+# Worker processes for preprocessing and tokenization (1 = in-process)
+PREPROCESS_WORKERS = config("PREPROCESS_WORKERS", cast=int, default=os.cpu_count() or 1)
+PREPROCESS_CHUNK_SIZE = config("PREPROCESS_CHUNK_SIZE", cast=int, default=200)
+
+# Analyzer chain shared by indexing, queries and stats (see text_processing.TextProcessor)
+ANALYZER_CHAIN = config(
+    "ANALYZER_CHAIN",
+    cast=lambda v: [k.strip() for k in v.split(",")],
+    default="lowercase,strip,nltk,stopwords,porter"
+)
+# Also index adjacent word pairs so two-word phrases are a single postings lookup
+ANALYZER_SHINGLES = config("ANALYZER_SHINGLES", cast=bool, default=False)
+
+# Recently analyzed queries kept by each SearchEngine
+QUERY_CACHE_SIZE = config("QUERY_CACHE_SIZE", cast=int, default=1024)
+
+# Autocomplete: prefixes up to this length get their top suggestions precomputed
+SUGGEST_PRECOMPUTED_PREFIX = config("SUGGEST_PRECOMPUTED_PREFIX", cast=int, default=2)
+SUGGEST_PRECOMPUTED_TOP = config("SUGGEST_PRECOMPUTED_TOP", cast=int, default=10)
+
+# Spelling correction: edit distance cap and candidates added per misspelled word
+FUZZY_MAX_EDITS = config("FUZZY_MAX_EDITS", cast=int, default=2)
+FUZZY_EXPANSIONS = config("FUZZY_EXPANSIONS", cast=int, default=3)
+
+# Characters of abstract shown around the best matching passage of each result
+SNIPPET_LENGTH = config("SNIPPET_LENGTH", cast=int, default=200)
+
+# Nearest neighbours precomputed per document for /documents/{doc_id}/similar
+SIMILAR_TOP_N = config("SIMILAR_TOP_N", cast=int, default=100)
+
+# Dense retrieval: LSA dimensions, IVF lists (0 = sqrt of the document count) and lists scanned per query
+DENSE_DIM = config("DENSE_DIM", cast=int, default=128)
+DENSE_LISTS = config("DENSE_LISTS", cast=int, default=0)
+DENSE_NPROBE = config("DENSE_NPROBE", cast=int, default=8)
+# Default ranking (lexical, dense or hybrid); hybrid weighs the lexical cosine by HYBRID_WEIGHT
+SEARCH_MODE = config("SEARCH_MODE", default="lexical")
+HYBRID_WEIGHT = config("HYBRID_WEIGHT", cast=float, default=0.5)
+HYBRID_CANDIDATES = config("HYBRID_CANDIDATES", cast=int, default=100)
+
+# Static (query-independent) quality: mix of log citations and recency, computed at index time
+STATIC_CITATION_WEIGHT = config("STATIC_CITATION_WEIGHT", cast=float, default=0.7)
+STATIC_RECENCY_WEIGHT = config("STATIC_RECENCY_WEIGHT", cast=float, default=0.3)
+RECENCY_HALF_LIFE = config("RECENCY_HALF_LIFE", cast=float, default=5.0)
+# Share of the final score taken by static quality (0 ranks on relevance alone)
+STATIC_WEIGHT = config("STATIC_WEIGHT", cast=float, default=0.1)
+
+# Tiered postings: each term's highest-weight documents form its champion list (tier 1)
+CHAMPION_SIZE = config("CHAMPION_SIZE", cast=int, default=32)
+# Per-query deadline for tiered lexical search in milliseconds (0 = always exact)
+SEARCH_BUDGET_MS = config("SEARCH_BUDGET_MS", cast=float, default=0.0)
+
+# API response compression: brotli when installed and accepted, gzip otherwise
+COMPRESSION_MIN_SIZE = config("COMPRESSION_MIN_SIZE", cast=int, default=500)
+GZIP_LEVEL = config("GZIP_LEVEL", cast=int, default=6)
+BROTLI_QUALITY = config("BROTLI_QUALITY", cast=int, default=4)
+
+# HTTP caching of index-backed responses: ETags follow the index version
+HTTP_CACHE_MAX_AGE = config("HTTP_CACHE_MAX_AGE", cast=int, default=300)
+# Complete responses kept in process, per ETag and URL (0 disables)
+RESPONSE_CACHE_SIZE = config("RESPONSE_CACHE_SIZE", cast=int, default=0)
+
+# Near-duplicate removal (MinHash estimate of title + abstract shingle overlap)
+DEDUP_NEAR_DUPLICATES = config("DEDUP_NEAR_DUPLICATES", cast=bool, default=True)
+DEDUP_THRESHOLD = config("DEDUP_THRESHOLD", cast=float, default=0.8)
 
 MIN_DELAY = config("MIN_DELAY", cast=float, default=0.2)
-MAX_DELAY = config("MAX_DELAY", cast=float, default=0.7)
\ No newline at end of file
+MAX_DELAY = config("MAX_DELAY", cast=float, default=0.7)
+
+FETCH_RETRIES = config("FETCH_RETRIES", cast=int, default=2)
+RETRY_BACKOFF = config("RETRY_BACKOFF", cast=float, default=1.0)
+METRICS_INTERVAL = config("METRICS_INTERVAL", cast=float, default=30.0)
+
+STORE_BATCH_SIZE = config("STORE_BATCH_SIZE", cast=int, default=200)
+STORE_COMPACT_SECONDS = config("STORE_COMPACT_SECONDS", cast=float, default=30.0)
+MAX_FETCH_ATTEMPTS = config("MAX_FETCH_ATTEMPTS", cast=int, default=3)
+RESUME_WINDOW_HOURS = config("RESUME_WINDOW_HOURS", cast=float, default=24.0)
+STREAM_POLL_SECONDS = config("STREAM_POLL_SECONDS", cast=float, default=1.0)
\ No newline at end of file
@@ -0,0 +1,156 @@
+import random
+import zlib
+from collections import defaultdict
+
+from src.core.config import DEDUP_THRESHOLD
+from src.crawler.suggest import normalize
+
+# Mersenne prime for the universal hash family h(x) = (a * x + b) mod P
+_PRIME = (1 << 61) - 1
+NUM_PERM = 64
+BANDS = 16
+SHINGLE_SIZE = 3
+# Fewer shingles than this (title-only records, one-word titles) never make a document a candidate:
+# a short text collides with unrelated ones far too easily
+MIN_SHINGLES = 4
+
+# What the parser stores when a publication has no abstract
+PLACEHOLDER_ABSTRACTS = ("[no abstract]",)
+
+
+def shingle_text(doc):
+    """The document's ``content`` without a placeholder abstract, which carries no signal."""
+    content = doc.get("content", "")
+    if doc.get("abstract", "").strip() not in PLACEHOLDER_ABSTRACTS:
+        return content
+    words, placeholder = content.split(), normalize(doc["abstract"]).split()
+    if placeholder and words[-len(placeholder):] == placeholder:
+        words = words[:-len(placeholder)]
+    return " ".join(words)
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Hashed word n-grams of already normalised text."""
+    words = text.split()
+    if len(words) <= size:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))} if words else set()
+    return {
+        zlib.crc32(" ".join(words[i:i + size]).encode("utf-8"))
+        for i in range(len(words) - size + 1)
+    }
+
+
+class NearDuplicateDetector:
+    """Online MinHash + LSH clustering of near-duplicate publications.
+
+    Each document's title + abstract (``content``) is reduced to a MinHash
+    signature and split into bands; documents sharing a band bucket are
+    candidates, and candidates whose signatures agree on at least
+    ``threshold`` of their values (an estimate of shingle Jaccard similarity)
+    are merged. Documents with fewer than ``MIN_SHINGLES`` shingles are never
+    candidates. Records sharing a DOI already share a doc ID, and clusters
+    holding different DOIs are never merged: those are distinct papers.
+    Each cluster's canonical document is the one with a DOI, then the most
+    citations, then the longest abstract, then the first seen. Clusters are
+    kept with a union-find.
+    """
+
+    def __init__(self, threshold=DEDUP_THRESHOLD, num_perm=NUM_PERM, bands=BANDS, seed=1):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = random.Random(seed)
+        self.perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+        self.signatures = {}
+        self.ranks = {}
+        self.parent = {}
+        self.canonical = {}
+        # Root -> the (at most one) normalized DOI in its cluster
+        self.dois = {}
+        self.buckets = defaultdict(list)
+
+    def signature(self, text):
+        hashes = shingles(text)
+        if len(hashes) < MIN_SHINGLES:
+            return None
+        return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in self.perms)
+
+    def similarity(self, sig_a, sig_b):
+        return sum(x == y for x, y in zip(sig_a, sig_b)) / len(sig_a)
+
+    def _find(self, doc_id):
+        root = doc_id
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[doc_id] != root:
+            self.parent[doc_id], doc_id = root, self.parent[doc_id]
+        return root
+
+    def _rank(self, doc):
+        return (bool(doc.get("doi")), doc.get("citations") or 0, len(doc.get("abstract", "")), -len(self.ranks))
+
+    def add(self, doc_id, doc):
+        """Add a document and return the IDs that stopped being canonical.
+
+        The returned list contains ``doc_id`` itself when it duplicates a
+        better document already seen, and earlier canonical documents it
+        displaces otherwise.
+        """
+        if doc_id in self.parent:
+            return []
+
+        self.parent[doc_id] = doc_id
+        self.canonical[doc_id] = doc_id
+        self.ranks[doc_id] = self._rank(doc)
+        doi = (doc.get("doi") or "").strip().lower()
+        if doi:
+            self.dois[doc_id] = doi
+
+        signature = self.signature(shingle_text(doc))
+        if signature is None:
+            return []
+        self.signatures[doc_id] = signature
+
+        candidates = set()
+        for band in range(self.bands):
+            key = (band, signature[band * self.rows:(band + 1) * self.rows])
+            candidates.update(self.buckets[key])
+            self.buckets[key].append(doc_id)
+
+        before = {doc_id}
+        for other in sorted(candidates):
+            root = self._find(other)
+            if root == self._find(doc_id) or self._conflicting_dois(root, self._find(doc_id)):
+                continue
+            if self.similarity(signature, self.signatures[other]) >= self.threshold:
+                before.add(self.canonical[root])
+                self._union(doc_id, other)
+
+        winner = self.canonical[self._find(doc_id)]
+        return sorted(d for d in before if d != winner)
+
+    def _conflicting_dois(self, root_a, root_b):
+        doi_a, doi_b = self.dois.get(root_a), self.dois.get(root_b)
+        return bool(doi_a and doi_b and doi_a != doi_b)
+
+    def _union(self, a, b):
+        root_a, root_b = self._find(a), self._find(b)
+        best = max(self.canonical[root_a], self.canonical[root_b], key=self.ranks.__getitem__)
+        self.parent[root_b] = root_a
+        self.canonical[root_a] = best
+        self.canonical.pop(root_b, None)
+        doi = self.dois.pop(root_b, None)
+        if doi:
+            self.dois.setdefault(root_a, doi)
+
+    @property
+    def removed(self):
+        """Every document that is not the canonical member of its cluster."""
+        return {doc_id for doc_id in self.parent if self.canonical[self._find(doc_id)] != doc_id}
+
+    def clusters(self):
+        groups = defaultdict(list)
+        for doc_id in self.parent:
+            groups[self._find(doc_id)].append(doc_id)
+        return [members for members in groups.values() if len(members) > 1]
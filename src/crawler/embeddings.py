@@ -0,0 +1,178 @@
+import math
+
+import numpy as np
+
+from src.core.config import DENSE_DIM, DENSE_LISTS, DENSE_NPROBE
+
+# Nonzeros multiplied per step of a sparse product, to bound temporary memory
+_SPMM_STEP = 200_000
+
+
+class SparseRows:
+    """A row-major sparse matrix as coordinate arrays, with the two products randomized SVD needs."""
+
+    def __init__(self, rows, cols, data, shape):
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self.cols = np.asarray(cols, dtype=np.int64)
+        self.data = np.asarray(data, dtype=np.float64)
+        self.shape = shape
+
+    @staticmethod
+    def _accumulate(out_rows, in_rows, data, matrix, size):
+        out = np.zeros((size, matrix.shape[1]))
+        for start in range(0, len(data), _SPMM_STEP):
+            end = start + _SPMM_STEP
+            np.add.at(out, out_rows[start:end], data[start:end, None] * matrix[in_rows[start:end]])
+        return out
+
+    def dot(self, matrix):
+        """``A @ matrix`` for a dense ``matrix``."""
+        return self._accumulate(self.rows, self.cols, self.data, matrix, self.shape[0])
+
+    def tdot(self, matrix):
+        """``A.T @ matrix`` for a dense ``matrix``."""
+        return self._accumulate(self.cols, self.rows, self.data, matrix, self.shape[1])
+
+    def frobenius_sq(self):
+        return float(np.dot(self.data, self.data))
+
+
+def randomized_svd(matrix, rank, oversample=10, power_iterations=2, seed=0):
+    """Truncated SVD ``U, S, Vt`` of a ``SparseRows`` matrix (Halko, Martinsson & Tropp).
+
+    The range of ``A`` is sampled with a Gaussian test matrix, sharpened by a
+    few power iterations (re-orthonormalized each time), and the small
+    projected matrix is decomposed exactly.
+    """
+    rng = np.random.default_rng(seed)
+    width = min(rank + oversample, min(matrix.shape))
+    q, _ = np.linalg.qr(matrix.dot(rng.standard_normal((matrix.shape[1], width))))
+    for _ in range(power_iterations):
+        q, _ = np.linalg.qr(matrix.tdot(q))
+        q, _ = np.linalg.qr(matrix.dot(q))
+
+    # B = Q^T A, stored transposed as A^T Q
+    u_small, singular_values, vt = np.linalg.svd(matrix.tdot(q).T, full_matrices=False)
+    return (q @ u_small)[:, :rank], singular_values[:rank], vt[:rank]
+
+
+def normalize_rows(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+
+def spherical_kmeans(vectors, lists, iterations=10, seed=0, chunk=10_000):
+    """Unit-length centroids and each vector's list, by cosine k-means."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=lists, replace=False)].copy()
+    assignment = np.zeros(len(vectors), dtype=np.int64)
+    for _ in range(iterations):
+        for start in range(0, len(vectors), chunk):
+            assignment[start:start + chunk] = np.argmax(vectors[start:start + chunk] @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        # An emptied list keeps its previous centroid
+        filled = np.bincount(assignment, minlength=lists) > 0
+        centroids[filled] = normalize_rows(sums[filled])
+    return centroids, assignment
+
+
+def build_embeddings(doc_ids, doc_vectors, doc_norms, dim=DENSE_DIM, lists=DENSE_LISTS, seed=0):
+    """LSA document embeddings and an IVF index over them, or None for a tiny corpus.
+
+    The row-normalized TF-IDF matrix is factored by randomized truncated SVD;
+    documents are embedded as their rows of ``U * S`` and queries are folded in
+    through the term components ``V``. Embeddings are unit length, so dot
+    products are cosines. The IVF index clusters them into ``lists`` inverted
+    lists (``sqrt(N)`` when 0) whose members are stored contiguously.
+    """
+    term_ids = {}
+    rows, cols, data = [], [], []
+    for ordinal, doc_id in enumerate(doc_ids):
+        norm = doc_norms.get(doc_id, 0)
+        if not norm:
+            continue
+        for term, weight in doc_vectors[doc_id].items():
+            rows.append(ordinal)
+            cols.append(term_ids.setdefault(term, len(term_ids)))
+            data.append(weight / norm)
+
+    rank = min(dim, len(doc_ids) - 1, len(term_ids) - 1)
+    if rank < 1:
+        return None
+
+    matrix = SparseRows(rows, cols, data, (len(doc_ids), len(term_ids)))
+    u, singular_values, vt = randomized_svd(matrix, rank, seed=seed)
+    embeddings = normalize_rows(u * singular_values).astype(np.float32)
+
+    lists = min(lists or max(1, round(math.sqrt(len(doc_ids)))), len(doc_ids))
+    centroids, assignment = spherical_kmeans(embeddings, lists, seed=seed)
+    order = np.argsort(assignment, kind="stable")
+    offsets = np.concatenate(([0], np.cumsum(np.bincount(assignment, minlength=lists))))
+
+    return {
+        "dim": rank,
+        "term_ids": term_ids,
+        "components": vt.T.astype(np.float32),
+        "doc_embeddings": embeddings,
+        "energy": round(float(np.sum(singular_values ** 2)) / matrix.frobenius_sq(), 4),
+        "centroids": centroids.astype(np.float32),
+        "list_members": order.astype(np.int32),
+        "list_offsets": offsets.astype(np.int64),
+    }
+
+
+class DenseIndex:
+    """Query-time side of ``build_embeddings``: fold-in and IVF search over document ordinals."""
+
+    def __init__(self, data, nprobe=DENSE_NPROBE):
+        self.dim = data["dim"]
+        self.term_ids = data["term_ids"]
+        self.components = data["components"]
+        self.doc_embeddings = data["doc_embeddings"]
+        self.centroids = data["centroids"]
+        self.list_members = data["list_members"]
+        self.list_offsets = data["list_offsets"]
+        self.nprobe = nprobe
+
+    def __len__(self):
+        return len(self.doc_embeddings)
+
+    @property
+    def lists(self):
+        return len(self.centroids)
+
+    def embed(self, terms, weights):
+        """Unit-length embedding of a weighted bag of analyzed terms, or None if none are known."""
+        known = [(self.term_ids[term], weight) for term, weight in zip(terms, weights) if term in self.term_ids]
+        if not known:
+            return None
+        ids, values = zip(*known)
+        vector = np.asarray(values, dtype=np.float32) @ self.components[list(ids)]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else None
+
+    def scores(self, vector, ordinals):
+        """Exact cosine of ``vector`` with the given documents."""
+        return self.doc_embeddings[ordinals] @ vector
+
+    @staticmethod
+    def _top(scores, ordinals, k):
+        if len(scores) > k:
+            best = np.argpartition(-scores, k)[:k]
+            scores, ordinals = scores[best], ordinals[best]
+        order = np.argsort(-scores, kind="stable")
+        return [(int(ordinals[i]), float(scores[i])) for i in order]
+
+    def exact_search(self, vector, k):
+        """Brute force over every document: the reference the IVF search is measured against."""
+        return self._top(self.doc_embeddings @ vector, np.arange(len(self.doc_embeddings)), k)
+
+    def search(self, vector, k, nprobe=None):
+        """``(ordinal, cosine)`` of the approximate top ``k``, scanning the ``nprobe`` closest lists."""
+        nprobe = min(nprobe or self.nprobe, self.lists)
+        probed = np.argpartition(-(self.centroids @ vector), nprobe - 1)[:nprobe]
+        candidates = np.concatenate([
+            self.list_members[self.list_offsets[i]:self.list_offsets[i + 1]] for i in probed
+        ])
+        return self._top(self.scores(vector, candidates), candidates, k)
@@ -1,77 +1,495 @@
-import json
+import os
 import math
+import hashlib
+import time
+import heapq
 import pickle
+from datetime import datetime
 from collections import defaultdict, Counter
-from src.crawler.text_processing import preprocess_text
+from src.crawler.text_processing import TextProcessor, get_processor, preprocess_text
+from src.crawler.preprocessor import iter_processed_documents
+from src.crawler.suggest import build_suggestions
+from src.crawler.spelling import build_spelling_index
+from src.crawler.snippets import snippet_source, token_offsets
+from src.crawler.similar import build_neighbours
+from src.crawler.embeddings import build_embeddings
+from src.crawler.quality import static_scores
+from src.utils.parallel import imap_chunks
 
 
-from src.core.config import INDEX_PATH, CLEAN_FILE
+from src.core.config import (
+    INDEX_PATH,
+    PROCESSED_DOCUMENTS,
+    PREPROCESS_WORKERS,
+    PREPROCESS_CHUNK_SIZE,
+    SIMILAR_TOP_N,
+    STATIC_CITATION_WEIGHT,
+    STATIC_RECENCY_WEIGHT,
+    RECENCY_HALF_LIFE,
+    CHAMPION_SIZE,
+)
+
+
+# Upper bounds (in tokens) of the document length histogram; the last bucket is open
+LENGTH_BUCKETS = (10, 25, 50, 100, 200, 400, 800)
+
+
+def _analyze_chunk(contents):
+    # Runs in a worker process; None marks a document whose postings are reused
+    return [preprocess_text(content) if content is not None else None for content in contents]
+
+
+def length_distribution(lengths):
+    """Summary and histogram of document lengths in tokens."""
+    lengths = sorted(lengths)
+    if not lengths:
+        return {"min": 0, "max": 0, "mean": 0, "p50": 0, "p90": 0, "p99": 0, "histogram": {}}
+
+    def percentile(p):
+        return lengths[min(len(lengths) - 1, int(p / 100 * len(lengths)))]
+
+    histogram = {}
+    bounds = [0, *LENGTH_BUCKETS]
+    for low, high in zip(bounds, LENGTH_BUCKETS):
+        histogram[f"{low}-{high}"] = sum(1 for n in lengths if low <= n < high)
+    histogram[f"{LENGTH_BUCKETS[-1]}+"] = sum(1 for n in lengths if n >= LENGTH_BUCKETS[-1])
+
+    return {
+        "min": lengths[0],
+        "max": lengths[-1],
+        "mean": round(sum(lengths) / len(lengths), 2),
+        "p50": percentile(50),
+        "p90": percentile(90),
+        "p99": percentile(99),
+        "histogram": histogram,
+    }
+
 
 class TFIDFIndexer:
    
-    def __init__(self):
+    def __init__(self, workers=PREPROCESS_WORKERS, chunk_size=PREPROCESS_CHUNK_SIZE):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.processor = get_processor()
         self.documents = {}
+        self.doc_lengths = {}
         self.inverted_index = defaultdict(lambda: defaultdict(list))
         self.tf_index = defaultdict(lambda: defaultdict(int))
         self.idf = {}
         self.doc_vectors = {}
         self.doc_norms = {}
+        self.suggestions = None
+        self.spelling = None
+        # Sorted postings over document ordinals, for boolean evaluation and impact-ordered scoring.
+        # Ordinals follow descending static score, so postings list the best documents first.
+        self.doc_ids = []
+        self.static_scores = {}
+        self.postings = {}
+        # Normalized weight (tf-idf / doc norm) of each posting, and each term's largest one
+        self.impacts = {}
+        self.max_impact = {}
+        # Tier 1: each term's CHAMPION_SIZE highest-weight ordinals, and the weight no other posting exceeds
+        self.champions = {}
+        self.champion_floor = {}
+        self.field_postings = {}
+        # Character span of each token position in title + abstract, for snippets and highlighting
+        self.offsets = {}
+        self._word_terms = {}
+        # Precomputed "more like this" lists: doc_id -> [(doc_id, cosine)]
+        self.similar = None
+        # LSA embeddings and their IVF index (see embeddings.build_embeddings)
+        self.embeddings = None
+        # Per-document term counts, kept so documents can be replaced and vectors built without a full term scan
+        self.doc_term_counts = {}
+        # Optional word-bigram field: shingle -> {doc_id: count}
+        self.shingle_index = defaultdict(dict)
+        self.doc_shingle_counts = {}
+        self.previous_documents = {}
+        self._previous_postings = {}
+        # Neighbour lists of the previous build and documents analyzed since, so unchanged lists are reused
+        self._previous_similar = None
+        self._changed = set()
+        self.reused = 0
+        self.analyzed = 0
+        # Build timings (seconds) and corpus statistics stored in the index
+        self.timings = defaultdict(float)
+        self.stats = None
+
+    def load_previous(self, index):
+        """Reuse postings of documents whose content is unchanged since ``index`` was built."""
+        if TextProcessor.from_config(index.get("analyzer")).version != self.processor.version:
+            print("  Previous index was built by a different analyzer, not reusing it")
+            return
+        self.previous_documents = index["documents"]
+        if (index.get("stats") or {}).get("similar_top_n") == SIMILAR_TOP_N:
+            self._previous_similar = index.get("similar")
+        self._previous_postings = defaultdict(dict)
+        for term, docs in index["inverted_index"].items():
+            for doc_id, positions in docs.items():
+                self._previous_postings[doc_id][term] = positions
         
-    def build_index(self, documents):
-        
-        self.documents = documents
-        N = len(documents)
+    def _reusable(self, doc_id, doc):
+        previous = self.previous_documents.get(doc_id)
+        return previous is not None and previous.get("content") == doc["content"]
 
-        print(f"Building index for {N} documents...")
+    def stored_tokens(self, doc):
+        """Token stream persisted by the preprocessor, if it came from the current analyzer."""
+        if doc.get("analyzer") == self.processor.version:
+            return doc.get("tokens")
+        return None
 
-        print("  Building positional index...")
-        for doc_id, doc in documents.items():
-            tokens = preprocess_text(doc["content"])
+    @staticmethod
+    def tokens_from_positions(term_positions):
+        """Rebuild a token stream from positional postings."""
+        placed = sorted((pos, term) for term, positions in term_positions.items() for pos in positions)
+        return [term for _, term in placed]
+
+    def add_document(self, doc_id, doc, tokens=None):
+        """Index one document; ``tokens`` may be passed in when already analyzed."""
+        if doc_id in self.documents:
+            self.remove_document(doc_id)
+
+        if tokens is None:
+            tokens = self.stored_tokens(doc)
+        # Tokens live in the postings; keep them out of the stored document
+        self.documents[doc_id] = {k: v for k, v in doc.items() if k not in ("tokens", "analyzer")}
+
+        if self._reusable(doc_id, doc):
+            term_positions = self._previous_postings.get(doc_id, {})
+            for term, positions in term_positions.items():
+                self.inverted_index[term][doc_id] = list(positions)
+            counts = Counter({term: len(positions) for term, positions in term_positions.items()})
+            if self.processor.shingles:
+                tokens = self.tokens_from_positions(term_positions)
+            self.reused += 1
+        else:
+            if tokens is None:
+                tokens = self.processor.preprocess_text(doc["content"])
             
             for pos, term in enumerate(tokens):
                 self.inverted_index[term][doc_id].append(pos)
             
             counts = Counter(tokens)
-            for term, freq in counts.items():
-                self.tf_index[term][doc_id] = freq
+            self.analyzed += 1
+            self._changed.add(doc_id)
+
+        for term, freq in counts.items():
+            self.tf_index[term][doc_id] = freq
+        self.doc_term_counts[doc_id] = counts
+        self.doc_lengths[doc_id] = sum(counts.values())
+        self.add_offsets(doc_id, doc)
+
+        if self.processor.shingles:
+            shingle_counts = Counter(self.processor.bigrams(tokens))
+            for shingle, freq in shingle_counts.items():
+                self.shingle_index[shingle][doc_id] = freq
+            self.doc_shingle_counts[doc_id] = shingle_counts
+
+    def add_documents(self, documents):
+        """Index ``(doc_id, doc)`` pairs, tokenizing across worker processes.
+
+        Documents are added in input order, so the index does not depend on
+        the number of workers.
+        """
+        start = time.perf_counter()
+        count = 0
+
+        def payload(chunk):
+            return [
+                None if self._reusable(doc_id, doc) or self.stored_tokens(doc) is not None else doc["content"]
+                for doc_id, doc in chunk
+            ]
+
+        for chunk, analyzed in imap_chunks(_analyze_chunk, documents, self.workers, self.chunk_size, payload):
+            for (doc_id, doc), tokens in zip(chunk, analyzed):
+                self.add_document(doc_id, doc, tokens)
+                count += 1
+                if count % 500 == 0:
+                    print(f"  Indexed {count} documents")
+
+        elapsed = time.perf_counter() - start
+        self.timings["add_documents"] += elapsed
+        print(
+            f"  Indexed {count} documents in {elapsed:.2f}s "
+            f"({count / max(elapsed, 1e-9):.0f} docs/sec, {max(self.workers, 1)} workers)"
+        )
+        return count
+
+    def add_offsets(self, doc_id, doc):
+        """Record where each token position lies in the raw title and abstract.
+
+        Offsets that do not line up with the document's token count (an
+        analyzer that does not split on word boundaries) are not stored, and
+        its results get an unhighlighted snippet.
+        """
+        def analyze_word(word):
+            if word not in self._word_terms:
+                self._word_terms[word] = self.processor.preprocess_text(word)
+            return self._word_terms[word]
+
+        offsets = token_offsets(snippet_source(doc), analyze_word)
+        if len(offsets) == self.doc_lengths[doc_id]:
+            self.offsets[doc_id] = offsets
+
+    def remove_document(self, doc_id):
+        self.documents.pop(doc_id, None)
+        self.doc_lengths.pop(doc_id, None)
+        self.offsets.pop(doc_id, None)
+        for term in self.doc_term_counts.pop(doc_id, {}):
+            del self.inverted_index[term][doc_id]
+            del self.tf_index[term][doc_id]
+            if not self.tf_index[term]:
+                del self.inverted_index[term]
+                del self.tf_index[term]
+        for shingle in self.doc_shingle_counts.pop(doc_id, {}):
+            del self.shingle_index[shingle][doc_id]
+            if not self.shingle_index[shingle]:
+                del self.shingle_index[shingle]
+
+    def finalize(self):
+        N = len(self.documents)
+
+        if self.previous_documents:
+            removed = sum(1 for doc_id in self.previous_documents if doc_id not in self.documents)
+            print(
+                f"  Reused {self.reused} unchanged documents, analyzed {self.analyzed} "
+                f"new/changed, dropped {removed} removed"
+            )
+            # Only needed while documents are being added
+            self.previous_documents = {}
+            self._previous_postings = {}
 
         print("  Computing IDF scores...")
+        start = time.perf_counter()
+        self.idf = {}
         for term, doc_dict in self.tf_index.items():
             df = len(doc_dict)  # Document frequency
             # Smoothed IDF formula
             self.idf[term] = math.log((N + 1) / (df + 1)) + 1
 
+        self.timings["idf"] = time.perf_counter() - start
+
         print(" Computing TF-IDF vectors...")
-        for doc_id, doc in documents.items():
-            vector = {}
-            norm_sq = 0
-            
-            for term in self.tf_index.keys():
-                tf = self.tf_index[term].get(doc_id, 0)
-                if tf > 0:
-                    tfidf = tf * self.idf[term]
-                    vector[term] = tfidf
-                    norm_sq += tfidf ** 2
+        start = time.perf_counter()
+        self.doc_vectors = {}
+        self.doc_norms = {}
+        for doc_id, counts in self.doc_term_counts.items():
+            vector = {term: tf * self.idf[term] for term, tf in counts.items()}
+            norm_sq = sum(w ** 2 for w in vector.values())
             
             self.doc_vectors[doc_id] = vector
             self.doc_norms[doc_id] = math.sqrt(norm_sq) if norm_sq > 0 else 0
 
+        self.timings["vectors"] = time.perf_counter() - start
+
+        print(" Building autocomplete table...")
+        start = time.perf_counter()
+        self.suggestions = build_suggestions(self.documents, self.processor.stop_words)
+        self.timings["suggest"] = time.perf_counter() - start
+
+        print(" Building spelling index...")
+        start = time.perf_counter()
+        # The autocomplete table's term entries are exactly the surface vocabulary
+        vocabulary = [
+            (key, weight)
+            for key, weight, doc_id in zip(self.suggestions["keys"], self.suggestions["weights"], self.suggestions["doc_ids"])
+            if doc_id is None
+        ]
+        self.spelling = build_spelling_index([w for w, _ in vocabulary], [weight for _, weight in vocabulary])
+        self.timings["spelling"] = time.perf_counter() - start
+
+        print(" Computing static quality scores...")
+        start = time.perf_counter()
+        self.static_scores = static_scores(self.documents)
+        self.timings["static_scores"] = time.perf_counter() - start
+
+        print(" Building sorted postings...")
+        start = time.perf_counter()
+        self.build_postings()
+        self.timings["postings"] = time.perf_counter() - start
+
+        print(" Computing LSA embeddings...")
+        start = time.perf_counter()
+        self.embeddings = build_embeddings(self.doc_ids, self.doc_vectors, self.doc_norms)
+        self.timings["embeddings"] = time.perf_counter() - start
+
+        print(" Precomputing similar documents...")
+        start = time.perf_counter()
+        self.similar = build_neighbours(
+            self.doc_ids, self.doc_vectors, self.doc_norms, workers=self.workers, block_size=self.chunk_size,
+            previous=self._previous_similar, changed=self._changed,
+        )
+        self._previous_similar = None
+        self._changed = set()
+        self.timings["similar"] = time.perf_counter() - start
+
+        self.stats = self.build_statistics()
         print(" Index building complete!")
         return self.get_index_dict()
+
+    def build_postings(self):
+        """Number documents and store each term's postings as a sorted list of ordinals.
+
+        Ordinals are assigned by descending static score (ties by doc ID), so
+        walking postings in order meets the highest-quality documents first
+        and scoring can stop early. Each posting's normalized weight is stored
+        alongside in ``impacts``, and the ``CHAMPION_SIZE`` highest-weight
+        postings of each term form its tier-1 champion list. Besides title + abstract terms, ``title`` and
+        ``author`` fields get their own postings so queries can be scoped to them.
+        """
+        self.doc_ids = sorted(self.documents, key=lambda doc_id: (-self.static_scores.get(doc_id, 0.0), doc_id))
+        ordinals = {doc_id: i for i, doc_id in enumerate(self.doc_ids)}
+        self.postings = {}
+        self.impacts = {}
+        self.max_impact = {}
+        self.champions = {}
+        self.champion_floor = {}
+        for term, docs in self.inverted_index.items():
+            ranked = sorted(ordinals[doc_id] for doc_id in docs)
+            impacts = [
+                self.doc_vectors[self.doc_ids[o]][term] / self.doc_norms[self.doc_ids[o]] for o in ranked
+            ]
+            self.postings[term] = ranked
+            self.impacts[term] = impacts
+            self.max_impact[term] = max(impacts)
+
+            if len(ranked) > CHAMPION_SIZE:
+                best = heapq.nlargest(CHAMPION_SIZE, range(len(ranked)), key=impacts.__getitem__)
+                self.champions[term] = sorted(ranked[i] for i in best)
+                self.champion_floor[term] = min(impacts[i] for i in best)
+            else:
+                # Every posting is a champion: tier 2 holds nothing for this term
+                self.champions[term] = ranked
+                self.champion_floor[term] = 0.0
+
+        fields = {"title": defaultdict(list), "author": defaultdict(list)}
+        # Author names repeat across many documents, so analyze each once
+        analyzed_names = {}
+        for ordinal, doc_id in enumerate(self.doc_ids):
+            doc = self.documents[doc_id]
+            for term in set(self.processor.preprocess_text(doc.get("title", ""))):
+                fields["title"][term].append(ordinal)
+
+            author_terms = set()
+            for author in doc.get("authors", []):
+                name = author.get("name", "")
+                if name not in analyzed_names:
+                    analyzed_names[name] = self.processor.preprocess_text(name)
+                author_terms.update(analyzed_names[name])
+            for term in author_terms:
+                fields["author"][term].append(ordinal)
+
+        self.field_postings = {field: dict(postings) for field, postings in fields.items()}
+
+    def build_statistics(self):
+        """Corpus statistics computed once at build time and served by ``/stats``."""
+        stats = {
+            "built_at": datetime.now().isoformat(timespec="seconds"),
+            "analyzer": self.processor.version,
+            "documents": len(self.documents),
+            "terms": len(self.inverted_index),
+            "postings": sum(len(docs) for docs in self.inverted_index.values()),
+            "field_postings": {
+                field: sum(len(docs) for docs in postings.values())
+                for field, postings in self.field_postings.items()
+            },
+            "tokens": sum(self.doc_lengths.values()),
+            "documents_with_offsets": len(self.offsets),
+            "suggest_entries": len(self.suggestions["keys"]) if self.suggestions else 0,
+            "spelling_words": len(self.spelling["words"]) if self.spelling else 0,
+            "similar_top_n": SIMILAR_TOP_N,
+            "champion_size": CHAMPION_SIZE,
+            "champion_postings": sum(len(ordinals) for ordinals in self.champions.values()),
+            "static_scores": {
+                "citation_weight": STATIC_CITATION_WEIGHT,
+                "recency_weight": STATIC_RECENCY_WEIGHT,
+                "recency_half_life": RECENCY_HALF_LIFE,
+                "mean": round(sum(self.static_scores.values()) / len(self.static_scores), 4) if self.static_scores else 0,
+            },
+            "doc_length": length_distribution(self.doc_lengths.values()),
+            "reused_documents": self.reused,
+            "analyzed_documents": self.analyzed,
+            "timings_seconds": {name: round(seconds, 4) for name, seconds in self.timings.items()},
+        }
+        if self.embeddings is not None:
+            stats["dense"] = {
+                "dim": self.embeddings["dim"],
+                "lists": len(self.embeddings["centroids"]),
+                "energy": self.embeddings["energy"],
+            }
+        if self.processor.shingles:
+            stats["shingles"] = len(self.shingle_index)
+            stats["shingle_postings"] = sum(len(docs) for docs in self.shingle_index.values())
+        return stats
+
+    def build_index(self, documents):
+        items = documents.items() if isinstance(documents, dict) else documents
+
+        print("Building index...")
+
+        print("  Building positional index...")
+        self.add_documents(items)
+
+        return self.finalize()
     
     def get_index_dict(self):
-        return {
+        index = {
             "documents": self.documents,
             "inverted_index": dict(self.inverted_index),
             "tf_index": dict(self.tf_index),
             "idf": self.idf,
             "doc_vectors": self.doc_vectors,
-            "doc_norms": self.doc_norms
+            "doc_norms": self.doc_norms,
+            "doc_lengths": self.doc_lengths,
+            "analyzer": self.processor.config(),
+            "offsets": self.offsets,
         }
+        if self.processor.shingles:
+            index["shingle_index"] = dict(self.shingle_index)
+        if self.doc_ids:
+            index["doc_ids"] = self.doc_ids
+            index["static_scores"] = [self.static_scores[doc_id] for doc_id in self.doc_ids]
+            index["postings"] = self.postings
+            index["impacts"] = self.impacts
+            index["max_impact"] = self.max_impact
+            index["champions"] = self.champions
+            index["champion_floor"] = self.champion_floor
+            index["field_postings"] = self.field_postings
+        if self.suggestions is not None:
+            index["suggest"] = self.suggestions
+        if self.spelling is not None:
+            index["spelling"] = self.spelling
+        if self.similar is not None:
+            index["similar"] = self.similar
+        if self.embeddings is not None:
+            index["embeddings"] = self.embeddings
+        if self.stats is not None:
+            index["stats"] = self.stats
+        return index
     
     def save_index(self, filepath=INDEX_PATH):
         # Convert defaultdicts to regular dicts for pickling
         index_data = self._convert_to_regular_dicts(self.get_index_dict())
+
+        # Serialize each structure once: its size tracks growth per structure, and a digest
+        # of all of them is the index version the API uses for HTTP caching
+        start = time.perf_counter()
+        sizes = {}
+        digest = hashlib.sha1()
+        for name, value in index_data.items():
+            if name == "stats":
+                continue
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            sizes[name] = len(data)
+            digest.update(name.encode("utf-8"))
+            digest.update(data)
+        index_data["version"] = digest.hexdigest()[:16]
+
+        if self.stats is not None:
+            self.stats["size_bytes"] = sizes
+            self.stats["version"] = index_data["version"]
+            self.stats["timings_seconds"]["measure_sizes"] = round(time.perf_counter() - start, 4)
+            index_data["stats"] = self.stats
         
         with open(filepath, "wb") as f:
             pickle.dump(index_data, f)
@@ -101,23 +519,31 @@ class TFIDFIndexer:
     def print_statistics(self):
         print("\n Index Statistics:")
         print(f"  Documents: {len(self.documents)}")
+        if self.stats is not None:
+            lengths = self.stats["doc_length"]
+            print(f"  Doc length: mean {lengths['mean']}, p50 {lengths['p50']}, p90 {lengths['p90']}, max {lengths['max']}")
+            if "size_bytes" in self.stats:
+                print(f"  Size: {sum(self.stats['size_bytes'].values()) / 1024:.2f} KB across {len(self.stats['size_bytes'])} structures")
         print(f"  Unique terms: {len(self.inverted_index)}")
         print(f"  Total postings: {sum(len(docs) for docs in self.inverted_index.values())}")
+        print(f"  Analyzer: {self.processor.version}")
+        if self.processor.shingles:
+            print(f"  Unique shingles: {len(self.shingle_index)}")
         
         if self.doc_norms:
             avg_norm = sum(self.doc_norms.values()) / len(self.doc_norms)
             print(f"  Average doc vector norm: {avg_norm:.2f}")
 
 
-def build_index_from_file(input_file=CLEAN_FILE, 
-                           output_file=INDEX_PATH):
-    # Load documents
-    with open(input_file, "r", encoding="utf-8") as f:
-        documents = json.load(f)
-    
-    # Build index
-    indexer = TFIDFIndexer()
-    indexer.build_index(documents)
+def build_index_from_file(input_file=PROCESSED_DOCUMENTS, 
+                           output_file=INDEX_PATH, workers=PREPROCESS_WORKERS):
+    # Build index, reusing the previous one for unchanged documents
+    indexer = TFIDFIndexer(workers=workers)
+    if os.path.exists(output_file):
+        indexer.load_previous(TFIDFIndexer.load_index(output_file))
+
+    # Documents are streamed from the processed file rather than loaded at once
+    indexer.build_index(iter_processed_documents(input_file))
     
     # Save index
     indexer.save_index(output_file)
@@ -0,0 +1,49 @@
+import json
+import logging
+from pathlib import Path
+from typing import Iterator, Tuple
+
+from src.core.config import CRAWL_JOURNAL
+
+log = logging.getLogger("crawler")
+
+
+class CrawlJournal:
+    """Append-only JSONL log of crawl results not yet compacted into the store.
+
+    Every row handed to the store is appended (and flushed to the OS) before it
+    is buffered, so a crash loses nothing that was fetched. Once the store has
+    committed its buffer the journal is truncated.
+    """
+
+    def __init__(self, path=CRAWL_JOURNAL):
+        self.path = Path(path)
+        self._file = None
+
+    def append(self, table: str, row: tuple):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps([table, row], ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def replay(self) -> Iterator[Tuple[str, tuple]]:
+        if not self.path.exists():
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                try:
+                    table, row = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-write
+                    log.warning(f" Ignoring unreadable journal line {line_no}")
+                    continue
+                yield table, tuple(row)
+
+    def truncate(self):
+        self.close()
+        open(self.path, "w").close()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,193 @@
+import time
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+from bs4 import BeautifulSoup, NavigableString
+from lxml import etree, html as lxml_html
+
+from src.core.config import BASE_URL, PARSE_WORKERS
+
+
+def _has_class(*names):
+    return " and ".join(
+        f"contains(concat(' ', normalize-space(@class), ' '), ' {n} ')" for n in names
+    )
+
+# Only these subtrees are handed to BeautifulSoup; the rest of the page is
+# tokenized by lxml and thrown away.
+PERSON_XPATHS = (
+    "(//h1)[1]",
+    "(//a[@rel='Organisation'])[1]",
+)
+
+AUTHORS_XPATHS = (
+    f"(//p[{_has_class('relations', 'persons')}])[1]",
+)
+
+PUBLICATION_XPATHS = (
+    "(//h1)[1]",
+    f"(//p[{_has_class('relations', 'persons')}])[1]",
+    f"//div[{_has_class('metric', 'scopus-citations')}]",
+    f"//table[{_has_class('properties')}]",
+    "//div[contains(@class, 'rendering_abstractportal')]"
+    "[not(ancestor::div[contains(@class, 'rendering_abstractportal')])]",
+)
+
+
+def partial_soup(html: str, xpaths) -> BeautifulSoup:
+    """Parse ``html`` with lxml and build a soup from the matching subtrees only."""
+    if not html or not html.strip():
+        return BeautifulSoup("", "lxml")
+    try:
+        tree = lxml_html.fromstring(html)
+    except ValueError:
+        # Unicode input carrying an XML encoding declaration
+        tree = lxml_html.fromstring(html.encode("utf-8"))
+    except etree.ParserError:
+        return BeautifulSoup("", "lxml")
+
+    fragments = [
+        etree.tostring(el, encoding="unicode", method="html", with_tail=False)
+        for xpath in xpaths
+        for el in tree.xpath(xpath)
+    ]
+    return BeautifulSoup("".join(fragments), "lxml")
+
+
+def extract_authors(soup):
+    authors = []
+    block = soup.select_one("p.relations.persons")
+    if not block:
+        return authors
+
+    for node in block.children:
+        if isinstance(node, NavigableString):
+            for name in [p.strip() for p in node.split(",") if p.strip()]:
+                authors.append({"name": name, "url": None})
+        elif node.name == "a":
+            href = node.get("href")
+            authors.append({
+                "name": node.get_text(strip=True),
+                "url": href if href.startswith("http") else f"{BASE_URL}{href}",
+            })
+    return authors
+
+def extract_citations(soup):
+    tag = soup.select_one("div.metric.scopus-citations span.count")
+    try:
+        return int(tag.get_text(strip=True)) if tag else None
+    except ValueError:
+        return None
+
+def extract_publication_details(soup):
+    details = {}
+    rows = soup.select("table.properties tr")
+    for row in rows:
+        k = row.select_one("th")
+        v = row.select_one("td")
+        if not k or not v:
+            continue
+        label = k.get_text(strip=True).lower()
+        value = v.get_text(" ", strip=True)
+
+        if label == "journal":
+            details["journal"] = value
+        elif label == "volume":
+            details["volume"] = value
+        elif label == "number of pages":
+            details["pages"] = value
+        elif label == "article number":
+            details["article_number"] = value
+        elif label == "dois":
+            link = v.select_one("a[href*='doi.org']")
+            details["doi"] = link.get_text(strip=True) if link else value
+        elif label == "publication status":
+            details["publication_date"] = value
+        elif label == "early online date":
+            details["early_online_date"] = value
+
+    return details
+
+
+# Worker entry points. Each returns ``(result, parse_seconds)``.
+
+def parse_person(html: str):
+    start = time.perf_counter()
+    soup = partial_soup(html, PERSON_XPATHS)
+
+    name_tag = soup.select_one("h1")
+    name = name_tag.get_text(strip=True) if name_tag else ""
+
+    org = soup.find("a", {"rel": "Organisation"})
+    department = org.get_text(strip=True) if org else ""
+
+    return (name, department), time.perf_counter() - start
+
+def parse_author_names(html: str):
+    start = time.perf_counter()
+    soup = partial_soup(html, AUTHORS_XPATHS)
+    block = soup.select_one("p.relations.persons")
+    names = []
+
+    if block:
+        for node in block.children:
+            if isinstance(node, NavigableString):
+                names.extend(p.strip() for p in node.split(",") if p.strip())
+            elif node.name == "a":
+                names.append(node.get_text(strip=True))
+
+    return names, time.perf_counter() - start
+
+def parse_publication(html: str, url: str):
+    start = time.perf_counter()
+    soup = partial_soup(html, PUBLICATION_XPATHS)
+
+    title_tag = soup.select_one("h1")
+    title = title_tag.get_text(strip=True) if title_tag else "[no title]"
+
+    abstract_tag = soup.select_one("div[class*='rendering_abstractportal'] .textblock")
+    abstract = abstract_tag.get_text(strip=True) if abstract_tag else "[no abstract]"
+
+    record = {
+        "url": url,
+        "title": title,
+        "abstract": abstract,
+        "authors": extract_authors(soup),
+        "citations_scopus": extract_citations(soup),
+        **extract_publication_details(soup),
+    }
+    return record, time.perf_counter() - start
+
+
+class ParsePool:
+    """Runs the parse_* functions in worker processes so the event loop keeps fetching.
+
+    ``workers=0`` parses inline on the loop, which is handy for debugging.
+    Parse times are reported to ``metrics`` (a ``CrawlMetrics``) when given.
+    """
+
+    def __init__(self, workers=PARSE_WORKERS, metrics=None):
+        self.executor = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+        self.metrics = metrics
+
+    async def run(self, func, *args):
+        if self.metrics is not None:
+            self.metrics.parse_submitted()
+        if self.executor is None:
+            result, elapsed = func(*args)
+        else:
+            loop = asyncio.get_running_loop()
+            result, elapsed = await loop.run_in_executor(self.executor, func, *args)
+        if self.metrics is not None:
+            self.metrics.record_parse(elapsed)
+        return result
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
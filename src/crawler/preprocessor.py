@@ -1,16 +1,75 @@
 import json
 import re
+import time
+import hashlib
+import functools
 from pathlib import Path
 
-from src.core.config import DATA_JSON, PROCESSED_DOCUMENTS
+from src.core.config import (
+    DATA_JSON,
+    PROCESSED_DOCUMENTS,
+    PREPROCESS_WORKERS,
+    PREPROCESS_CHUNK_SIZE,
+    DEDUP_NEAR_DUPLICATES,
+)
+from src.crawler.dedup import NearDuplicateDetector
+from src.utils.jsonl import JsonlWriter, is_jsonl, iter_jsonl, write_jsonl
+from src.utils.parallel import imap_chunks
+from src.crawler import text_processing
+
+
+def iter_raw_publications(path):
+    """Yield ``(url, raw_publication)`` from the crawl store, a JSONL export or a legacy data.json."""
+    path = Path(path)
+
+    if path.suffix == ".db":
+        # Read straight from the crawl store, one row at a time
+        from src.crawler.store import CrawlStore
+
+        with CrawlStore(path) as store:
+            for _, pub_url, pub_data in store.iter_documents():
+                yield pub_url, pub_data
+        return
+
+    if is_jsonl(path):
+        for pub_data in iter_jsonl(path):
+            yield pub_data["url"], pub_data
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        raw_data = json.load(f)
+
+    yield from raw_data.get("publications", {}).items()
+
+
+def iter_processed_documents(path):
+    """Yield ``(doc_id, document)`` from processed JSONL (or a legacy processed JSON file)."""
+    if is_jsonl(path):
+        for doc in iter_jsonl(path):
+            yield doc.pop("doc_id"), doc
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        yield from json.load(f).items()
+
+
+def _process_chunk(records, analyze=True):
+    # Runs in a worker process
+    preprocessor = PublicationPreprocessor(workers=1, analyze=analyze)
+    return [preprocessor.process_record(pub_url, pub_data) for pub_url, pub_data in records]
 
 
 class PublicationPreprocessor:
     
-    def __init__(self, input_file=None):
+    def __init__(self, input_file=None, workers=PREPROCESS_WORKERS, chunk_size=PREPROCESS_CHUNK_SIZE, analyze=True,
+                 dedup=DEDUP_NEAR_DUPLICATES):
         self.input_file = input_file or DATA_JSON
+        self.workers = workers
+        self.chunk_size = chunk_size
+        # Store the analyzed token stream so the indexer and stats need not re-tokenize
+        self.analyze = analyze
+        self.dedup = dedup
         self.processed_publications = {}
-        self.doc_counter = 1
         
     @staticmethod
     def extract_year(date_str):
@@ -26,6 +85,38 @@ class PublicationPreprocessor:
         tokens = text.split()
         return " ".join(tokens)
     
+    @staticmethod
+    def normalize_doi(doi):
+        doi = (doi or "").strip().lower()
+        return re.sub(r"^(https?://(dx\.)?doi\.org/|doi:)", "", doi)
+
+    @staticmethod
+    def make_doc_id(pub_url, doi=""):
+        """Stable ID from the DOI when there is one, otherwise the normalised URL."""
+        doi = PublicationPreprocessor.normalize_doi(doi)
+        key = f"doi:{doi}" if doi else f"url:{pub_url.strip().rstrip('/').lower()}"
+        return f"DOC_{hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]}"
+
+    @staticmethod
+    def content_hash(doc):
+        """Fingerprint of everything stored for a document, used for change detection."""
+        fields = {k: v for k, v in doc.items() if k != "content_hash"}
+        payload = json.dumps(fields, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def diff_documents(previous, current):
+        """Classify doc IDs given ``{doc_id: content_hash}`` maps of two runs."""
+        added = [d for d in current if d not in previous]
+        removed = [d for d in previous if d not in current]
+        changed = [d for d in current if d in previous and previous[d] != current[d]]
+        return {
+            "added": added,
+            "changed": changed,
+            "removed": removed,
+            "unchanged": len(current) - len(added) - len(changed),
+        }
+
     @staticmethod
     def format_author_name(name):
         parts = name.split()
@@ -40,72 +131,150 @@ class PublicationPreprocessor:
         
         return f"{last_name}, {' '.join(initials)}"
 
+    def iter_raw_publications(self):
+        return iter_raw_publications(self.input_file)
+
+    def process_record(self, pub_url, pub_data):
+        authors_list = []
+        for author in pub_data.get("authors", []):
+            author_name = author.get("name", "")
+            author_url = author.get("url")
+            
+            formatted_name = self.format_author_name(author_name)
+            
+            authors_list.append({
+                "name": formatted_name,
+                "profile_url": author_url
+            })
+        
+        title = pub_data.get("title", "")
+        abstract = pub_data.get("abstract", "")
+        
+        publication_date = pub_data.get("publication_date", "")
+        year = self.extract_year(publication_date)
+        
+        citations = pub_data.get("citations_scopus")
+        if citations is None:
+            citations = 0
+        
+        doi = pub_data.get("doi", "")
+        doc_id = self.make_doc_id(pub_url, doi)
+        
+        doc = {
+            "title": title,
+            "year": year,
+            "authors": authors_list,
+            "publication_url": pub_url,
+            "journal": pub_data.get("journal", ""),
+            "volume": pub_data.get("volume", ""),
+            "pages": pub_data.get("pages", ""),
+            "doi": doi,
+            "citations": citations,
+            "abstract": abstract,
+            "content": self.preprocess_text(title + " " + abstract),
+        }
+        if self.analyze:
+            processor = text_processing.get_processor()
+            doc["tokens"] = processor.preprocess_text(doc["content"])
+            doc["analyzer"] = processor.version
+        doc["content_hash"] = self.content_hash(doc)
+        return doc_id, doc
+
+    def iter_process(self, records=None):
+        """Yield ``(doc_id, document)`` pairs without keeping them in memory.
+
+        ``records`` is any iterable of ``(url, raw_publication)``; by default the
+        input file is read. With more than one worker, records are processed in
+        chunks across worker processes and yielded in input order.
+        """
+        if records is None:
+            records = self.iter_raw_publications()
+
+        if self.workers <= 1:
+            for pub_url, pub_data in records:
+                yield self.process_record(pub_url, pub_data)
+            return
+
+        process_chunk = functools.partial(_process_chunk, analyze=self.analyze)
+        for _, processed in imap_chunks(process_chunk, records, self.workers, self.chunk_size):
+            yield from processed
+
     def process(self):
         input_path = Path(self.input_file)
         
         if not input_path.exists():
             print(f"Error: Input file not found: {self.input_file}")
             return {}
-        
-        with open(input_path, "r", encoding="utf-8") as f:
-            raw_data = json.load(f)
 
-        publications = raw_data.get("publications", {})
+        detector = NearDuplicateDetector() if self.dedup else None
+        for doc_id, doc in self.iter_process():
+            # Records sharing a DOI map to one ID; the first one wins, as in save()
+            if doc_id not in self.processed_publications:
+                self.processed_publications[doc_id] = doc
+                if detector is not None:
+                    detector.add(doc_id, doc)
 
-        for pub_url, pub_data in publications.items():
-            doc_id = f"DOC_{self.doc_counter:04d}"
-            
-            authors_list = []
-            for author in pub_data.get("authors", []):
-                author_name = author.get("name", "")
-                author_url = author.get("url")
-                
-                formatted_name = self.format_author_name(author_name)
-                
-                authors_list.append({
-                    "name": formatted_name,
-                    "profile_url": author_url
-                })
-            
-            title = pub_data.get("title", "")
-            abstract = pub_data.get("abstract", "")
-            
-            publication_date = pub_data.get("publication_date", "")
-            year = self.extract_year(publication_date)
-            
-            citations = pub_data.get("citations_scopus")
-            if citations is None:
-                citations = 0
-            
-            doi = pub_data.get("doi", "")
-            
-            self.processed_publications[doc_id] = {
-                "title": title,
-                "year": year,
-                "authors": authors_list,
-                "publication_url": pub_url,
-                "journal": pub_data.get("journal", ""),
-                "volume": pub_data.get("volume", ""),
-                "pages": pub_data.get("pages", ""),
-                "doi": doi,
-                "citations": citations,
-                "abstract": abstract,
-                "content": self.preprocess_text(title + " " + abstract),
-            }
-            self.doc_counter += 1
+        if detector is not None:
+            for doc_id in detector.removed:
+                del self.processed_publications[doc_id]
 
         return self.processed_publications
 
     def save(self, output_file=None):
-        if not self.processed_publications:
-            self.process()
-        
-        output_path = output_file or PROCESSED_DOCUMENTS
-        
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(self.processed_publications, f, indent=2, ensure_ascii=False)
+        """Stream processed documents to JSONL, one ``{"doc_id": ..., ...}`` object per line."""
+        output_path = Path(output_file or PROCESSED_DOCUMENTS)
+        start = time.perf_counter()
+
+        previous = None
+        if output_path.exists():
+            previous = {
+                doc_id: doc.get("content_hash")
+                for doc_id, doc in iter_processed_documents(output_path)
+            }
+
+        if self.processed_publications:
+            documents = self.processed_publications.items()
+        elif Path(self.input_file).exists():
+            documents = self.iter_process()
+        else:
+            print(f"Error: Input file not found: {self.input_file}")
+            documents = ()
+
+        detector = NearDuplicateDetector() if self.dedup else None
+        current = {}
+        with JsonlWriter(output_path) as writer:
+            for doc_id, doc in documents:
+                if doc_id in current:
+                    continue
+                current[doc_id] = doc["content_hash"]
+                writer.write({"doc_id": doc_id, **doc})
+                if detector is not None:
+                    detector.add(doc_id, doc)
+
+        # A later record can displace one already written, so duplicates are
+        # filtered out in a second streaming pass over the output
+        removed = detector.removed if detector is not None else set()
+        if removed:
+            write_jsonl(output_path, (r for r in iter_jsonl(output_path) if r["doc_id"] not in removed))
+            for doc_id in removed:
+                del current[doc_id]
+            print(
+                f"Removed {len(removed)} near-duplicate publications "
+                f"({len(detector.clusters())} duplicate clusters)."
+            )
+        elapsed = time.perf_counter() - start
+
+        if previous is not None:
+            changes = self.diff_documents(previous, current)
+            print(
+                f"Changes since last run: {len(changes['added'])} added, {len(changes['changed'])} changed, "
+                f"{len(changes['removed'])} removed, {changes['unchanged']} unchanged"
+            )
 
-        print(f"Processed {len(self.processed_publications)} unique publications.")
+        print(
+            f"Processed {len(current)} unique publications in {elapsed:.2f}s "
+            f"({len(current) / max(elapsed, 1e-9):.0f} docs/sec, {max(self.workers, 1)} workers)."
+        )
         print(f"Data saved to {output_path}")
 
 
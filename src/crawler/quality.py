@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from src.core.config import STATIC_CITATION_WEIGHT, STATIC_RECENCY_WEIGHT, RECENCY_HALF_LIFE
+from src.crawler.suggest import citation_weight
+
+
+def recency_score(year, current_year, half_life=RECENCY_HALF_LIFE):
+    """1 for this year's publications, halving every ``half_life`` years; 0 when the year is unknown."""
+    if not year:
+        return 0.0
+    return 0.5 ** (max(current_year - int(year), 0) / half_life)
+
+
+def static_scores(documents, citations_weight=STATIC_CITATION_WEIGHT, recency_weight=STATIC_RECENCY_WEIGHT,
+                  half_life=RECENCY_HALF_LIFE, current_year=None):
+    """Query-independent quality of each document in ``{doc_id: doc}``, in [0, 1].
+
+    A weighted mean of log citations (scaled by the most cited document) and
+    exponential recency decay from the build year.
+    """
+    current_year = current_year or datetime.now().year
+    # citation_weight is 1 + log1p(citations)
+    log_citations = {doc_id: citation_weight(doc) - 1 for doc_id, doc in documents.items()}
+    max_log = max(log_citations.values(), default=0) or 1
+    total = citations_weight + recency_weight
+    if total <= 0:
+        return {doc_id: 0.0 for doc_id in documents}
+
+    return {
+        doc_id: round(
+            (citations_weight * log_citations[doc_id] / max_log
+             + recency_weight * recency_score(doc.get("year"), current_year, half_life)) / total,
+            6,
+        )
+        for doc_id, doc in documents.items()
+    }
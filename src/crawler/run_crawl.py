@@ -1,21 +1,43 @@
 import os
 import sys
+import json
 import argparse
+import functools
 import time
+import threading
 from datetime import datetime
 
 from src.core.config import (
     TARGET_URL,
     DATA_PATH,
     DATA_JSON,
+    CRAWL_DB,
     PROCESSED_DOCUMENTS,
     INDEX_PATH,
+    CRAWL_HISTORY,
+    RUN_MANIFEST,
+    DEPARTMENT_KEYWORDS,
+    STREAM_POLL_SECONDS,
+    PREPROCESS_WORKERS,
+    DEDUP_NEAR_DUPLICATES,
+    DEDUP_THRESHOLD,
+    ANALYZER_CHAIN,
+    ANALYZER_SHINGLES,
+    SIMILAR_TOP_N,
+    DENSE_DIM,
+    DENSE_LISTS,
+    STATIC_CITATION_WEIGHT,
+    STATIC_RECENCY_WEIGHT,
+    RECENCY_HALF_LIFE,
+    CHAMPION_SIZE,
 )
 
 
 
 import asyncio
 from src.crawler.scraper import main as scraper_main
+from src.crawler.stage_cache import StageCache, code_digest, config_digest, input_digest
+from src.utils.jsonl import is_jsonl, legacy_json_path, write_jsonl
 
 
 class ResearcherScraper:
@@ -23,8 +45,8 @@ class ResearcherScraper:
     def __init__(self, target_url=None, incremental=True):
         self.incremental = incremental
     
-    def scrape_all(self, output_file="data.json"):
-        asyncio.run(scraper_main())
+    def scrape_all(self, output_file="crawl.db", export_json=True):
+        return asyncio.run(scraper_main(export_json=export_json))
 
 
 
@@ -42,6 +64,92 @@ def print_step(step_num, total_steps, description):
     print(f"{'='*80}\n")
 
 
+def migrate_legacy_json():
+    """One-time conversion of pre-JSONL data.json / processed_documents.json files."""
+    from src.crawler.preprocessor import iter_raw_publications, iter_processed_documents
+
+    conversions = (
+        (DATA_JSON, lambda p: ({"url": url, **record} for url, record in iter_raw_publications(p))),
+        (PROCESSED_DOCUMENTS, lambda p: ({"doc_id": doc_id, **doc} for doc_id, doc in iter_processed_documents(p))),
+    )
+    for path, records in conversions:
+        legacy = legacy_json_path(path)
+        if is_jsonl(path) and not path.exists() and legacy.exists():
+            count = write_jsonl(path, records(legacy))
+            print(f"Migrated {legacy} -> {path} ({count} records)")
+
+
+def stage_fingerprint(stage, input_digest_value):
+    """Inputs, code and config a stage's output depends on."""
+    import src.crawler.store as store
+    import src.crawler.preprocessor as preprocessor
+    import src.crawler.dedup as dedup
+    import src.crawler.indexer as indexer
+    import src.crawler.text_processing as text_processing
+    import src.crawler.suggest as suggest
+    import src.crawler.spelling as spelling
+    import src.crawler.snippets as snippets
+    import src.crawler.similar as similar
+    import src.crawler.embeddings as embeddings
+    import src.crawler.quality as quality
+
+    modules = {
+        "preprocess": (store, preprocessor, dedup, suggest, text_processing),
+        "index": (indexer, text_processing, suggest, spelling, snippets, similar, embeddings, quality),
+        "stream": (store, preprocessor, dedup, indexer, text_processing, suggest, spelling, snippets, similar, embeddings, quality),
+    }[stage]
+
+    return StageCache.fingerprint(
+        inputs=input_digest_value,
+        code=code_digest(*modules),
+        config=config_digest(
+            department_keywords=DEPARTMENT_KEYWORDS,
+            dedup=DEDUP_NEAR_DUPLICATES,
+            dedup_threshold=DEDUP_THRESHOLD,
+            analyzer_chain=ANALYZER_CHAIN,
+            analyzer_shingles=ANALYZER_SHINGLES,
+            similar_top_n=SIMILAR_TOP_N,
+            dense_dim=DENSE_DIM,
+            dense_lists=DENSE_LISTS,
+            static_citation_weight=STATIC_CITATION_WEIGHT,
+            static_recency_weight=STATIC_RECENCY_WEIGHT,
+            recency_half_life=RECENCY_HALF_LIFE,
+            champion_size=CHAMPION_SIZE,
+        ),
+    )
+
+
+def run_cached_stage(cache, stage, input_file, output_file, run):
+    """Run a file-to-file stage unless its inputs, code, config and output are unchanged."""
+    start = time.time()
+    fingerprint = stage_fingerprint(stage, input_digest(input_file))
+
+    if cache.is_fresh(stage, fingerprint, [output_file]):
+        print("Up to date: inputs, code and config unchanged since last run, skipping")
+        cache.record_skip(stage, time.time() - start)
+        return True
+
+    if not run(input_file, output_file):
+        return False
+
+    cache.record(stage, fingerprint, [output_file], time.time() - start)
+    return True
+
+
+def record_crawl_history(summary, history_file=CRAWL_HISTORY):
+    with open(history_file, "a", encoding="utf-8") as f:
+        f.write(json.dumps(summary) + "\n")
+
+    totals = summary["totals"]
+    print(f"Requests: {totals['requests']} | Retries: {totals['retries']} | Failures: {totals['failures']}")
+    for phase, stats in summary["phases"].items():
+        print(
+            f"  {phase:<13} {stats['requests_per_sec']:>8.2f} req/s"
+            f"  p50 {stats['latency_ms'].get('p50', 0):>7.1f}ms"
+            f"  parse {stats['parse']['seconds']:>7.2f}s"
+        )
+
+
 def run_scraper(target_url, output_file):
     try:
         
@@ -49,7 +157,8 @@ def run_scraper(target_url, output_file):
         print(f"Output file: {output_file}")
         
         scraper = ResearcherScraper(target_url)
-        scraper.scrape_all(output_file=output_file)
+        summary = scraper.scrape_all(output_file=output_file)
+        record_crawl_history(summary)
         
         if os.path.exists(output_file):
             file_size = os.path.getsize(output_file) / 1024
@@ -67,7 +176,7 @@ def run_scraper(target_url, output_file):
         return False
 
 
-def run_preprocessor(input_file, output_file):
+def run_preprocessor(input_file, output_file, workers=PREPROCESS_WORKERS):
     try:
         from src.crawler.preprocessor import PublicationPreprocessor
         
@@ -78,7 +187,7 @@ def run_preprocessor(input_file, output_file):
             print(f"\nError: Input file not found: {input_file}")
             return False
         
-        preprocessor = PublicationPreprocessor(input_file)
+        preprocessor = PublicationPreprocessor(input_file, workers=workers)
         preprocessor.save(output_file)
         
         if os.path.exists(output_file):
@@ -96,7 +205,7 @@ def run_preprocessor(input_file, output_file):
         return False
 
 
-def run_indexer(input_file, output_file):
+def run_indexer(input_file, output_file, workers=PREPROCESS_WORKERS):
     try:
         from src.crawler.indexer import build_index_from_file
         
@@ -107,7 +216,7 @@ def run_indexer(input_file, output_file):
             print(f"\nError: Input file not found: {input_file}")
             return False
         
-        build_index_from_file(input_file, output_file)
+        build_index_from_file(input_file, output_file, workers=workers)
         
         if os.path.exists(output_file):
             file_size = os.path.getsize(output_file) / 1024
@@ -124,6 +233,113 @@ def run_indexer(input_file, output_file):
         return False
 
 
+def run_streaming_pipeline(target_url, index_file, cache, scrape=True, workers=PREPROCESS_WORKERS):
+    """Crawl, preprocess and index in one pass.
+
+    The crawler runs in a background thread and commits documents to the crawl
+    store; this thread follows the store, preprocesses each new document and adds
+    it to the index as it arrives, so no intermediate JSON files are written.
+    If the last index is still fresh, indexing only starts once the crawl
+    commits a new document, and is skipped when it never does.
+    Token streams are not stored here: unchanged documents reuse the previous
+    index's postings, and only new or changed ones are tokenized, fanned out
+    across ``workers`` processes by the indexer.
+    """
+    try:
+        start = time.time()
+        from src.crawler.store import CrawlStore
+        from src.crawler.preprocessor import PublicationPreprocessor
+        from src.crawler.indexer import TFIDFIndexer
+        from src.crawler.dedup import NearDuplicateDetector
+
+        done = threading.Event()
+        crawl_result = {}
+
+        def crawl():
+            try:
+                crawl_result["summary"] = ResearcherScraper(target_url).scrape_all(export_json=False)
+            except Exception as e:
+                crawl_result["error"] = e
+            finally:
+                done.set()
+
+        print(f"Crawl store: {CRAWL_DB}")
+        print(f"Index file: {index_file}")
+
+        crawler = None
+        if scrape:
+            crawler = threading.Thread(target=crawl, name="crawler", daemon=True)
+            crawler.start()
+        else:
+            done.set()
+
+        preprocessor = PublicationPreprocessor(CRAWL_DB, workers=1, analyze=False)
+        indexer = TFIDFIndexer(workers=workers)
+
+        with CrawlStore(CRAWL_DB) as store:
+            previous = cache.last_fingerprint("stream")
+            current = stage_fingerprint("stream", store.digest())
+            if previous is not None and previous == current and cache.is_fresh("stream", previous, [index_file]):
+                while not done.is_set() and store.digest() == previous["inputs"]:
+                    done.wait(STREAM_POLL_SECONDS)
+
+                if store.digest() == previous["inputs"]:
+                    if crawler is not None:
+                        crawler.join()
+                        if "error" in crawl_result:
+                            raise crawl_result["error"]
+                        record_crawl_history(crawl_result["summary"])
+                    print("Index is up to date: no new documents, code and config unchanged")
+                    cache.record_skip("stream", time.time() - start)
+                    return True
+
+            if os.path.exists(index_file):
+                indexer.load_previous(TFIDFIndexer.load_index(index_file))
+
+            detector = NearDuplicateDetector() if DEDUP_NEAR_DUPLICATES else None
+
+            def canonical_documents():
+                for doc_id, doc in preprocessor.iter_process(store.follow_documents(done)):
+                    if detector is None or doc_id not in detector.add(doc_id, doc):
+                        yield doc_id, doc
+
+            print("Building index while crawling...")
+            indexer.add_documents(canonical_documents())
+
+            # Documents displaced by a better copy that arrived later
+            if detector is not None and detector.removed:
+                for doc_id in detector.removed:
+                    indexer.remove_document(doc_id)
+                print(f"  Removed {len(detector.removed)} near-duplicate documents")
+
+        if crawler is not None:
+            crawler.join()
+            if "error" in crawl_result:
+                raise crawl_result["error"]
+            record_crawl_history(crawl_result["summary"])
+
+        indexer.finalize()
+        indexer.save_index(index_file)
+
+        with CrawlStore(CRAWL_DB) as store:
+            fingerprint = stage_fingerprint("stream", store.digest())
+        cache.record("stream", fingerprint, [index_file], time.time() - start)
+
+        if os.path.exists(index_file):
+            file_size = os.path.getsize(index_file) / 1024
+            print(f"File size: {file_size:.2f} KB")
+            return True
+        else:
+            print(f"\nError: Index file not created")
+            return False
+
+    except Exception as e:
+        print(f"\nStreaming pipeline failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
 def verify_index(index_file):
     try:
         from src.services.search_engine import SearchEngine
@@ -171,19 +387,37 @@ def main():
     parser.add_argument(
         "--skip-scrape",
         action="store_true",
-        help="Skip scraping step (use existing raw data)"
+        help="Skip scraping step (use existing crawl store)"
     )
     parser.add_argument(
         "--skip-preprocess",
         action="store_true",
         help="Skip preprocessing step (use existing processed data)"
     )
+    parser.add_argument(
+        "--mode",
+        choices=["stream", "files"],
+        default="stream",
+        help="stream: index documents as they are crawled; "
+             "files: run each stage to completion through intermediate files (debugging)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=PREPROCESS_WORKERS,
+        help="Worker processes for preprocessing and tokenization (1 = single process)"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rebuild every stage even if its inputs, code and config are unchanged"
+    )
     
     args = parser.parse_args()
     
     os.makedirs(args.output_dir, exist_ok=True)
     
-    raw_data_file = str(DATA_JSON)
+    raw_data_file = str(CRAWL_DB)
     processed_data_file = str(PROCESSED_DOCUMENTS)
     index_file = str(INDEX_PATH)
     
@@ -192,7 +426,47 @@ def main():
     print(f"Output directory: {args.output_dir}")
     
     start_time = time.time()
+    migrate_legacy_json()
+    cache = StageCache(enabled=not args.force)
+
+    # Streaming needs the preprocessor, so --skip-preprocess falls back to files mode
+    streaming = args.mode == "stream" and not args.skip_preprocess
+    print(f"Mode: {'stream' if streaming else 'files'} ({args.workers} workers)")
+
+    if streaming:
+        print_step(1, 1, "Streaming Scrape → Preprocess → Index")
+
+        if args.skip_scrape and not os.path.exists(raw_data_file):
+            print(f"Error: Raw data file not found: {raw_data_file}")
+            sys.exit(1)
+
+        if not run_streaming_pipeline(args.url, index_file, cache, scrape=not args.skip_scrape,
+                                      workers=args.workers):
+            print("\nPipeline failed at streaming step")
+            sys.exit(1)
+    else:
+        run_file_stages(args, cache, raw_data_file, processed_data_file, index_file)
+
+    cache.save()
+    
+    print_banner("VERIFICATION", char="-")
+    verify_index(index_file)
+    
+    elapsed_time = time.time() - start_time
+    minutes = int(elapsed_time // 60)
+    seconds = int(elapsed_time % 60)
     
+    print_banner("PIPELINE COMPLETED SUCCESSFULLY", char="=")
+    print(f"Total time: {minutes}m {seconds}s")
+    print(f"Output files:")
+    print(f"  - Raw data:       {raw_data_file}")
+    if not streaming:
+        print(f"  - Processed data: {processed_data_file}")
+    print(f"  - Index file:     {index_file}")
+    print(f"  - Run manifest:   {RUN_MANIFEST}")
+
+
+def run_file_stages(args, cache, raw_data_file, processed_data_file, index_file):
     total_steps = 3
     if args.skip_scrape:
         total_steps -= 1
@@ -205,9 +479,11 @@ def main():
         current_step += 1
         print_step(current_step, total_steps, "Web Scraping")
         
+        scrape_start = time.time()
         if not run_scraper(args.url, raw_data_file):
             print("\nPipeline failed at scraping step")
             sys.exit(1)
+        cache.record_run("scrape", time.time() - scrape_start)
     else:
         print("\nSkipping scraping step (using existing data)")
         if not os.path.exists(raw_data_file):
@@ -218,7 +494,8 @@ def main():
         current_step += 1
         print_step(current_step, total_steps, "Data Preprocessing")
         
-        if not run_preprocessor(raw_data_file, processed_data_file):
+        preprocess = functools.partial(run_preprocessor, workers=args.workers)
+        if not run_cached_stage(cache, "preprocess", raw_data_file, processed_data_file, preprocess):
             print("\nPipeline failed at preprocessing step")
             sys.exit(1)
     else:
@@ -230,23 +507,10 @@ def main():
     current_step += 1
     print_step(current_step, total_steps, "Index Building")
     
-    if not run_indexer(processed_data_file, index_file):
+    index = functools.partial(run_indexer, workers=args.workers)
+    if not run_cached_stage(cache, "index", processed_data_file, index_file, index):
         print("\nPipeline failed at indexing step")
         sys.exit(1)
-    
-    print_banner("VERIFICATION", char="-")
-    verify_index(index_file)
-    
-    elapsed_time = time.time() - start_time
-    minutes = int(elapsed_time // 60)
-    seconds = int(elapsed_time % 60)
-    
-    print_banner("PIPELINE COMPLETED SUCCESSFULLY", char="=")
-    print(f"Total time: {minutes}m {seconds}s")
-    print(f"Output files:")
-    print(f"  - Raw data:       {raw_data_file}")
-    print(f"  - Processed data: {processed_data_file}")
-    print(f"  - Index file:     {index_file}")
 
 
 if __name__ == "__main__":
@@ -1,29 +1,35 @@
-import asyncio
-import csv
 import json
+import time
+import asyncio
+import functools
 import random
 import logging
 import xml.etree.ElementTree as ET
-from pathlib import Path
-from typing import Set, List
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import List
 from datetime import datetime
 
 import httpx
-from bs4 import BeautifulSoup, NavigableString
 
 from src.core.config import (
-    BASE_URL,
     ROBOTS_URL,
     HEADERS,
     DEPARTMENT_KEYWORDS,
-    PERSONS_CSV,
-    PUBLICATIONS_CSV,
     DATA_JSON,
+    CRAWL_METRICS,
     PERSON_CONCURRENCY,
     PUB_CONCURRENCY,
     MIN_DELAY,
     MAX_DELAY,
+    FETCH_RETRIES,
+    RETRY_BACKOFF,
+    METRICS_INTERVAL,
 )
+from src.crawler.store import CrawlStore
+from src.crawler.journal import CrawlJournal
+from src.crawler.parsing import ParsePool, parse_person, parse_author_names, parse_publication
 
 logging.basicConfig(
     level=logging.INFO,
@@ -31,6 +37,183 @@ logging.basicConfig(
 )
 log = logging.getLogger("crawler")
 
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Upper bounds (ms) of the latency histogram buckets; the last one catches the rest
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, float("inf"))
+
+
+class PhaseMetrics:
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.monotonic()
+        self.finished = None
+        self.requests = 0
+        self.bytes = 0
+        self.status_codes = Counter()
+        self.latencies = array("d")
+        self.retries = 0
+        self.failures = 0
+        self.items_total = 0
+        self.items_done = 0
+        self.waiting = 0
+        self.in_flight = 0
+        self.parse_pending = 0
+        self.parse_pages = 0
+        self.parse_seconds = 0.0
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.started
+
+    def eta_seconds(self):
+        if self.items_done >= self.items_total:
+            return 0.0
+        if not self.items_done:
+            return None
+        rate = self.items_done / self.elapsed
+        return (self.items_total - self.items_done) / rate
+
+    def latency_percentiles(self):
+        if not self.latencies:
+            return {}
+        ordered = sorted(self.latencies)
+
+        def pct(p):
+            return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000, 1)
+
+        return {"p50": pct(50), "p90": pct(90), "p99": pct(99), "max": round(ordered[-1] * 1000, 1)}
+
+    def latency_histogram(self):
+        counts = [0] * len(LATENCY_BUCKETS_MS)
+        for seconds in self.latencies:
+            counts[bisect_left(LATENCY_BUCKETS_MS, seconds * 1000)] += 1
+        return {
+            ("inf" if bound == float("inf") else f"le_{bound}ms"): n
+            for bound, n in zip(LATENCY_BUCKETS_MS, counts)
+        }
+
+    def summary(self):
+        elapsed = self.elapsed
+        return {
+            "elapsed_seconds": round(elapsed, 3),
+            "requests": self.requests,
+            "bytes": self.bytes,
+            "requests_per_sec": round(self.requests / elapsed, 3) if elapsed else 0.0,
+            "bytes_per_sec": round(self.bytes / elapsed, 1) if elapsed else 0.0,
+            "status_codes": {str(k): v for k, v in sorted(self.status_codes.items())},
+            "latency_ms": {**self.latency_percentiles(), "histogram": self.latency_histogram()},
+            "retries": self.retries,
+            "failures": self.failures,
+            "items": {"total": self.items_total, "done": self.items_done},
+            "parse": {
+                "pages": self.parse_pages,
+                "seconds": round(self.parse_seconds, 3),
+                "avg_ms": round(self.parse_seconds / self.parse_pages * 1000, 2) if self.parse_pages else 0.0,
+            },
+        }
+
+
+class CrawlMetrics:
+    """Per-phase counters for a crawl run, reported periodically and dumped as JSON."""
+
+    def __init__(self):
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self.started = time.monotonic()
+        self.phases = {}
+        self.current = PhaseMetrics("setup")
+
+    def start_phase(self, name):
+        self.current = self.phases[name] = PhaseMetrics(name)
+
+    def end_phase(self):
+        self.current.finished = time.monotonic()
+
+    # Hooks called by the fetchers and the parse pool
+
+    def queued(self, n):
+        self.current.items_total += n
+        self.current.waiting += n
+
+    def fetch_started(self):
+        self.current.waiting -= 1
+        self.current.in_flight += 1
+
+    def fetch_finished(self):
+        self.current.in_flight -= 1
+
+    def item_done(self):
+        self.current.items_done += 1
+
+    def record_response(self, status_code, size, seconds):
+        self.current.requests += 1
+        self.current.bytes += size
+        self.current.status_codes[status_code] += 1
+        self.current.latencies.append(seconds)
+
+    def record_retry(self):
+        self.current.retries += 1
+
+    def record_failure(self):
+        self.current.failures += 1
+
+    def parse_submitted(self):
+        self.current.parse_pending += 1
+
+    def record_parse(self, seconds):
+        self.current.parse_pending -= 1
+        self.current.parse_pages += 1
+        self.current.parse_seconds += seconds
+
+    def progress_line(self):
+        p = self.current
+        elapsed = p.elapsed
+        pct = p.latency_percentiles()
+        eta = p.eta_seconds()
+        return (
+            f" [{p.name}] {p.items_done}/{p.items_total} done"
+            f" │ {p.requests / elapsed if elapsed else 0:.1f} req/s"
+            f" │ {p.bytes / elapsed / 1024 if elapsed else 0:.1f} KB/s"
+            f" │ p50 {pct.get('p50', 0):.0f}ms p99 {pct.get('p99', 0):.0f}ms"
+            f" │ queue {p.waiting} waiting, {p.in_flight} fetching, {p.parse_pending} parsing"
+            f" │ 429s {p.status_codes.get(429, 0)}, retries {p.retries}, failures {p.failures}"
+            f" │ parse {p.parse_seconds:.1f}s"
+            f" │ ETA {_format_seconds(eta)}"
+        )
+
+    def summary(self):
+        phases = {name: p.summary() for name, p in self.phases.items()}
+        return {
+            "started_at": self.started_at,
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "elapsed_seconds": round(time.monotonic() - self.started, 3),
+            "totals": {
+                key: sum(p[key] for p in phases.values())
+                for key in ("requests", "bytes", "retries", "failures")
+            },
+            "phases": phases,
+        }
+
+    def dump(self, path=CRAWL_METRICS):
+        summary = self.summary()
+        path.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+        return summary
+
+
+def _format_seconds(seconds):
+    if seconds is None:
+        return "?"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
+
+
+async def report_progress(metrics: CrawlMetrics, interval=METRICS_INTERVAL):
+    while True:
+        await asyncio.sleep(interval)
+        log.info(metrics.progress_line())
+
 
 def normalize_url(url: str) -> str:
     return url.rstrip("/").lower()
@@ -43,124 +226,99 @@ def parse_sitemap(xml: bytes) -> List[str]:
     ns = {"sm": "http://www.sitemaps.org/schemas/sitemap/0.9"}
     return [loc.text for loc in root.findall(".//sm:loc", ns)]
 
-def load_seen(csv_path: Path) -> Set[str]:
-    if not csv_path.exists():
-        return set()
-    with open(csv_path, newline="", encoding="utf-8") as f:
-        return {normalize_url(r["url"]) for r in csv.DictReader(f)}
-
-def append_csv(csv_path: Path, fieldnames: List[str], row: dict):
-    exists = csv_path.exists()
-    with open(csv_path, "a", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        if not exists:
-            writer.writeheader()
-        writer.writerow(row)
-
-async def safe_fetch(client: httpx.AsyncClient, url: str):
-    """Fetch URL safely, return None on any network/read error."""
-    try:
-        await asyncio.sleep(random.uniform(MIN_DELAY, MAX_DELAY))
-        r = await client.get(url, timeout=60)
-        if r.status_code != 200:
-            log.warning(f" Non-200 for {url}: {r.status_code}")
-            return None
-        return r
-    except httpx.HTTPError as e:
-        log.warning(f" HTTP error for {url}: {e}")
-    except Exception as e:
-        log.warning(f" Unexpected error for {url}: {e}")
+def _retry_delay(response, attempt):
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return RETRY_BACKOFF * 2 ** attempt
+
+async def safe_fetch(client: httpx.AsyncClient, url: str, metrics: CrawlMetrics):
+    """Fetch URL safely, retrying throttling/5xx responses; return None on failure."""
+    for attempt in range(FETCH_RETRIES + 1):
+        r = None
+        try:
+            await asyncio.sleep(random.uniform(MIN_DELAY, MAX_DELAY))
+            start = time.perf_counter()
+            r = await client.get(url, timeout=60)
+            metrics.record_response(r.status_code, len(r.content), time.perf_counter() - start)
+            if r.status_code == 200:
+                return r
+            if r.status_code not in RETRY_STATUSES:
+                log.warning(f" Non-200 for {url}: {r.status_code}")
+                break
+            log.warning(f" Retryable {r.status_code} for {url} (attempt {attempt + 1})")
+        except httpx.HTTPError as e:
+            log.warning(f" HTTP error for {url}: {e}")
+        except Exception as e:
+            log.warning(f" Unexpected error for {url}: {e}")
+            break
+
+        if attempt < FETCH_RETRIES:
+            metrics.record_retry()
+            await asyncio.sleep(_retry_delay(r, attempt))
+
+    metrics.record_failure()
     return None
 
 
-async def crawl_persons(client: httpx.AsyncClient):
-    seen = load_seen(PERSONS_CSV)
+async def crawl_persons(client: httpx.AsyncClient, store: CrawlStore, parser: ParsePool, metrics: CrawlMetrics):
     new_count = 0
 
-    robots = (await safe_fetch(client, ROBOTS_URL)).text
+    robots = (await safe_fetch(client, ROBOTS_URL, metrics)).text
     sitemap_index = next(
         l.split(":", 1)[1].strip()
         for l in robots.splitlines()
         if l.lower().startswith("sitemap:")
     )
 
-    xml = (await safe_fetch(client, sitemap_index)).content
+    xml = (await safe_fetch(client, sitemap_index, metrics)).content
     sitemaps = parse_sitemap(xml)
     persons_sitemap = next(s for s in sitemaps if "persons.xml" in s)
 
-    xml = (await safe_fetch(client, persons_sitemap)).content
-    person_urls = parse_sitemap(xml)
+    xml = (await safe_fetch(client, persons_sitemap, metrics)).content
+    person_urls = store.filter_unseen("persons", (normalize_url(u) for u in parse_sitemap(xml)))
 
     sem = asyncio.Semaphore(PERSON_CONCURRENCY)
+    metrics.queued(len(person_urls))
 
     async def handle(url):
         nonlocal new_count
-        url = normalize_url(url)
-        if url in seen:
-            return
-
         async with sem:
-            r = await safe_fetch(client, url)
-            if r is None:
-                append_csv(
-                    PERSONS_CSV,
-                    ["url", "name", "department", "interested"],
-                    {"url": url, "name": "", "department": "", "interested": False},
-                )
-                seen.add(url)
-                new_count += 1
-                return
-
-            soup = BeautifulSoup(r.text, "lxml")
-            name_tag = soup.select_one("h1")
-            name = name_tag.get_text(strip=True) if name_tag else ""
-
-            org = soup.find("a", {"rel": "Organisation"})
-            department = org.get_text(strip=True) if org else ""
-
-            interested = any(k in department.lower() for k in DEPARTMENT_KEYWORDS)
-
-            append_csv(
-                PERSONS_CSV,
-                ["url", "name", "department", "interested"],
-                {
-                    "url": url,
-                    "name": name,
-                    "department": department,
-                    "interested": interested,
-                },
-            )
-
-            seen.add(url)
+            metrics.fetch_started()
+            r = await safe_fetch(client, url, metrics)
+            metrics.fetch_finished()
+
+        if r is None:
+            store.record_person(url, ok=False)
             new_count += 1
+            metrics.item_done()
+            return
 
-    await asyncio.gather(*(handle(u) for u in person_urls))
-    log.info(f" New persons appended: {new_count}")
+        # Parsing happens off-loop and outside the semaphore, so the slot goes to the next fetch
+        name, department = await parser.run(parse_person, r.text)
+        interested = any(k in department.lower() for k in DEPARTMENT_KEYWORDS)
 
+        store.record_person(url, name, normalize_name(name), department, interested)
+        new_count += 1
+        metrics.item_done()
 
-def load_interested_persons() -> Set[str]:
-    if not PERSONS_CSV.exists():
-        return set()
-    with open(PERSONS_CSV, newline="", encoding="utf-8") as f:
-        return {
-            normalize_name(r["name"])
-            for r in csv.DictReader(f)
-            if r["interested"] == "True"
-        }
+    await asyncio.gather(*(handle(u) for u in person_urls))
+    store.flush()
+    log.info(f" New persons recorded: {new_count}")
 
-async def crawl_publications(client: httpx.AsyncClient):
-    seen = load_seen(PUBLICATIONS_CSV)
-    interested_persons = load_interested_persons()
+
+async def crawl_publications(client: httpx.AsyncClient, store: CrawlStore, parser: ParsePool, metrics: CrawlMetrics):
+    interested_persons = store.interested_person_names()
     new_count = 0
 
-    robots = (await safe_fetch(client, ROBOTS_URL)).text
+    robots = (await safe_fetch(client, ROBOTS_URL, metrics)).text
     sitemap_index = next(
         l.split(":", 1)[1].strip()
         for l in robots.splitlines()
         if l.lower().startswith("sitemap:")
     )
 
-    xml = (await safe_fetch(client, sitemap_index)).content
+    xml = (await safe_fetch(client, sitemap_index, metrics)).content
     sitemaps = parse_sitemap(xml)
     pubs_base = next(s for s in sitemaps if "publications.xml" in s)
 
@@ -168,143 +326,112 @@ async def crawl_publications(client: httpx.AsyncClient):
     pub_urls = []
 
     for s in pub_sitemaps:
-        xml = (await safe_fetch(client, s))
+        xml = (await safe_fetch(client, s, metrics))
         if xml:
             pub_urls.extend(parse_sitemap(xml.content))
 
+    pub_urls = store.filter_unseen("publications", (normalize_url(u) for u in pub_urls))
     sem = asyncio.Semaphore(PUB_CONCURRENCY)
+    metrics.queued(len(pub_urls))
 
     async def handle(url):
         nonlocal new_count
-        url = normalize_url(url)
-        if url in seen:
-            return
-
         async with sem:
-            r = await safe_fetch(client, url)
-            if r is None:
-                append_csv(PUBLICATIONS_CSV, ["url", "interested"], {"url": url, "interested": False})
-                seen.add(url)
-                new_count += 1
-                return
-
-            soup = BeautifulSoup(r.text, "lxml")
-            block = soup.select_one("p.relations.persons")
-            names = []
-
-            if block:
-                for node in block.children:
-                    if isinstance(node, NavigableString):
-                        names.extend([normalize_name(p) for p in node.split(",") if p.strip()])
-                    elif node.name == "a":
-                        names.append(normalize_name(node.get_text(strip=True)))
-
-            interested = any(n in interested_persons for n in names)
-
-            append_csv(PUBLICATIONS_CSV, ["url", "interested"], {"url": url, "interested": interested})
-            seen.add(url)
+            metrics.fetch_started()
+            r = await safe_fetch(client, url, metrics)
+            metrics.fetch_finished()
+
+        if r is None:
+            store.record_publication(url, ok=False)
             new_count += 1
+            metrics.item_done()
+            return
+
+        names = await parser.run(parse_author_names, r.text)
+        interested = any(normalize_name(n) in interested_persons for n in names)
+
+        store.record_publication(url, interested)
+        new_count += 1
+        metrics.item_done()
 
     await asyncio.gather(*(handle(u) for u in pub_urls))
-    log.info(f" New publications appended: {new_count}")
-
-def extract_authors(soup):
-    authors = []
-    block = soup.select_one("p.relations.persons")
-    if not block:
-        return authors
-
-    for node in block.children:
-        if isinstance(node, NavigableString):
-            for name in [p.strip() for p in node.split(",") if p.strip()]:
-                authors.append({"name": name, "url": None})
-        elif node.name == "a":
-            href = node.get("href")
-            authors.append({
-                "name": node.get_text(strip=True),
-                "url": href if href.startswith("http") else f"{BASE_URL}{href}",
-            })
-    return authors
-
-def extract_citations(soup):
-    tag = soup.select_one("div.metric.scopus-citations span.count")
-    try:
-        return int(tag.get_text(strip=True)) if tag else None
-    except ValueError:
-        return None
-
-def extract_publication_details(soup):
-    details = {}
-    rows = soup.select("table.properties tr")
-    for row in rows:
-        k = row.select_one("th")
-        v = row.select_one("td")
-        if not k or not v:
-            continue
-        label = k.get_text(strip=True).lower()
-        value = v.get_text(" ", strip=True)
-
-        if label == "journal":
-            details["journal"] = value
-        elif label == "volume":
-            details["volume"] = value
-        elif label == "number of pages":
-            details["pages"] = value
-        elif label == "article number":
-            details["article_number"] = value
-        elif label == "dois":
-            link = v.select_one("a[href*='doi.org']")
-            details["doi"] = link.get_text(strip=True) if link else value
-        elif label == "publication status":
-            details["publication_date"] = value
-        elif label == "early online date":
-            details["early_online_date"] = value
-
-    return details
-
-async def populate_data_json(client: httpx.AsyncClient):
-    data = {"publications": {}}
-    if DATA_JSON.exists():
-        data = json.loads(DATA_JSON.read_text(encoding="utf-8"))
-
-    with open(PUBLICATIONS_CSV, newline="", encoding="utf-8") as f:
-        interested_urls = [r["url"] for r in csv.DictReader(f) if r["interested"] == "True"]
-
-    missing = [u for u in interested_urls if u not in data["publications"]]
-    log.info(f" Publications to populate in JSON: {len(missing)}")
-
-    for url in missing:
-        r = await safe_fetch(client, url)
+    store.flush()
+    log.info(f" New publications recorded: {new_count}")
+
+async def populate_data_json(client: httpx.AsyncClient, store: CrawlStore, parser: ParsePool, metrics: CrawlMetrics,
+                             export=True):
+    # Documents fetched before a crash are already in the store but not exported
+    resumed = bool(store.resume_point()[1])
+    missing = store.missing_documents()
+    log.info(f" Publications to populate in store: {len(missing)}")
+
+    sem = asyncio.Semaphore(PUB_CONCURRENCY)
+    metrics.queued(len(missing))
+
+    async def handle(url):
+        async with sem:
+            metrics.fetch_started()
+            r = await safe_fetch(client, url, metrics)
+            metrics.fetch_finished()
+
         if r is None:
-            continue
-
-        soup = BeautifulSoup(r.text, "lxml")
-        title_tag = soup.select_one("h1")
-        title = title_tag.get_text(strip=True) if title_tag else "[no title]"
-
-        abstract_tag = soup.select_one("div[class*='rendering_abstractportal'] .textblock")
-        abstract = abstract_tag.get_text(strip=True) if abstract_tag else "[no abstract]"
-
-        data["publications"][url] = {
-            "url": url,
-            "title": title,
-            "abstract": abstract,
-            "authors": extract_authors(soup),
-            "citations_scopus": extract_citations(soup),
-            **extract_publication_details(soup),
-        }
+            metrics.item_done()
+            return
+
+        record = await parser.run(parse_publication, r.text, url)
+        store.put_document(url, record)
+        metrics.item_done()
 
-        log.info(f" JSON populated: {title}")
+        log.info(f" Document stored: {record['title']}")
 
-    DATA_JSON.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+    await asyncio.gather(*(handle(u) for u in missing))
+    store.flush()
+    if export and (missing or resumed or not DATA_JSON.exists()):
+        store.export_jsonl(DATA_JSON)
 
-async def main():
-    async with httpx.AsyncClient(headers=HEADERS, follow_redirects=True, http2=True, timeout=60) as client:
-        await crawl_persons(client)
-        await crawl_publications(client)
-        await populate_data_json(client)
+PHASES = (
+    ("persons", crawl_persons),
+    ("publications", crawl_publications),
+    ("documents", populate_data_json),
+)
+
+async def main(export_json=True):
+    """Run an incremental crawl; ``export_json=False`` skips the DATA_JSON export."""
+    metrics = CrawlMetrics()
+    phases = list(PHASES)
+    if not export_json:
+        phases[-1] = ("documents", functools.partial(populate_data_json, export=False))
 
-    log.info(" Incremental crawl finished")
+    reporter = asyncio.create_task(report_progress(metrics))
+
+    try:
+        with CrawlStore(journal=CrawlJournal()) as store:
+            store.migrate_legacy_files()
+
+            run_started, completed = store.resume_point()
+            if completed:
+                log.info(f" Resuming run from {run_started}, completed phases: {', '.join(sorted(completed))}")
+            run_started = run_started or datetime.now().isoformat(timespec="seconds")
+
+            async with httpx.AsyncClient(headers=HEADERS, follow_redirects=True, http2=True, timeout=60) as client:
+                with ParsePool(metrics=metrics) as parser:
+                    for phase, run_phase in phases:
+                        if phase in completed:
+                            log.info(f" Skipping checkpointed phase: {phase}")
+                            continue
+                        metrics.start_phase(phase)
+                        await run_phase(client, store, parser, metrics)
+                        metrics.end_phase()
+                        store.checkpoint(phase, run_started)
+                        log.info(metrics.progress_line())
+
+            store.clear_checkpoints()
+    finally:
+        reporter.cancel()
+        summary = metrics.dump()
+
+    log.info(f" Incremental crawl finished, metrics written to {CRAWL_METRICS}")
+    return summary
 
 if __name__ == "__main__":
     asyncio.run(main())
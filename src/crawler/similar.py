@@ -0,0 +1,186 @@
+import functools
+
+import numpy as np
+
+from src.core.config import SIMILAR_TOP_N
+from src.utils.parallel import imap_chunks
+
+# Dense score cells (block rows x documents) accumulated per block, bounding its memory to ~32 MB
+_BLOCK_CELLS = 4_000_000
+# Row-nonzero x column-entry products expanded per step of a block's sparse product
+_PRODUCT_STEP = 2_000_000
+# Above this share of added, changed or removed documents IDF has drifted enough that every list is recomputed
+REUSE_MAX_CHANGED = 0.1
+
+# The normalized document-term matrix (see ``normalized_matrix``), set once per worker process by ``_init_worker``
+_matrix = None
+
+
+def _init_worker(matrix):
+    global _matrix
+    _matrix = matrix
+
+
+def normalized_matrix(doc_ids, doc_vectors, doc_norms):
+    """Row-normalized TF-IDF matrix over document ordinals, stored both by row and by column."""
+    term_ids = {}
+    rows, cols, data = [], [], []
+    for ordinal, doc_id in enumerate(doc_ids):
+        norm = doc_norms.get(doc_id, 0)
+        if not norm:
+            continue
+        for term, weight in doc_vectors[doc_id].items():
+            rows.append(ordinal)
+            cols.append(term_ids.setdefault(term, len(term_ids)))
+            data.append(weight / norm)
+
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    data = np.asarray(data, dtype=np.float64)
+    by_column = np.argsort(cols, kind="stable")
+    return {
+        "size": len(doc_ids),
+        "row_offsets": np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=len(doc_ids))))),
+        "row_terms": cols,
+        "row_weights": data,
+        "column_offsets": np.concatenate(([0], np.cumsum(np.bincount(cols, minlength=len(term_ids))))),
+        "column_rows": rows[by_column],
+        "column_weights": data[by_column],
+    }
+
+
+def _ranges(starts, lengths):
+    """Concatenation of ``range(start, start + length)`` for each pair, vectorized."""
+    ends = np.cumsum(lengths)
+    return np.repeat(starts - (ends - lengths), lengths) + np.arange(ends[-1] if len(ends) else 0)
+
+
+def _neighbour_block(ordinals, top_n, keep=frozenset()):
+    """Top-``top_n`` cosine neighbours of a block of rows of the normalized TF-IDF matrix.
+
+    The block's similarities are its sparse product with the matrix
+    transpose: every nonzero of the block is multiplied by the column of its
+    term, and the products are summed into a dense block x documents array.
+    Rows whose ordinal is in ``keep`` also return every positive score, as
+    ``(ordinals, scores)`` arrays.
+    """
+    m = _matrix
+    size = m["size"]
+    ordinals = np.asarray(ordinals, dtype=np.int64)
+    row_lengths = m["row_offsets"][ordinals + 1] - m["row_offsets"][ordinals]
+    entries = _ranges(m["row_offsets"][ordinals], row_lengths)
+    local = np.repeat(np.arange(len(ordinals)), row_lengths)
+    terms, weights = m["row_terms"][entries], m["row_weights"][entries]
+
+    scores = np.zeros(len(ordinals) * size)
+    column_lengths = m["column_offsets"][terms + 1] - m["column_offsets"][terms]
+    expanded = np.cumsum(column_lengths)
+    bounds = np.searchsorted(expanded, np.arange(_PRODUCT_STEP, expanded[-1] if len(expanded) else 0, _PRODUCT_STEP))
+    for part in np.split(np.arange(len(terms)), bounds):
+        if not len(part):
+            continue
+        lengths = column_lengths[part]
+        products = _ranges(m["column_offsets"][terms[part]], lengths)
+        cells = np.repeat(local[part] * size, lengths) + m["column_rows"][products]
+        values = np.repeat(weights[part], lengths) * m["column_weights"][products]
+        scores += np.bincount(cells, weights=values, minlength=len(scores))
+
+    scores = scores.reshape(len(ordinals), size)
+    scores[np.arange(len(ordinals)), ordinals] = 0
+    neighbours = []
+    for i, ordinal in enumerate(ordinals):
+        row = scores[i]
+        best = np.flatnonzero(row > 0)
+        if len(best) > top_n:
+            best = best[np.argpartition(-row[best], top_n - 1)[:top_n]]
+        # Best first, ties towards the higher ordinal
+        best = best[np.lexsort((-best, -row[best]))]
+        found = [(int(other), float(row[other])) for other in best]
+        if ordinal in keep:
+            positive = np.flatnonzero(row > 0)
+            neighbours.append((found, (positive, row[positive])))
+        else:
+            neighbours.append((found, None))
+    return neighbours
+
+
+def _stale_documents(doc_ids, previous, changed):
+    """Documents whose lists must be recomputed, and the new or changed ones among them.
+
+    None when too much changed for previous lists to be reused.
+    """
+    present = set(doc_ids)
+    fresh = {doc_id for doc_id in doc_ids if doc_id in changed or doc_id not in previous}
+    touched = fresh | (set(previous) - present)
+    if len(touched) > REUSE_MAX_CHANGED * len(doc_ids):
+        return None
+    # A list that held a changed or removed document may have lost members it cannot refill
+    stale = fresh | {
+        doc_id for doc_id in doc_ids
+        if doc_id in previous and any(other in touched for other, _ in previous[doc_id])
+    }
+    return stale, fresh
+
+
+def build_neighbours(doc_ids, doc_vectors, doc_norms, top_n=SIMILAR_TOP_N, workers=1, block_size=200,
+                     previous=None, changed=()):
+    """``{doc_id: [(neighbour_id, cosine), ...]}`` best first, for every document.
+
+    The normalized document-term matrix is multiplied by its transpose one
+    block of rows at a time with numpy, blocks spread across ``workers``
+    processes. Each worker receives the matrix once, and only the ``top_n``
+    best of each row come back.
+
+    With ``previous`` lists from the last build and the IDs of documents
+    whose content ``changed`` since, only new or changed documents and those
+    whose lists held a changed or removed one are recomputed. Every other
+    list keeps its previous members, merged with its scores against the new
+    and changed documents (read off their rows, as the product is
+    symmetric). Scores of unchanged pairs are not refreshed for the small
+    IDF drift; beyond ``REUSE_MAX_CHANGED`` of the corpus every list is
+    recomputed.
+    """
+    ordinal_of = {doc_id: ordinal for ordinal, doc_id in enumerate(doc_ids)}
+    stale, fresh = None, set()
+    if previous:
+        reuse = _stale_documents(doc_ids, previous, set(changed))
+        if reuse is not None:
+            stale, fresh = reuse
+            print(f"  Reusing {len(doc_ids) - len(stale)} neighbour lists, recomputing {len(stale)}")
+    targets = range(len(doc_ids)) if stale is None else sorted(ordinal_of[doc_id] for doc_id in stale)
+    keep = frozenset(ordinal_of[doc_id] for doc_id in fresh)
+
+    matrix = normalized_matrix(doc_ids, doc_vectors, doc_norms)
+    block_size = max(1, min(block_size, _BLOCK_CELLS // max(len(doc_ids), 1)))
+
+    multiply = functools.partial(_neighbour_block, top_n=top_n, keep=keep)
+    if workers <= 1:
+        _init_worker(matrix)
+
+    computed = {}
+    additions = {}
+    blocks = imap_chunks(multiply, targets, workers, block_size, initializer=_init_worker, initargs=(matrix,))
+    try:
+        for block, results in blocks:
+            for ordinal, (best, scored) in zip(block, results):
+                computed[doc_ids[ordinal]] = [(doc_ids[other], round(score, 6)) for other, score in best]
+                if scored is None:
+                    continue
+                for other, score in zip(*scored):
+                    other = doc_ids[other]
+                    if other not in stale:
+                        additions.setdefault(other, []).append((doc_ids[ordinal], round(float(score), 6)))
+    finally:
+        _init_worker(None)
+
+    neighbours = {}
+    for doc_id in doc_ids:
+        if doc_id in computed:
+            neighbours[doc_id] = computed[doc_id]
+        else:
+            # A stable sort keeps the previous order among equal (rounded) scores
+            merged = previous[doc_id] + additions.get(doc_id, [])
+            merged.sort(key=lambda pair: -pair[1])
+            neighbours[doc_id] = merged[:top_n]
+    return neighbours
+
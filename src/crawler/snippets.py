@@ -0,0 +1,149 @@
+import re
+from collections import Counter
+
+from src.core.config import SNIPPET_LENGTH
+
+_WORD = re.compile(r"\S+")
+# The alphanumeric core of a whitespace-separated word, without surrounding punctuation
+_CORE = re.compile(r"[^\W_](?:.*[^\W_])?")
+
+
+def snippet_source(doc):
+    """The text token offsets refer to: title, a space, then abstract (as in ``content``)."""
+    return f"{doc.get('title', '')} {doc.get('abstract', '')}"
+
+
+def token_offsets(text, analyze_word):
+    """``(start, end)`` character span of every analyzed token of ``text``, in token order.
+
+    Words are normalised the way the preprocessor builds ``content`` and then
+    analyzed one at a time by ``analyze_word``, so the i-th span belongs to the
+    token at position i of the document's postings. A word analyzed to several
+    tokens gives each of them the word's span; stopwords give none.
+    """
+    offsets = []
+    for match in _WORD.finditer(text):
+        word = re.sub(r"[^a-z0-9]", "", match.group().lower())
+        if not word:
+            continue
+        terms = analyze_word(word)
+        if terms:
+            core = _CORE.search(match.group())
+            start = match.start() + (core.start() if core else 0)
+            end = match.start() + (core.end() if core else len(match.group()))
+            offsets.extend([(start, end)] * len(terms))
+    return offsets
+
+
+def _snap(text, start, end, keep_start, keep_end):
+    """Move a window's edges in to word boundaries, never past ``keep_start``/``keep_end``."""
+    if start > 0 and not text[start - 1].isspace():
+        space = text.find(" ", start, keep_start)
+        if space != -1:
+            start = space + 1
+    if end < len(text) and not text[end].isspace():
+        space = text.rfind(" ", keep_end, end)
+        if space != -1:
+            end = space
+    return start, end
+
+
+def best_window(hits, length):
+    """Indices ``[i, j)`` of the hits forming the best passage of at most ``length`` characters.
+
+    ``hits`` are ``(start, end, term, weight)`` sorted by start. Windows are
+    compared by the summed weight of the distinct terms they contain, then by
+    the number of hits, using one sliding pass.
+    """
+    counts = Counter()
+    score = 0.0
+    best_score, best = (-1.0, 0), (0, min(len(hits), 1))
+    j = 0
+    for i, (start, _, term, weight) in enumerate(hits):
+        j = max(j, i)
+        while j < len(hits) and hits[j][1] - start <= length:
+            if not counts[hits[j][2]]:
+                score += hits[j][3]
+            counts[hits[j][2]] += 1
+            j += 1
+        if j == i:
+            continue  # a single hit longer than the window
+        if (score, j - i) > best_score:
+            best_score, best = (score, j - i), (i, j)
+        # Slide past hit i
+        counts[term] -= 1
+        if not counts[term]:
+            score -= weight
+    return best
+
+
+def build_snippet(text, hits, length=SNIPPET_LENGTH):
+    """Passage of ``text`` around its best window of hits, with highlight offsets into the passage.
+
+    Without hits the passage is the start of ``text``. Hits are absolute
+    offsets into ``text``; the returned highlights are relative to the
+    returned passage, ellipses included.
+    """
+    if not text:
+        return {"text": "", "highlights": []}
+
+    hits = sorted(hits)
+    if hits:
+        i, j = best_window(hits, length)
+        span_start, span_end = hits[i][0], max(end for _, end, _, _ in hits[i:j])
+    else:
+        span_start = span_end = 0
+
+    slack = max(length - (span_end - span_start), 0)
+    start = max(span_start - slack // 2, 0)
+    end = min(start + length, len(text))
+    start = max(min(start, end - length), 0)
+    start, end = _snap(text, start, end, span_start, span_end)
+
+    prefix = "… " if start > 0 else ""
+    suffix = " …" if end < len(text) else ""
+    shift = len(prefix) - start
+    passage = text[start:end].strip()
+    # strip() only trims whitespace the snapping left at the edges
+    shift -= len(text[start:end]) - len(text[start:end].lstrip())
+    highlights = [
+        [hit_start + shift, hit_end + shift]
+        for hit_start, hit_end, _, _ in hits
+        if hit_start >= start and hit_end <= end
+    ]
+    return {"text": f"{prefix}{passage}{suffix}", "highlights": _merge(highlights)}
+
+
+def _merge(spans):
+    """Sorted, non-overlapping spans (a word analyzed to several tokens repeats its span)."""
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def document_snippet(doc, offsets, term_hits, length=SNIPPET_LENGTH):
+    """Title highlights and the abstract snippet of one result.
+
+    ``term_hits`` is ``(term, weight, positions)`` for each query term found in
+    the document; ``offsets`` maps those token positions to character spans of
+    ``snippet_source(doc)``, as recorded at index time.
+    """
+    title = doc.get("title", "")
+    abstract_start = len(title) + 1
+    title_hits, abstract_hits = [], []
+    for term, weight, positions in term_hits:
+        for position in positions:
+            start, end = offsets[position]
+            if end <= len(title):
+                title_hits.append([start, end])
+            elif start >= abstract_start:
+                abstract_hits.append((start - abstract_start, end - abstract_start, term, weight))
+
+    return {
+        "title_highlights": _merge(title_hits),
+        "snippet": build_snippet(doc.get("abstract", ""), abstract_hits, length),
+    }
@@ -0,0 +1,95 @@
+from collections import Counter, defaultdict
+
+from src.core.config import FUZZY_MAX_EDITS
+
+
+def trigrams(word):
+    """Character trigrams of ``word`` padded with ``$`` so short words still have some."""
+    padded = f"${word}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def max_edits(word, cap=FUZZY_MAX_EDITS):
+    """Edits allowed for a word of this length: none for very short words."""
+    if len(word) <= 3:
+        return 0
+    if len(word) <= 6:
+        return min(1, cap)
+    return cap
+
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment (Damerau-Levenshtein with adjacent transpositions).
+
+    Gives up early and returns ``limit + 1`` once the distance must exceed ``limit``.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    before = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+def build_spelling_index(words, weights):
+    """Trigram postings over the surface vocabulary, stored in the index."""
+    grams = defaultdict(list)
+    for word_id, word in enumerate(words):
+        for gram in trigrams(word):
+            grams[gram].append(word_id)
+    return {"words": list(words), "weights": list(weights), "grams": dict(grams)}
+
+
+class SpellingIndex:
+    """Bounded edit-distance candidates for a word, pruned by trigram overlap.
+
+    Each edit changes at most three trigrams, so a word within ``d`` edits of
+    the query shares at least ``len(trigrams(query)) - 3 * d`` of them. Only
+    words passing that count (and the length difference bound) are compared
+    with the full edit distance, which keeps lookups far from a vocabulary
+    scan.
+    """
+
+    def __init__(self, data):
+        self.words = data["words"]
+        self.weights = data["weights"]
+        self.grams = data["grams"]
+        self.known = set(self.words)
+
+    def __len__(self):
+        return len(self.words)
+
+    def candidates(self, word, max_distance=None, limit=5):
+        """``(word, distance, weight)`` for the closest vocabulary words, best first."""
+        if max_distance is None:
+            max_distance = max_edits(word)
+        if max_distance <= 0:
+            return []
+
+        query_grams = trigrams(word)
+        min_overlap = max(1, len(query_grams) - 3 * max_distance)
+        overlap = Counter()
+        for gram in query_grams:
+            overlap.update(self.grams.get(gram, ()))
+
+        found = []
+        for word_id, shared in overlap.items():
+            candidate = self.words[word_id]
+            if shared < min_overlap or candidate == word or abs(len(candidate) - len(word)) > max_distance:
+                continue
+            distance = edit_distance(word, candidate, max_distance)
+            if distance <= max_distance:
+                found.append((candidate, distance, self.weights[word_id]))
+
+        found.sort(key=lambda c: (c[1], -c[2], c[0]))
+        return found[:limit]
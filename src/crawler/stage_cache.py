@@ -0,0 +1,109 @@
+import json
+import hashlib
+import inspect
+from pathlib import Path
+from datetime import datetime
+
+from src.core.config import RUN_MANIFEST
+
+# Number of past runs kept in the manifest
+MAX_RUNS = 50
+
+
+def file_digest(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def code_digest(*modules):
+    """Fingerprint the source of the modules a stage runs."""
+    h = hashlib.sha256()
+    for module in modules:
+        h.update(Path(inspect.getsourcefile(module)).read_bytes())
+    return h.hexdigest()
+
+
+def config_digest(**settings):
+    return hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def input_digest(path):
+    """Digest of a stage input; the crawl store is fingerprinted by its contents, not its bytes."""
+    path = Path(path)
+    if path.suffix == ".db":
+        from src.crawler.store import CrawlStore
+
+        with CrawlStore(path) as store:
+            return store.digest()
+    return file_digest(path)
+
+
+class StageCache:
+    """Build-system style stage cache backed by the run manifest.
+
+    A stage is fresh when its fingerprint (input digests plus code and config
+    digests) matches the last successful run and its outputs are unchanged.
+    Each run's stage timings are appended to the manifest as well.
+    """
+
+    def __init__(self, manifest_path=RUN_MANIFEST, enabled=True):
+        self.path = Path(manifest_path)
+        self.enabled = enabled
+        data = json.loads(self.path.read_text(encoding="utf-8")) if self.path.exists() else {}
+        self.stages = data.get("stages", {})
+        self.runs = data.get("runs", [])
+        self.current_run = {"started_at": _now(), "stages": {}}
+
+    @staticmethod
+    def fingerprint(inputs, code, config):
+        return {"inputs": inputs, "code": code, "config": config}
+
+    def is_fresh(self, stage, fingerprint, outputs):
+        if not self.enabled:
+            return False
+        record = self.stages.get(stage)
+        if not record or record["fingerprint"] != fingerprint:
+            return False
+        if set(record["outputs"]) != {str(p) for p in outputs}:
+            return False
+        return all(
+            Path(path).exists() and file_digest(path) == digest
+            for path, digest in record["outputs"].items()
+        )
+
+    def last_fingerprint(self, stage):
+        record = self.stages.get(stage)
+        return record["fingerprint"] if record else None
+
+    def record(self, stage, fingerprint, outputs, seconds):
+        self.stages[stage] = {
+            "fingerprint": fingerprint,
+            "outputs": {str(p): file_digest(p) for p in outputs},
+            "finished_at": _now(),
+        }
+        self.current_run["stages"][stage] = {"status": "ran", "seconds": round(seconds, 3)}
+
+    def record_run(self, stage, seconds):
+        """Time a stage that is never cached (e.g. the crawl itself)."""
+        self.current_run["stages"][stage] = {"status": "ran", "seconds": round(seconds, 3)}
+
+    def record_skip(self, stage, seconds):
+        self.current_run["stages"][stage] = {"status": "skipped", "seconds": round(seconds, 3)}
+
+    def save(self):
+        self.current_run["finished_at"] = _now()
+        self.current_run["total_seconds"] = round(
+            sum(s["seconds"] for s in self.current_run["stages"].values()), 3
+        )
+        self.runs = (self.runs + [self.current_run])[-MAX_RUNS:]
+
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps({"stages": self.stages, "runs": self.runs}, indent=2), encoding="utf-8")
+        tmp.replace(self.path)
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
@@ -0,0 +1,341 @@
+import csv
+import json
+import time
+import sqlite3
+import logging
+from pathlib import Path
+from datetime import datetime
+from typing import Iterable, Iterator, List, Set, Tuple
+
+from src.utils.jsonl import legacy_json_path, write_jsonl
+
+from src.core.config import (
+    CRAWL_DB,
+    PERSONS_CSV,
+    PUBLICATIONS_CSV,
+    DATA_JSON,
+    STORE_BATCH_SIZE,
+    STORE_COMPACT_SECONDS,
+    MAX_FETCH_ATTEMPTS,
+    RESUME_WINDOW_HOURS,
+    STREAM_POLL_SECONDS,
+)
+
+log = logging.getLogger("crawler")
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS persons (
+    url         TEXT PRIMARY KEY,
+    name        TEXT NOT NULL DEFAULT '',
+    norm_name   TEXT NOT NULL DEFAULT '',
+    department  TEXT NOT NULL DEFAULT '',
+    interested  INTEGER NOT NULL DEFAULT 0,
+    status      TEXT NOT NULL DEFAULT 'pending',
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    updated_at  TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_persons_interested ON persons(interested, norm_name);
+
+CREATE TABLE IF NOT EXISTS publications (
+    url         TEXT PRIMARY KEY,
+    interested  INTEGER NOT NULL DEFAULT 0,
+    status      TEXT NOT NULL DEFAULT 'pending',
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    updated_at  TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_publications_interested ON publications(interested, status);
+
+CREATE TABLE IF NOT EXISTS documents (
+    seq         INTEGER PRIMARY KEY AUTOINCREMENT,
+    url         TEXT NOT NULL UNIQUE,
+    data        TEXT NOT NULL,
+    fetched_at  TEXT
+);
+
+CREATE TABLE IF NOT EXISTS checkpoints (
+    phase       TEXT PRIMARY KEY,
+    run_started TEXT NOT NULL,
+    finished_at TEXT NOT NULL
+);
+"""
+
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+PERSON_COLUMNS = ("url", "name", "norm_name", "department", "interested", "status", "attempts", "updated_at")
+PUBLICATION_COLUMNS = ("url", "interested", "status", "attempts", "updated_at")
+
+# Re-fetch failures on later runs until they have failed this many times.
+_SEEN_CLAUSE = f"(status = '{STATUS_DONE}' OR attempts >= ?)"
+
+
+class CrawlStore:
+    """SQLite (WAL) store for the crawl frontier and fetched publications.
+
+    Writes are buffered in memory and committed in batches of
+    ``batch_size`` rows (or every ``compact_seconds``), so concurrent fetchers
+    never touch the disk per URL. With a ``journal`` every row is also appended
+    to it first and replayed on the next open if the process died before the
+    batch was committed.
+    """
+
+    def __init__(self, db_path=CRAWL_DB, batch_size=STORE_BATCH_SIZE, max_attempts=MAX_FETCH_ATTEMPTS,
+                 journal=None, compact_seconds=STORE_COMPACT_SECONDS):
+        self.db_path = Path(db_path)
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.compact_seconds = compact_seconds
+        self.journal = journal
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._pending = {"persons": [], "publications": [], "documents": []}
+        self._last_flush = time.monotonic()
+
+        if self.journal is not None:
+            self._recover()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+        if self.journal is not None:
+            self.journal.close()
+
+    # ------------------------------------------------------------------ writes
+
+    def _recover(self):
+        replayed = 0
+        for table, row in self.journal.replay():
+            self._pending[table].append(row)
+            replayed += 1
+        if replayed:
+            log.info(f" Replaying {replayed} journaled rows into {self.db_path}")
+        self.flush(force=True)
+
+    def _queue(self, table, row):
+        if self.journal is not None:
+            self.journal.append(table, row)
+        self._pending[table].append(row)
+        if (len(self._pending[table]) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.compact_seconds):
+            self.flush()
+
+    def flush(self, force=False):
+        """Commit buffered rows in one transaction and compact the journal."""
+        persons = self._pending["persons"]
+        publications = self._pending["publications"]
+        documents = self._pending["documents"]
+        self._last_flush = time.monotonic()
+        if not (persons or publications or documents or force):
+            return
+
+        with self.conn:
+            if persons:
+                self.conn.executemany(
+                    """
+                    INSERT INTO persons (url, name, norm_name, department, interested, status, attempts, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(url) DO UPDATE SET
+                        name = excluded.name,
+                        norm_name = excluded.norm_name,
+                        department = excluded.department,
+                        interested = excluded.interested,
+                        status = excluded.status,
+                        attempts = persons.attempts + excluded.attempts,
+                        updated_at = excluded.updated_at
+                    """,
+                    persons,
+                )
+            if publications:
+                self.conn.executemany(
+                    """
+                    INSERT INTO publications (url, interested, status, attempts, updated_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(url) DO UPDATE SET
+                        interested = excluded.interested,
+                        status = excluded.status,
+                        attempts = publications.attempts + excluded.attempts,
+                        updated_at = excluded.updated_at
+                    """,
+                    publications,
+                )
+            if documents:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO documents (url, data, fetched_at) VALUES (?, ?, ?)",
+                    documents,
+                )
+
+        for rows in self._pending.values():
+            rows.clear()
+
+        # Everything journaled so far is now durable in the store
+        if self.journal is not None:
+            self.journal.truncate()
+
+    def record_person(self, url, name="", norm_name="", department="", interested=False, ok=True):
+        status = STATUS_DONE if ok else STATUS_FAILED
+        self._queue("persons", (url, name, norm_name, department, int(interested), status, 1, _now()))
+
+    def record_publication(self, url, interested=False, ok=True):
+        status = STATUS_DONE if ok else STATUS_FAILED
+        self._queue("publications", (url, int(interested), status, 1, _now()))
+
+    def put_document(self, url, record):
+        self._queue("documents", (url, json.dumps(record, ensure_ascii=False), _now()))
+
+    # ------------------------------------------------------------ checkpoints
+
+    def checkpoint(self, phase, run_started):
+        """Mark ``phase`` of the run that began at ``run_started`` as finished."""
+        self.flush()
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (phase, run_started, finished_at) VALUES (?, ?, ?)",
+                (phase, run_started, _now()),
+            )
+
+    def resume_point(self):
+        """Return ``(run_started, completed_phases)`` of an unfinished recent run, if any."""
+        rows = self.conn.execute("SELECT phase, run_started FROM checkpoints").fetchall()
+        if not rows:
+            return None, set()
+
+        run_started = rows[0][1]
+        age_hours = (datetime.now() - datetime.fromisoformat(run_started)).total_seconds() / 3600
+        if age_hours > RESUME_WINDOW_HOURS:
+            self.clear_checkpoints()
+            return None, set()
+        return run_started, {phase for phase, _ in rows}
+
+    def clear_checkpoints(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM checkpoints")
+
+    # ----------------------------------------------------------------- lookups
+
+    def filter_unseen(self, table, urls: Iterable[str], chunk_size=500) -> List[str]:
+        """Return the urls that are not yet done (or exhausted) in ``table``, keeping order."""
+        self.flush()
+        urls = list(dict.fromkeys(urls))
+        seen = set()
+        for i in range(0, len(urls), chunk_size):
+            chunk = urls[i:i + chunk_size]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT url FROM {table} WHERE url IN ({placeholders}) AND {_SEEN_CLAUSE}",
+                (*chunk, self.max_attempts),
+            )
+            seen.update(r[0] for r in rows)
+        return [u for u in urls if u not in seen]
+
+    def interested_person_names(self) -> Set[str]:
+        self.flush()
+        rows = self.conn.execute("SELECT norm_name FROM persons WHERE interested = 1 AND norm_name != ''")
+        return {r[0] for r in rows}
+
+    def missing_documents(self) -> List[str]:
+        """Interested publication urls that have no fetched document yet."""
+        self.flush()
+        rows = self.conn.execute(
+            """
+            SELECT p.url FROM publications p
+            LEFT JOIN documents d ON d.url = p.url
+            WHERE p.interested = 1 AND d.url IS NULL
+            ORDER BY p.url
+            """
+        )
+        return [r[0] for r in rows]
+
+    def iter_documents(self, after_seq=0) -> Iterator[Tuple[int, str, dict]]:
+        """Yield ``(seq, url, record)`` for documents written after ``after_seq``."""
+        self.flush()
+        cursor = self.conn.execute(
+            "SELECT seq, url, data FROM documents WHERE seq > ? ORDER BY seq", (after_seq,)
+        )
+        for seq, url, data in cursor:
+            yield seq, url, json.loads(data)
+
+    def follow_documents(self, done, poll_seconds=STREAM_POLL_SECONDS) -> Iterator[Tuple[str, dict]]:
+        """Yield ``(url, record)`` as documents are committed, until ``done`` (an Event) is set.
+
+        Meant for a reader connection in another thread than the crawl's writer.
+        """
+        after_seq = 0
+        while True:
+            finished = done.is_set()
+            for seq, url, record in self.iter_documents(after_seq):
+                after_seq = seq
+                yield url, record
+            if finished:
+                return
+            done.wait(poll_seconds)
+
+    def digest(self):
+        """Cheap content fingerprint of the documents table.
+
+        Documents are only ever inserted or replaced, and both assign a new
+        ``seq``, so the row count plus the highest ``seq`` changes whenever the
+        contents do.
+        """
+        self.flush()
+        count, max_seq = self.conn.execute("SELECT COUNT(*), COALESCE(MAX(seq), 0) FROM documents").fetchone()
+        return f"documents:{count}:{max_seq}"
+
+    def count(self, table, where="1=1"):
+        self.flush()
+        return self.conn.execute(f"SELECT COUNT(*) FROM {table} WHERE {where}").fetchone()[0]
+
+    # -------------------------------------------------------------- migration
+
+    def migrate_legacy_files(self, persons_csv=PERSONS_CSV, publications_csv=PUBLICATIONS_CSV, data_json=DATA_JSON):
+        """One-time import of the old CSV/JSON crawl state into an empty store."""
+        imported = False
+
+        if self.count("persons") == 0 and Path(persons_csv).exists():
+            from src.crawler.scraper import normalize_name
+
+            with open(persons_csv, newline="", encoding="utf-8") as f:
+                for r in csv.DictReader(f):
+                    # Legacy rows with no name were fetch failures; let them be retried.
+                    ok = bool(r["name"])
+                    self.record_person(
+                        r["url"], r["name"], normalize_name(r["name"]), r["department"],
+                        r["interested"] == "True", ok=ok,
+                    )
+            imported = True
+
+        if self.count("publications") == 0 and Path(publications_csv).exists():
+            with open(publications_csv, newline="", encoding="utf-8") as f:
+                for r in csv.DictReader(f):
+                    self.record_publication(r["url"], r["interested"] == "True")
+            imported = True
+
+        if self.count("documents") == 0:
+            from src.crawler.preprocessor import iter_raw_publications
+
+            for path in (Path(data_json), legacy_json_path(data_json)):
+                if path.exists():
+                    for url, record in iter_raw_publications(path):
+                        self.put_document(url, record)
+                    imported = True
+                    break
+
+        self.flush()
+        if imported:
+            log.info(f" Migrated legacy crawl files into {self.db_path}")
+
+    def export_jsonl(self, path=DATA_JSON):
+        """Stream all documents to a JSONL file, one raw publication per line."""
+        return write_jsonl(path, (record for _, _, record in self.iter_documents()))
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
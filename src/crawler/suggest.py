@@ -0,0 +1,131 @@
+import math
+import heapq
+import bisect
+import re
+from collections import defaultdict
+
+from src.core.config import SUGGEST_PRECOMPUTED_PREFIX, SUGGEST_PRECOMPUTED_TOP
+
+
+def normalize(text):
+    """Same normalisation as the preprocessor's ``content``, so prefixes match stored keys."""
+    text = re.sub(r"[^a-z0-9\s]", "", text.lower())
+    return " ".join(text.split())
+
+
+def citation_weight(doc):
+    try:
+        citations = float(doc.get("citations") or 0)
+    except (TypeError, ValueError):
+        citations = 0
+    return 1 + math.log1p(max(citations, 0))
+
+
+def build_suggestions(documents, stop_words=(), precomputed_prefix=SUGGEST_PRECOMPUTED_PREFIX,
+                      precomputed_top=SUGGEST_PRECOMPUTED_TOP):
+    """Build the autocomplete table from ``{doc_id: doc}``.
+
+    Entries are surface words from titles and abstracts, weighted by the
+    citation-boosted number of documents containing them, and whole titles,
+    weighted by their document's citations. Each source is scaled by its
+    largest weight, so the most frequent word and the most cited title both
+    weigh 1 and titles compete with terms. They are stored as parallel
+    arrays sorted by key, so a prefix is a contiguous range found by bisection.
+    Ranges for very short prefixes are large, so their top entries are
+    precomputed.
+    """
+    word_weights = defaultdict(float)
+    titles = []
+    for doc_id, doc in documents.items():
+        weight = citation_weight(doc)
+        for word in set(doc.get("content", "").split()):
+            if len(word) > 1 and word not in stop_words:
+                word_weights[word] += weight
+        key = normalize(doc.get("title", ""))
+        if key:
+            titles.append((key, doc["title"], weight, doc_id))
+
+    max_word = max(word_weights.values(), default=0) or 1
+    max_title = max((entry[2] for entry in titles), default=0) or 1
+    entries = [(word, None, weight / max_word, None) for word, weight in word_weights.items()]
+    entries += [(key, label, weight / max_title, doc_id) for key, label, weight, doc_id in titles]
+    entries.sort(key=lambda entry: (entry[0], -entry[2]))
+
+    keys = [entry[0] for entry in entries]
+    weights = [round(entry[2], 6) for entry in entries]
+
+    candidates = defaultdict(list)
+    for i, key in enumerate(keys):
+        for length in range(1, min(precomputed_prefix, len(key)) + 1):
+            candidates[key[:length]].append(i)
+    top = {
+        prefix: heapq.nlargest(precomputed_top, indices, key=weights.__getitem__)
+        for prefix, indices in candidates.items()
+    }
+
+    return {
+        "keys": keys,
+        "labels": [entry[1] for entry in entries],
+        "weights": weights,
+        "doc_ids": [entry[3] for entry in entries],
+        "top": top,
+        "precomputed_prefix": precomputed_prefix,
+        "precomputed_top": precomputed_top,
+    }
+
+
+class Suggester:
+    """Prefix lookups over the table built by ``build_suggestions``."""
+
+    def __init__(self, data):
+        self.keys = data["keys"]
+        self.labels = data["labels"]
+        self.weights = data["weights"]
+        self.doc_ids = data["doc_ids"]
+        self.top = data["top"]
+        self.precomputed_prefix = data["precomputed_prefix"]
+        self.precomputed_top = data["precomputed_top"]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _lookup(self, prefix, k, terms_only=False):
+        if len(prefix) <= self.precomputed_prefix and k <= self.precomputed_top and not terms_only:
+            return self.top.get(prefix, [])[:k]
+
+        lo = bisect.bisect_left(self.keys, prefix)
+        # Every key starting with the prefix sorts below prefix + U+FFFF
+        hi = bisect.bisect_left(self.keys, prefix + "\uffff", lo)
+        indices = range(lo, hi)
+        if terms_only:
+            indices = (i for i in indices if self.doc_ids[i] is None)
+        return heapq.nlargest(k, indices, key=self.weights.__getitem__)
+
+    def suggest(self, prefix, k=10):
+        """Top ``k`` completions of ``prefix``, best first.
+
+        With several words typed, titles starting with the whole prefix are
+        mixed with completions of the last word appended to the others.
+        """
+        prefix = normalize(prefix)
+        if not prefix or k <= 0:
+            return []
+
+        matches = [(i, None) for i in self._lookup(prefix, k)]
+        if " " in prefix:
+            head, last = prefix.rsplit(" ", 1)
+            matches += [(i, head) for i in self._lookup(last, k, terms_only=True)]
+            matches = heapq.nlargest(k, matches, key=lambda match: self.weights[match[0]])
+
+        suggestions = []
+        for i, head in matches:
+            text = self.labels[i] or self.keys[i]
+            suggestion = {
+                "text": f"{head} {text}" if head else text,
+                "type": "title" if self.doc_ids[i] else "term",
+                "weight": self.weights[i],
+            }
+            if self.doc_ids[i]:
+                suggestion["doc_id"] = self.doc_ids[i]
+            suggestions.append(suggestion)
+        return suggestions
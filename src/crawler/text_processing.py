@@ -4,50 +4,119 @@ from nltk.corpus import stopwords
 from nltk.stem import PorterStemmer
 from nltk.tokenize import word_tokenize
 
+from src.core.config import ANALYZER_CHAIN, ANALYZER_SHINGLES
+
+# Bump whenever a filter's implementation changes, so stored token streams are recomputed
+ANALYZER_REVISION = 1
+
+# The chain every index was built with before analyzers became configurable
+DEFAULT_CHAIN = ("lowercase", "strip", "nltk", "stopwords", "porter")
+
+CHAR_FILTERS = {
+    "lowercase": str.lower,
+    # Remove non-alphanumeric characters
+    "strip": lambda text: re.sub(r"[^a-zA-Z0-9\s]", "", text),
+}
+
+TOKENIZERS = {
+    "nltk": lambda text: word_tokenize(text),
+    "whitespace": str.split,
+}
+
+TOKEN_FILTERS = ("stopwords", "porter")
+
 
 class TextProcessor:
-    def __init__(self):
+    """A versioned analyzer chain: char filters, one tokenizer, token filters.
+
+    ``chain`` lists step names in order, e.g. the default
+    ``lowercase, strip, nltk, stopwords, porter``. The same chain must analyze
+    documents and queries, so indexes record ``config()`` and the search
+    engine rebuilds its processor from it. With ``shingles`` the indexer also
+    builds a word-bigram field from adjacent tokens.
+    """
+
+    def __init__(self, chain=ANALYZER_CHAIN, shingles=ANALYZER_SHINGLES):
+        self.chain = tuple(chain)
+        self.shingles = shingles
+
+        tokenizers = [step for step in self.chain if step in TOKENIZERS]
+        unknown = [
+            step for step in self.chain
+            if step not in CHAR_FILTERS and step not in TOKENIZERS and step not in TOKEN_FILTERS
+        ]
+        if unknown:
+            raise ValueError(f"Unknown analyzer steps: {', '.join(unknown)}")
+        if len(tokenizers) != 1:
+            raise ValueError(f"Analyzer chain needs exactly one tokenizer, got {tokenizers or 'none'}")
+
+        split = self.chain.index(tokenizers[0])
+        if any(step not in CHAR_FILTERS for step in self.chain[:split]):
+            raise ValueError("Token filters must come after the tokenizer")
+        if any(step not in TOKEN_FILTERS for step in self.chain[split + 1:]):
+            raise ValueError("Char filters must come before the tokenizer")
+
+        self.char_filters = [CHAR_FILTERS[step] for step in self.chain[:split]]
+        self.tokenizer = TOKENIZERS[tokenizers[0]]
+        self.token_filters = list(self.chain[split + 1:])
+
         self._download_nltk_resources()
-        self.stop_words = set(stopwords.words("english"))
+        self.stop_words = set(stopwords.words("english")) if "stopwords" in self.chain else set()
         self.stemmer = PorterStemmer()
-    
-    @staticmethod
-    def _download_nltk_resources():
-        try:
-            nltk.data.find('tokenizers/punkt')
-        except LookupError:
-            print("Downloading NLTK punkt tokenizer...")
-            nltk.download("punkt", quiet=True)
-            nltk.download("punkt_tab", quiet=True)
-        
-        try:
-            nltk.data.find('corpora/stopwords')
-        except LookupError:
-            print("Downloading NLTK stopwords...")
-            nltk.download("stopwords", quiet=True)
-    
+
+    @property
+    def version(self):
+        """Identifies the token streams this chain produces."""
+        return f"{'+'.join(self.chain)}/{ANALYZER_REVISION}"
+
+    def config(self):
+        return {"chain": list(self.chain), "shingles": self.shingles, "version": self.version}
+
+    @classmethod
+    def from_config(cls, info):
+        """Rebuild the processor recorded in an index; older indexes used the default chain."""
+        if not isinstance(info, dict):
+            return cls(chain=DEFAULT_CHAIN, shingles=False)
+        return cls(chain=info["chain"], shingles=info.get("shingles", False))
+
+    def _download_nltk_resources(self):
+        if "nltk" in self.chain:
+            try:
+                nltk.data.find('tokenizers/punkt')
+            except LookupError:
+                print("Downloading NLTK punkt tokenizer...")
+                nltk.download("punkt", quiet=True)
+                nltk.download("punkt_tab", quiet=True)
+
+        if "stopwords" in self.chain:
+            try:
+                nltk.data.find('corpora/stopwords')
+            except LookupError:
+                print("Downloading NLTK stopwords...")
+                nltk.download("stopwords", quiet=True)
+
     def preprocess_text(self, text):
-        # Lowercasing
-        text = text.lower()
-        
-        # Remove non-alphanumeric characters
-        text = re.sub(r"[^a-z0-9\s]", "", text)
-
-        # Tokenization
-        tokens = word_tokenize(text)
-
-        # Stopword removal and stemming
-        processed = [
-            self.stemmer.stem(token)
-            for token in tokens
-            if token not in self.stop_words
-        ]
+        for char_filter in self.char_filters:
+            text = char_filter(text)
+
+        tokens = self.tokenizer(text)
+
+        for step in self.token_filters:
+            if step == "stopwords":
+                tokens = [token for token in tokens if token not in self.stop_words]
+            elif step == "porter":
+                tokens = [self.stemmer.stem(token) for token in tokens]
+
+        return tokens
 
-        return processed
-    
     def preprocess_query(self, query):
         return self.preprocess_text(query)
 
+    @staticmethod
+    def bigrams(tokens):
+        """Word-bigram shingles of an analyzed token stream."""
+        return [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
 
 # Singleton instance for convenient import
 _processor = None
@@ -66,9 +135,11 @@ def preprocess_text(text):
 if __name__ == "__main__":
     # Example usage
     processor = TextProcessor()
-    
+
     sample_text = "Machine Learning and Artificial Intelligence are transforming healthcare!"
     processed = processor.preprocess_text(sample_text)
-    
+
+    print(f"Analyzer: {processor.version}")
     print(f"Original: {sample_text}")
-    print(f"Processed: {processed}")
\ No newline at end of file
+    print(f"Processed: {processed}")
+    print(f"Bigrams: {processor.bigrams(processed)}")
@@ -0,0 +1,329 @@
+"""Boolean query language evaluated over sorted postings.
+
+Grammar (operators are upper case; juxtaposition is an implicit OR whose
+terms only affect ranking once something is required)::
+
+    clauses  := clause+
+    clause   := ["+" | "-"] or_expr
+    or_expr  := and_expr ("OR" and_expr)*
+    and_expr := not_expr ("AND" not_expr)*
+    not_expr := "NOT" not_expr | primary
+    primary  := "(" clauses ")" | [field ":"] (WORD | '"' PHRASE '"')
+
+``+x`` is required, ``-x`` and ``NOT x`` are excluded. Fields are
+``title:`` and ``author:``; unscoped terms search title + abstract.
+"""
+import re
+import bisect
+from dataclasses import dataclass
+
+FIELDS = ("title", "author")
+
+_TOKEN = re.compile(r'\s*(?:(\()|(\))|([+-])(?=\S)|((?:\w+:)?"[^"]*")|([^\s()"]+))')
+
+# Presence of any of these switches a query from bag-of-words to boolean evaluation
+_BOOLEAN_SYNTAX = re.compile(r'\b(?:AND|OR|NOT)\b|(?:^|[\s(])[+-][\w"(]|\b(?:%s):' % "|".join(FIELDS))
+
+
+class QuerySyntaxError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Term:
+    field: str
+    text: str
+
+
+@dataclass(frozen=True)
+class And:
+    children: tuple
+
+
+@dataclass(frozen=True)
+class Or:
+    children: tuple
+
+
+@dataclass(frozen=True)
+class Not:
+    child: object
+
+
+@dataclass(frozen=True)
+class Clauses:
+    # (occur, node) with occur one of "must", "should", "must_not"
+    items: tuple
+
+
+def is_boolean(query):
+    return bool(_BOOLEAN_SYNTAX.search(query))
+
+
+def tokenize(query):
+    tokens = []
+    pos = 0
+    query = query.strip()
+    while pos < len(query):
+        match = _TOKEN.match(query, pos)
+        if not match or match.end() == pos:
+            raise QuerySyntaxError(f"Unexpected character at {pos}: {query[pos]!r}")
+        pos = match.end()
+        lparen, rparen, modifier, phrase, word = match.groups()
+        if lparen:
+            tokens.append(("(", lparen))
+        elif rparen:
+            tokens.append((")", rparen))
+        elif modifier:
+            tokens.append(("mod", modifier))
+        elif phrase:
+            tokens.append(("term", phrase))
+        elif word in ("AND", "OR", "NOT"):
+            tokens.append((word, word))
+        else:
+            tokens.append(("term", word))
+    return tokens
+
+
+class Parser:
+
+    def __init__(self, query):
+        self.tokens = tokenize(query)
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def take(self):
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def parse(self):
+        node = self.clauses()
+        if self.peek() is not None:
+            raise QuerySyntaxError(f"Unexpected {self.tokens[self.pos][1]!r}")
+        return node
+
+    def clauses(self):
+        items = []
+        while self.peek() not in (None, ")"):
+            occur = "should"
+            if self.peek() == "mod":
+                occur = "must" if self.take()[1] == "+" else "must_not"
+            node = self.or_expr()
+            if isinstance(node, Not) and occur == "should":
+                occur, node = "must_not", node.child
+            items.append((occur, node))
+        if not items:
+            raise QuerySyntaxError("Empty query")
+        return Clauses(tuple(items))
+
+    def or_expr(self):
+        children = [self.and_expr()]
+        while self.peek() == "OR":
+            self.take()
+            children.append(self.and_expr())
+        return children[0] if len(children) == 1 else Or(tuple(children))
+
+    def and_expr(self):
+        children = [self.not_expr()]
+        while self.peek() == "AND":
+            self.take()
+            children.append(self.not_expr())
+        return children[0] if len(children) == 1 else And(tuple(children))
+
+    def not_expr(self):
+        if self.peek() == "NOT":
+            self.take()
+            return Not(self.not_expr())
+        return self.primary()
+
+    def primary(self):
+        kind = self.peek()
+        if kind == "(":
+            self.take()
+            node = self.clauses()
+            if self.peek() != ")":
+                raise QuerySyntaxError("Missing closing parenthesis")
+            self.take()
+            return node
+        if kind != "term":
+            raise QuerySyntaxError(f"Expected a term, got {self.tokens[self.pos][1] if kind else 'end of query'!r}")
+
+        text = self.take()[1]
+        field = None
+        prefix, sep, rest = text.partition(":")
+        if sep and prefix in FIELDS and rest:
+            field, text = prefix, rest
+        return Term(field, text.strip('"'))
+
+
+def parse(query):
+    return Parser(query).parse()
+
+
+def positive_terms(node):
+    """Text of every term that is not excluded, for ranking."""
+    if isinstance(node, Term):
+        return [node.text]
+    if isinstance(node, Not):
+        return []
+    if isinstance(node, Clauses):
+        return [t for occur, child in node.items if occur != "must_not" for t in positive_terms(child)]
+    return [t for child in node.children for t in positive_terms(child)]
+
+
+def gallop_to(postings, target, start):
+    """Index of the first entry >= ``target`` at or after ``start``, by exponential search."""
+    n = len(postings)
+    if start >= n or postings[start] >= target:
+        return start
+    bound = 1
+    while start + bound < n and postings[start + bound] < target:
+        bound *= 2
+    return bisect.bisect_left(postings, target, start + bound // 2, min(start + bound + 1, n))
+
+
+def intersect(lists):
+    """Intersection of sorted postings, smallest first, galloping through the longer ones."""
+    lists = sorted(lists, key=len)
+    if not lists:
+        return []
+    result = list(lists[0])
+    for other in lists[1:]:
+        if not result:
+            break
+        matched = []
+        pos = 0
+        for doc in result:
+            pos = gallop_to(other, doc, pos)
+            if pos == len(other):
+                break
+            if other[pos] == doc:
+                matched.append(doc)
+                pos += 1
+        result = matched
+    return result
+
+
+def union(lists):
+    merged = set()
+    for postings in lists:
+        merged.update(postings)
+    return sorted(merged)
+
+
+def difference(postings, excluded):
+    """Entries of ``postings`` missing from ``excluded``, galloping through the latter."""
+    result = []
+    pos = 0
+    for doc in postings:
+        pos = gallop_to(excluded, doc, pos)
+        if pos == len(excluded) or excluded[pos] != doc:
+            result.append(doc)
+    return result
+
+
+def contains_sequence(tokens, terms):
+    """Whether ``terms`` occur consecutively in ``tokens``."""
+    n = len(terms)
+    return any(tokens[i:i + n] == terms for i in range(len(tokens) - n + 1))
+
+
+class BooleanEvaluator:
+    """Evaluates a parsed query to a sorted list of document ordinals.
+
+    ``postings`` and ``field_postings[field]`` map analyzed terms to sorted
+    ordinals; ``positions(term, ordinal)`` gives a term's positions in a
+    document's title + abstract, used to verify phrases. Fields have no
+    positional postings, so ``field_tokens(field, ordinal)`` gives the
+    analyzed token sequences of a document's field (the title, or each
+    author name) to verify field-scoped phrases on the documents that
+    contain every term.
+    """
+
+    def __init__(self, processor, postings, field_postings, num_docs, positions, field_tokens):
+        self.processor = processor
+        self.postings = postings
+        self.field_postings = field_postings
+        self.num_docs = num_docs
+        self.positions = positions
+        self.field_tokens = field_tokens
+
+    def evaluate(self, node):
+        result = self._eval(node)
+        return list(range(self.num_docs)) if result is None else result
+
+    def _term(self, node, within=None):
+        terms = self.processor.preprocess_text(node.text)
+        if not terms:
+            return None  # stopwords only: no constraint
+        source = self.field_postings.get(node.field, {}) if node.field else self.postings
+        lists = [source.get(term, ()) for term in terms]
+        if within is not None:
+            lists.append(within)
+        matched = intersect(lists)
+        if len(terms) > 1 and node.field is None:
+            matched = [doc for doc in matched if self._adjacent(terms, doc)]
+        elif len(terms) > 1:
+            matched = [
+                doc for doc in matched
+                if any(contains_sequence(tokens, terms) for tokens in self.field_tokens(node.field, doc))
+            ]
+        return matched
+
+    def _adjacent(self, terms, doc):
+        following = [set(self.positions(term, doc)) for term in terms[1:]]
+        return any(
+            all(start + offset + 1 in positions for offset, positions in enumerate(following))
+            for start in self.positions(terms[0], doc)
+        )
+
+    def _conjunction(self, nodes):
+        """Intersect required nodes; phrases go last so positions are only checked on survivors."""
+        result = None
+        for node in sorted(nodes, key=lambda n: isinstance(n, Term) and " " in n.text.strip()):
+            if isinstance(node, Term):
+                matched = self._term(node, within=result)
+            else:
+                matched = self._eval(node)
+                if matched is not None and result is not None:
+                    matched = intersect([result, matched])
+            if matched is not None:
+                result = matched
+            if result is not None and not result:
+                break
+        return result
+
+    def _eval(self, node):
+        """Sorted ordinals, or None when the node places no constraint."""
+        if isinstance(node, Term):
+            return self._term(node)
+        if isinstance(node, Not):
+            inner = self._eval(node.child)
+            return [] if inner is None else difference(range(self.num_docs), inner)
+        if isinstance(node, And):
+            return self._conjunction(node.children)
+        if isinstance(node, Or):
+            results = [self._eval(child) for child in node.children]
+            return None if any(r is None for r in results) else union(results)
+
+        def evaluated(occur):
+            results = (self._eval(child) for o, child in node.items if o == occur)
+            return [r for r in results if r is not None]
+
+        must = [child for occur, child in node.items if occur == "must"]
+        must_not = evaluated("must_not")
+        # Optional clauses only filter when nothing is required
+        result = self._conjunction(must) if must else None
+        should = evaluated("should") if result is None else []
+        if result is None and should:
+            result = union(should)
+        elif result is None and must_not:
+            result = range(self.num_docs)
+        elif result is None:
+            return None
+        if must_not:
+            result = difference(result, union(must_not))
+        return list(result)
@@ -1,18 +1,105 @@
+import os
+import re
 import math
+import time
+import heapq
+import bisect
 import pickle
-from collections import Counter
-from src.crawler.text_processing import preprocess_text
+import functools
+from dataclasses import dataclass
+from collections import Counter, defaultdict
+from src.crawler.text_processing import TextProcessor
+from src.crawler.suggest import Suggester, normalize
+from src.crawler.spelling import SpellingIndex
+from src.crawler.snippets import document_snippet
+from src.crawler.embeddings import DenseIndex
+from src.services.boolean_query import BooleanEvaluator, QuerySyntaxError, is_boolean, parse, positive_terms
+
+from src.core.config import (
+    INDEX_PATH,
+    QUERY_CACHE_SIZE,
+    FUZZY_EXPANSIONS,
+    SNIPPET_LENGTH,
+    SEARCH_MODE,
+    HYBRID_WEIGHT,
+    HYBRID_CANDIDATES,
+    STATIC_WEIGHT,
+    SEARCH_BUDGET_MS,
+)
+
+SEARCH_MODES = ("lexical", "dense", "hybrid")
+
+# Ordinals scored between early-termination checks in impact-ordered search
+IMPACT_BLOCK = 256
+
+
+@dataclass(frozen=True)
+class AnalyzedQuery:
+    """A query analyzed once: its indexed terms, their TF-IDF weights and the vector norm."""
+    terms: tuple
+    weights: tuple
+    norm: float
+    phrases: tuple = ()
+    # (misspelled word, replacement) pairs whose terms were added by fuzzy expansion
+    expansions: tuple = ()
+    # Parsed boolean query, when the query used AND/OR/NOT, +/- or field syntax
+    boolean: object = None
 
-from src.core.config import INDEX_PATH
 
 class SearchEngine:
     
     def __init__(self, index_path=INDEX_PATH):
         self.index = self._load_index(index_path)
+        # Identifies the index for HTTP caching; older indexes fall back to the file's size and mtime
+        stat = os.stat(index_path)
+        self.version = self.index.get("version") or f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
         self.documents = self.index["documents"]
         self.doc_vectors = self.index["doc_vectors"]
         self.doc_norms = self.index["doc_norms"]
         self.idf = self.index["idf"]
+        self.inverted_index = self.index["inverted_index"]
+        self.shingle_index = self.index.get("shingle_index")
+        # Older indexes have no offsets; their results get unhighlighted snippets
+        self.offsets = self.index.get("offsets", {})
+        # Queries must go through the same analyzer that built the index
+        self.processor = TextProcessor.from_config(self.index.get("analyzer"))
+        # Bounded memo of recent queries; entries are immutable, so sharing them is safe
+        self.analyze_query = functools.lru_cache(maxsize=QUERY_CACHE_SIZE)(self._analyze_query)
+        suggestions = self.index.get("suggest")
+        self.suggester = Suggester(suggestions) if suggestions is not None else None
+        spelling = self.index.get("spelling")
+        self.spelling = SpellingIndex(spelling) if spelling is not None else None
+
+        if "doc_ids" not in self.index:
+            # Older indexes: derive sorted postings; field scoping is unavailable
+            self.index["doc_ids"] = sorted(self.documents)
+            ordinals = {doc_id: i for i, doc_id in enumerate(self.index["doc_ids"])}
+            self.index["postings"] = {
+                term: sorted(ordinals[doc_id] for doc_id in docs)
+                for term, docs in self.inverted_index.items()
+            }
+        self.doc_ids = self.index["doc_ids"]
+        self.postings = self.index["postings"]
+        self.ordinals = {doc_id: i for i, doc_id in enumerate(self.doc_ids)}
+        # Static quality per ordinal and impact-ordered postings; absent from older indexes
+        self.static_scores = self.index.get("static_scores")
+        self.impacts = self.index.get("impacts")
+        self.max_impact = self.index.get("max_impact")
+        self.champions = self.index.get("champions")
+        self.champion_floor = self.index.get("champion_floor")
+        # How tiered searches ended: tier 1 alone, exact after tier 2, or cut off by the deadline
+        self.tier_counts = Counter()
+        embeddings = self.index.get("embeddings")
+        # Without embeddings (older indexes) every mode ranks lexically
+        self.dense = DenseIndex(embeddings) if embeddings is not None else None
+        self.evaluator = BooleanEvaluator(
+            self.processor,
+            self.postings,
+            self.index.get("field_postings", {}),
+            len(self.doc_ids),
+            lambda term, ordinal: self.inverted_index.get(term, {}).get(self.doc_ids[ordinal], ()),
+            self.field_tokens,
+        )
         
         print(f" Search engine initialized with {len(self.documents)} documents")
     
@@ -23,7 +110,7 @@ class SearchEngine:
         return index
     
     @staticmethod
-    def cosine_similarity(query_vec, doc_vec, doc_norm):
+    def cosine_similarity(query_vec, doc_vec, doc_norm, query_norm=None):
         
         # Dot product
         dot_product = sum(
@@ -32,7 +119,8 @@ class SearchEngine:
         )
         
 
-        query_norm = math.sqrt(sum(v ** 2 for v in query_vec.values()))
+        if query_norm is None:
+            query_norm = math.sqrt(sum(v ** 2 for v in query_vec.values()))
         
 
         if query_norm == 0 or doc_norm == 0:
@@ -53,38 +141,413 @@ class SearchEngine:
         
         return query_vec
     
-    def search(self, query, top_n=5):
-        
-        query_terms = preprocess_text(query)
+    def phrase_matches(self, phrase):
+        """Documents containing ``phrase`` as adjacent analyzed terms.
+
+        Two-term phrases are a single lookup in the shingle field when the
+        index has one; otherwise positional postings are intersected.
+        """
+        terms = self.processor.preprocess_text(phrase)
+        if not terms:
+            return set()
+        if len(terms) == 2 and self.shingle_index is not None:
+            return set(self.shingle_index.get(self.processor.bigrams(terms)[0], {}))
+
+        postings = [self.inverted_index.get(term, {}) for term in terms]
+        candidates = set(postings[0]).intersection(*postings[1:])
+        return {
+            doc_id for doc_id in candidates
+            if any(
+                all(start + offset in postings[offset][doc_id] for offset in range(1, len(terms)))
+                for start in postings[0][doc_id]
+            )
+        }
+
+    def field_tokens(self, field, ordinal):
+        """Analyzed token sequences of a document's ``title`` or of each of its author names."""
+        doc = self.documents[self.doc_ids[ordinal]]
+        if field == "title":
+            return [self.processor.preprocess_text(doc.get("title", ""))]
+        return [self.processor.preprocess_text(author.get("name", "")) for author in doc.get("authors", [])]
+
+    def suggest(self, prefix, k=10):
+        """Autocomplete ``prefix``; a table lookup that never touches the scoring path."""
+        if self.suggester is None:
+            return []
+        return self.suggester.suggest(prefix, k)
+
+    def is_known(self, word):
+        """True when every term ``word`` analyzes to is indexed (stopwords count as known)."""
+        return all(term in self.idf for term in self.processor.preprocess_text(word))
+
+    def spelling_candidates(self, word, limit=FUZZY_EXPANSIONS):
+        """Indexed surface words close to a word that is not in the index."""
+        if self.spelling is None or self.is_known(word):
+            return []
+        return [
+            (candidate, distance) for candidate, distance, _ in self.spelling.candidates(word, limit=limit)
+            if self.is_known(candidate)
+        ]
+
+    def corrections(self, query):
+        """Best replacement for each query word that is not in the index."""
+        corrections = {}
+        for word in normalize(query).split():
+            candidates = self.spelling_candidates(word, limit=1)
+            if candidates:
+                corrections[word] = candidates[0][0]
+        return corrections
+
+    def did_you_mean(self, query):
+        """The query with misspelled words corrected, or None if nothing changed."""
+        corrections = self.corrections(query)
+        if not corrections:
+            return None
+        return " ".join(corrections.get(word, word) for word in normalize(query).split())
+
+    def _analyze_query(self, query, fuzzy=False):
+        boolean = None
+        if is_boolean(query):
+            try:
+                boolean = parse(query)
+            except QuerySyntaxError:
+                pass  # not valid boolean syntax: fall back to a bag of words
+        if boolean is not None:
+            # Rank by the terms the query asks for; the boolean tree only filters
+            query = " ".join(positive_terms(boolean))
+
+        query_vec = self.build_query_vector(self.processor.preprocess_query(query))
+
+        expansions = []
+        if fuzzy:
+            # Unknown words are expanded to nearby indexed words, down-weighted by edit distance
+            for word in normalize(query).split():
+                for candidate, distance in self.spelling_candidates(word):
+                    expansions.append((word, candidate))
+                    for term in self.processor.preprocess_text(candidate):
+                        query_vec[term] = query_vec.get(term, 0) + self.idf[term] / (1 + distance)
+
+        # Terms missing from the index weigh nothing and are dropped
+        weighted = [(term, weight) for term, weight in query_vec.items() if weight]
+        return AnalyzedQuery(
+            terms=tuple(term for term, _ in weighted),
+            weights=tuple(weight for _, weight in weighted),
+            norm=math.sqrt(sum(weight ** 2 for _, weight in weighted)),
+            phrases=tuple(re.findall(r'"([^"]+)"', query)) if boolean is None else (),
+            expansions=tuple(expansions),
+            boolean=boolean,
+        )
+
+    def search(self, query, top_n=5, fuzzy=True, mode=SEARCH_MODE, static_weight=STATIC_WEIGHT,
+               budget_ms=SEARCH_BUDGET_MS):
+        """Top ``top_n`` ``(doc_id, score, doc)`` for ``query``.
+
+        ``mode`` is ``lexical`` (TF-IDF cosine), ``dense`` (LSA cosine through
+        the IVF index) or ``hybrid`` (both, fused). Boolean queries and quoted
+        phrases are constraints only the lexical ranker can honour, so they
+        always rank lexically. Every mode blends in the document's static
+        quality: ``(1 - static_weight) * relevance + static_weight * static``.
+        A positive ``budget_ms`` makes lexical search tiered (see
+        ``_search_tiered``): exact when it finishes in time, otherwise the
+        best results found by the deadline.
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode {mode!r}, expected one of {', '.join(SEARCH_MODES)}")
+
+        analyzed = self.analyze_query(query, fuzzy)
         
-        if not query_terms:
-            print(" Query produced no valid terms after preprocessing")
+        if not analyzed.terms and analyzed.boolean is None:
+            print(" Query produced no indexed terms after preprocessing")
             return []
+
+        if self.static_scores is None:
+            static_weight = 0.0
+
+        if analyzed.boolean is not None:
+            return self._search_boolean(analyzed, top_n, static_weight)
+
+        if mode != "lexical" and self.dense is not None and not analyzed.phrases:
+            query_vec = self.dense.embed(analyzed.terms, analyzed.weights)
+            if query_vec is not None:
+                if mode == "dense":
+                    return self._search_dense(query_vec, top_n, static_weight)
+                return self._search_hybrid(analyzed, query_vec, top_n, static_weight)
+
+        if budget_ms and self.champions is not None:
+            return self._search_tiered(analyzed, top_n, static_weight, budget_ms)
+        if self.impacts is not None:
+            return self._search_impact_ordered(analyzed, top_n, static_weight)
+
+        # Older indexes: score every match, relevance only
+        scores = self._lexical_scores(analyzed)
+
+        # Prepare results
+        results = [
+            (doc_id, score, self.documents[doc_id]) 
+            for score, doc_id in heapq.nlargest(top_n, scores)
+        ]
         
-        # Build query vector
-        query_vec = self.build_query_vector(query_terms)
+        return results
+
+    def blend(self, relevance, ordinal, static_weight):
+        if not static_weight:
+            return relevance
+        return (1 - static_weight) * relevance + static_weight * self.static_scores[ordinal]
+
+    def _phrase_candidates(self, analyzed):
+        """Documents containing every "quoted phrase" of the query, or None without phrases."""
+        candidates = None
+        for phrase in analyzed.phrases:
+            matches = self.phrase_matches(phrase)
+            candidates = matches if candidates is None else candidates & matches
+        return candidates
+
+    def _query_lists(self, analyzed):
+        """``(term, postings, impacts, query weight)`` of the query terms, weights divided by the query norm."""
+        return [
+            (term, self.postings[term], self.impacts[term], weight / analyzed.norm)
+            for term, weight in zip(analyzed.terms, analyzed.weights)
+            if term in self.impacts
+        ]
+
+    def _walk_impact_ordered(self, lists, top, top_n, static_weight, bound, candidates=None, skip=(), deadline=None):
+        """Push documents into the ``top`` heap a block of ordinals at a time, best static score first.
+
+        No unvisited document's cosine can exceed ``bound``, so once the k-th
+        best blended score reaches ``(1 - w) * bound + w * static`` of the next
+        ordinal, nothing left can enter the top k and the walk stops. It also
+        stops at ``deadline`` (a ``time.perf_counter()`` value). Returns True
+        when the walk finished or stopped on the bound, i.e. ``top`` is exact.
+        """
+        cursors = [0] * len(lists)
+        for block_start in range(0, len(self.doc_ids), IMPACT_BLOCK):
+            if len(top) == top_n and top[0][0] >= self.blend(bound, block_start, static_weight):
+                return True
+            if deadline is not None and time.perf_counter() >= deadline:
+                return False
+            block_end = block_start + IMPACT_BLOCK
+
+            cosines = defaultdict(float)
+            for i, (_, postings, impacts, query_weight) in enumerate(lists):
+                start = cursors[i]
+                end = bisect.bisect_left(postings, block_end, start)
+                for ordinal, impact in zip(postings[start:end], impacts[start:end]):
+                    cosines[ordinal] += query_weight * impact
+                cursors[i] = end
+
+            for ordinal, cosine in cosines.items():
+                if ordinal in skip or (candidates is not None and self.doc_ids[ordinal] not in candidates):
+                    continue
+                entry = (self.blend(cosine, ordinal, static_weight), -ordinal)
+                if len(top) < top_n:
+                    heapq.heappush(top, entry)
+                elif entry > top[0]:
+                    heapq.heapreplace(top, entry)
+        return True
+
+    def _ranked(self, top):
+        return [
+            (self.doc_ids[-negated], score, self.documents[self.doc_ids[-negated]])
+            for score, negated in sorted(top, reverse=True)
+        ]
+
+    def _search_impact_ordered(self, analyzed, top_n, static_weight):
+        """Exact top ``top_n`` by blended lexical score, walking impact-ordered postings with early termination."""
+        lists = self._query_lists(analyzed)
+        # The query's cosine with each term's largest normalized weight
+        bound = sum(query_weight * self.max_impact[term] for term, _, _, query_weight in lists)
+        top = []
+        self._walk_impact_ordered(lists, top, top_n, static_weight, bound, self._phrase_candidates(analyzed))
+        return self._ranked(top)
+
+    def _search_tiered(self, analyzed, top_n, static_weight, budget_ms):
+        """Anytime top ``top_n``: champion lists first, the remaining postings only if needed and in budget.
+
+        Tier 1 scores every document in a query term's champion list exactly.
+        Any other document has, for each query term, a weight no higher than
+        that term's champion floor, so its cosine is at most ``floor_bound``.
+        When the k-th tier-1 score already beats that (blended with the best
+        static score left), tier 1 is the exact answer. Otherwise the
+        impact-ordered walk continues over the other documents until it can
+        stop on the bound or the ``budget_ms`` deadline passes, and the best
+        found so far are returned.
+        """
+        deadline = time.perf_counter() + budget_ms / 1000
+        candidates = self._phrase_candidates(analyzed)
+        lists = self._query_lists(analyzed)
+
+        champions = set()
+        for term, _, _, _ in lists:
+            champions.update(self.champions[term])
+        top = []
+        for ordinal in champions:
+            doc_id = self.doc_ids[ordinal]
+            if candidates is not None and doc_id not in candidates:
+                continue
+            doc_vec = self.doc_vectors[doc_id]
+            cosine = sum(query_weight * doc_vec.get(term, 0.0) for term, _, _, query_weight in lists)
+            entry = (self.blend(cosine / self.doc_norms[doc_id], ordinal, static_weight), -ordinal)
+            if len(top) < top_n:
+                heapq.heappush(top, entry)
+            elif entry > top[0]:
+                heapq.heapreplace(top, entry)
+
+        floor_bound = sum(query_weight * self.champion_floor[term] for term, _, _, query_weight in lists)
+        best_remaining = next((o for o in range(len(self.doc_ids)) if o not in champions), None)
+        if best_remaining is None or (
+            len(top) == top_n and top[0][0] >= self.blend(floor_bound, best_remaining, static_weight)
+        ):
+            self.tier_counts["tier1"] += 1
+            return self._ranked(top)
+
+        exact = self._walk_impact_ordered(
+            lists, top, top_n, static_weight, floor_bound, candidates, skip=champions, deadline=deadline
+        )
+        self.tier_counts["tier2" if exact else "deadline"] += 1
+        return self._ranked(top)
+
+    def _lexical_scores(self, analyzed):
+        """``(cosine, doc_id)`` of every document sharing a term with the query."""
+        # "Quoted phrases" restrict results to documents containing them
+        candidates = self._phrase_candidates(analyzed)
         
+        # Accumulate dot products over the query terms' postings only
+        dot_products = defaultdict(float)
+        for term, weight in zip(analyzed.terms, analyzed.weights):
+            for doc_id in self.inverted_index.get(term, ()):
+                dot_products[doc_id] += weight * self.doc_vectors[doc_id][term]
+
         scores = []
-        for doc_id, doc_vec in self.doc_vectors.items():
-            similarity = self.cosine_similarity(
-                query_vec, 
-                doc_vec, 
-                self.doc_norms[doc_id]
-            )
+        for doc_id, dot_product in dot_products.items():
+            doc_norm = self.doc_norms[doc_id]
+            if doc_norm == 0 or (candidates is not None and doc_id not in candidates):
+                continue
+            similarity = dot_product / (analyzed.norm * doc_norm)
             
             if similarity > 0:  
                 scores.append((similarity, doc_id))
 
-        scores.sort(reverse=True)
-        
-        # Prepare results
-        results = [
-            (doc_id, score, self.documents[doc_id]) 
-            for score, doc_id in scores[:top_n]
+        return scores
+
+    def _search_dense(self, query_vec, top_n, static_weight):
+        """IVF top ``top_n``; with static quality, the best ``HYBRID_CANDIDATES`` are re-ranked by the blend."""
+        depth = max(top_n, HYBRID_CANDIDATES) if static_weight else top_n
+        ranked = heapq.nlargest(top_n, (
+            (self.blend(score, ordinal, static_weight), -ordinal)
+            for ordinal, score in self.dense.search(query_vec, depth)
+        ))
+        return [
+            (self.doc_ids[-negated], score, self.documents[self.doc_ids[-negated]])
+            for score, negated in ranked
         ]
-        
-        return results
+
+    def _search_hybrid(self, analyzed, query_vec, top_n, static_weight, weight=HYBRID_WEIGHT):
+        """Fuse lexical and dense cosines: ``weight * lexical + (1 - weight) * dense``.
+
+        Candidates are the best ``HYBRID_CANDIDATES`` of each ranker; every
+        candidate then gets both scores exactly (the lexical ones are already
+        computed for all matches, the dense ones are one dot product each), so
+        a document found by only one side is not penalised for the other.
+        """
+        depth = max(top_n, HYBRID_CANDIDATES)
+        lexical = {doc_id: score for score, doc_id in self._lexical_scores(analyzed)}
+        candidates = {doc_id for _, doc_id in heapq.nlargest(depth, ((s, d) for d, s in lexical.items()))}
+        candidates.update(self.doc_ids[ordinal] for ordinal, _ in self.dense.search(query_vec, depth))
+
+        candidates = sorted(candidates)
+        dense = self.dense.scores(query_vec, [self.ordinals[doc_id] for doc_id in candidates])
+        fused = [
+            (self.blend(
+                weight * lexical.get(doc_id, 0.0) + (1 - weight) * max(float(dense_score), 0.0),
+                self.ordinals[doc_id], static_weight,
+            ), doc_id)
+            for doc_id, dense_score in zip(candidates, dense)
+        ]
+        return [(doc_id, score, self.documents[doc_id]) for score, doc_id in heapq.nlargest(top_n, fused)]
     
+    def _search_boolean(self, analyzed, top_n, static_weight):
+        """Rank the documents a boolean query matches.
+
+        Matches come from intersecting/uniting sorted postings, so only they
+        are scored; a match sharing no ranked term still appears, with score 0.
+        """
+        matches = self.evaluator.evaluate(analyzed.boolean)
+        ranked = list(zip(analyzed.terms, analyzed.weights))
+
+        # Look up each match's vector when matches are few, otherwise walk the ranked terms' postings
+        postings_size = sum(len(self.inverted_index.get(term, ())) for term, _ in ranked)
+        dot_products = None
+        if len(matches) * len(ranked) > postings_size:
+            dot_products = defaultdict(float)
+            for term, weight in ranked:
+                for doc_id in self.inverted_index.get(term, ()):
+                    dot_products[doc_id] += weight * self.doc_vectors[doc_id][term]
+
+        scores = []
+        for ordinal in matches:
+            doc_id = self.doc_ids[ordinal]
+            doc_norm = self.doc_norms[doc_id]
+            if dot_products is not None:
+                dot_product = dot_products.get(doc_id, 0.0)
+            else:
+                doc_vec = self.doc_vectors[doc_id]
+                dot_product = sum(weight * doc_vec.get(term, 0) for term, weight in ranked)
+            similarity = dot_product / (analyzed.norm * doc_norm) if analyzed.norm and doc_norm else 0.0
+            # Ties (e.g. all zero) keep index order
+            scores.append((self.blend(similarity, ordinal, static_weight), -ordinal, doc_id))
+
+        return [
+            (doc_id, score, self.documents[doc_id])
+            for score, _, doc_id in heapq.nlargest(top_n, scores)
+        ]
+
+    def similar(self, doc_id, k=10):
+        """Documents most similar to ``doc_id`` by TF-IDF cosine, or None for an unknown document.
+
+        Neighbour lists are precomputed at index time, so this is a lookup;
+        ``k`` beyond the stored list length returns the whole list. Older
+        indexes without them score the document against its terms' postings.
+        """
+        if doc_id not in self.documents:
+            return None
+
+        neighbours = self.index.get("similar", {}).get(doc_id)
+        if neighbours is None:
+            doc_norm = self.doc_norms[doc_id]
+            dot_products = defaultdict(float)
+            for term, weight in self.doc_vectors[doc_id].items():
+                for other in self.inverted_index.get(term, ()):
+                    dot_products[other] += weight * self.doc_vectors[other][term]
+            dot_products.pop(doc_id, None)
+            neighbours = [
+                (other, dot_product / (doc_norm * self.doc_norms[other]))
+                for other, dot_product in dot_products.items()
+                if doc_norm and self.doc_norms[other]
+            ]
+            neighbours = heapq.nlargest(k, neighbours, key=lambda n: n[1])
+
+        return [(other, score, self.documents[other]) for other, score in neighbours[:k]]
+
+    def snippets(self, query, results, fuzzy=True, length=SNIPPET_LENGTH):
+        """Title highlights and a best-window abstract snippet for each of ``results``.
+
+        Only the returned hits are processed: each query term's positions in a
+        hit are mapped to the character spans recorded at index time, so no
+        document text is scanned or re-analyzed per request.
+        """
+        analyzed = self.analyze_query(query, fuzzy)
+        snippets = []
+        for doc_id, _, doc in results:
+            offsets = self.offsets.get(doc_id)
+            term_hits = []
+            if offsets is not None:
+                for term, weight in zip(analyzed.terms, analyzed.weights):
+                    positions = self.inverted_index.get(term, {}).get(doc_id)
+                    if positions:
+                        term_hits.append((term, weight, positions))
+            snippets.append(document_snippet(doc, offsets, term_hits, length))
+        return snippets
+
     def format_results(self, results, show_full=False):
         if not results:
             return "No results found."
@@ -129,12 +592,30 @@ class SearchEngine:
         return '\n'.join(output)
     
     def get_statistics(self):
+        """Index statistics; precomputed at build time, so this is cheap enough to poll."""
+        stats = self.index.get("stats")
+        if stats is not None:
+            return {
+                "total_documents": stats["documents"],
+                "total_terms": stats["terms"],
+                "avg_doc_length": stats["doc_length"]["mean"],
+                "analyzer": stats["analyzer"],
+                "index": stats,
+                "query_cache": self.analyze_query.cache_info()._asdict(),
+                "tiered_search": dict(self.tier_counts),
+            }
+
+        # Older indexes: token counts may be stored, otherwise re-tokenize
+        doc_lengths = self.index.get("doc_lengths")
+        if doc_lengths is None:
+            doc_lengths = {
+                doc_id: len(self.processor.preprocess_text(doc["content"]))
+                for doc_id, doc in self.documents.items()
+            }
         return {
             "total_documents": len(self.documents),
             "total_terms": len(self.idf),
-            "avg_doc_length": sum(
-                len(preprocess_text(doc["content"])) 
-                for doc in self.documents.values()
-            ) / len(self.documents) if self.documents else 0
+            "avg_doc_length": sum(doc_lengths.values()) / len(doc_lengths) if doc_lengths else 0,
+            "analyzer": self.processor.version,
         }
 
@@ -0,0 +1,65 @@
+import gzip
+import json
+from pathlib import Path
+
+
+def is_gzip(path):
+    return str(path).endswith(".gz")
+
+
+def is_jsonl(path):
+    return ".jsonl" in Path(path).suffixes
+
+
+def open_text(path, mode="r", compress=None):
+    """Open a text file, gzip-compressed when the name ends in ``.gz`` (or ``compress`` is set)."""
+    if compress if compress is not None else is_gzip(path):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def iter_jsonl(path):
+    with open_text(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+class JsonlWriter:
+    """Writes one JSON object per line to a temp file that replaces ``path`` on success."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.tmp = self.path.with_name(self.path.name + ".tmp")
+        self.count = 0
+        self._file = None
+
+    def __enter__(self):
+        self._file = open_text(self.tmp, "w", compress=is_gzip(self.path))
+        return self
+
+    def write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.count += 1
+
+    def __exit__(self, exc_type, *exc):
+        self._file.close()
+        if exc_type is None:
+            self.tmp.replace(self.path)
+        else:
+            self.tmp.unlink(missing_ok=True)
+
+
+def write_jsonl(path, records):
+    with JsonlWriter(path) as writer:
+        for record in records:
+            writer.write(record)
+    return writer.count
+
+
+def legacy_json_path(path):
+    """``data.jsonl`` / ``data.jsonl.gz`` -> ``data.json``"""
+    path = Path(path)
+    name = path.name.split(".jsonl")[0]
+    return path.with_name(name + ".json")
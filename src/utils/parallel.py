@@ -0,0 +1,42 @@
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+
+def chunked(items, size):
+    it = iter(items)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def imap_chunks(func, items, workers=1, chunk_size=200, payload=None, initializer=None, initargs=()):
+    """Apply ``func`` to chunks of ``items`` in worker processes.
+
+    Yields ``(chunk, result)`` in input order, so output is deterministic
+    regardless of which worker finishes first. ``payload(chunk)`` is what gets
+    sent to the worker (the chunk itself by default). At most two chunks per
+    worker are in flight, so ``items`` may be a lazy stream. ``initializer``
+    runs once in each worker process, for state shared by every chunk; it is
+    not called when running in-process.
+    """
+    payload = payload or (lambda chunk: chunk)
+    chunks = chunked(items, chunk_size)
+
+    if workers <= 1:
+        for chunk in chunks:
+            yield chunk, func(payload(chunk))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append((chunk, pool.submit(func, payload(chunk))))
+            if len(pending) >= 2 * workers:
+                chunk, future = pending.popleft()
+                yield chunk, future.result()
+        while pending:
+            chunk, future = pending.popleft()
+            yield chunk, future.result()
@@ -1,6 +1,6 @@
 from src.services.search_engine import SearchEngine
 
-from src.core.config import INDEX_PATH
+from src.core.config import INDEX_PATH, SEARCH_MODE, SEARCH_BUDGET_MS
 _search_engine = None
 
 
@@ -12,35 +12,72 @@ def get_search_engine(index_path=INDEX_PATH):
     return _search_engine
 
 
-def search_publications(query, top_n=5, index_path=INDEX_PATH):
+# Builders of each result field, so a projection only computes what it returns
+RESULT_FIELDS = {
+    "doc_id": lambda doc_id, score, doc: doc_id,
+    "score": lambda doc_id, score, doc: float(score),
+    "title": lambda doc_id, score, doc: doc["title"],
+    "year": lambda doc_id, score, doc: doc.get("year"),
+    "authors": lambda doc_id, score, doc: [
+        {
+            "name": author["name"],
+            "profile_url": author.get("profile_url")
+        }
+        for author in doc.get("authors", [])
+    ],
+    "journal": lambda doc_id, score, doc: doc.get("journal", ""),
+    "type": lambda doc_id, score, doc: doc.get("type", ""),
+    "citations": lambda doc_id, score, doc: doc.get("citations", "0"),
+    "altmetric_score": lambda doc_id, score, doc: doc.get("altmetric_score", "0"),
+    "concepts": lambda doc_id, score, doc: doc.get("concepts", []),
+    "url": lambda doc_id, score, doc: doc.get("publication_url", ""),
+    "doi": lambda doc_id, score, doc: doc.get("doi", ""),
+}
+# Search-only fields computed by SearchEngine.snippets
+SNIPPET_FIELDS = ("title_highlights", "snippet")
+
+
+def parse_fields(fields):
+    """Tuple of requested field names from a comma-separated list; None (all fields) when empty."""
+    if not fields:
+        return None
+    selected = tuple(field.strip() for field in fields.split(",") if field.strip())
+    unknown = [field for field in selected if field not in RESULT_FIELDS and field not in SNIPPET_FIELDS]
+    if unknown:
+        valid = ", ".join([*RESULT_FIELDS, *SNIPPET_FIELDS])
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Valid fields: {valid}")
+    return selected or None
 
+
+def format_result(doc_id, score, doc, fields=None):
+    """API-friendly form of a ranked ``(doc_id, score, doc)``, limited to ``fields`` when given."""
+    return {
+        field: build(doc_id, score, doc)
+        for field, build in RESULT_FIELDS.items()
+        if fields is None or field in fields
+    }
+
+
+def iter_search_publications(query, top_n=5, index_path=INDEX_PATH, fuzzy=True, mode=SEARCH_MODE,
+                             budget_ms=SEARCH_BUDGET_MS, fields=None):
+    """Rank first, then format (and snippet) each hit only as it is consumed."""
     engine = get_search_engine(index_path)
-    results = engine.search(query, top_n=top_n)
-    
+    results = engine.search(query, top_n=top_n, fuzzy=fuzzy, mode=mode, budget_ms=budget_ms)
+    snippet_fields = [field for field in SNIPPET_FIELDS if fields is None or field in fields]
+
+    for hit in results:
+        result = format_result(*hit, fields)
+        if snippet_fields:
+            # Computed for the final hits only
+            snippet = engine.snippets(query, [hit], fuzzy=fuzzy)[0]
+            result.update((field, snippet[field]) for field in snippet_fields)
+        yield result
+
+
+def search_publications(query, top_n=5, index_path=INDEX_PATH, fuzzy=True, mode=SEARCH_MODE,
+                        budget_ms=SEARCH_BUDGET_MS, fields=None):
     # Convert to API-friendly format
-    return [
-        {
-            "doc_id": doc_id,
-            "score": float(score),
-            "title": doc["title"],
-            "year": doc.get("year"),
-            "authors": [
-                {
-                    "name": author["name"],
-                    "profile_url": author.get("profile_url")
-                }
-                for author in doc.get("authors", [])
-            ],
-            "journal": doc.get("journal", ""),
-            "type": doc.get("type", ""),
-            "citations": doc.get("citations", "0"),
-            "altmetric_score": doc.get("altmetric_score", "0"),
-            "concepts": doc.get("concepts", []),
-            "url": doc.get("publication_url", ""),
-            "doi": doc.get("doi", "")
-        }
-        for doc_id, score, doc in results
-    ]
+    return list(iter_search_publications(query, top_n, index_path, fuzzy, mode, budget_ms, fields))
 
 
 def get_document_by_id(doc_id, index_path=INDEX_PATH):
@@ -66,11 +103,34 @@ def get_document_by_id(doc_id, index_path=INDEX_PATH):
     return None
 
 
+def get_similar_documents(doc_id, k=10, index_path=INDEX_PATH, fields=None):
+    """Publications most similar to ``doc_id``, or None if it is not indexed."""
+    engine = get_search_engine(index_path)
+    results = engine.similar(doc_id, k)
+    if results is None:
+        return None
+    return [format_result(other_id, score, doc, fields) for other_id, score, doc in results]
+
+
 def get_index_statistics(index_path=INDEX_PATH):
     engine = get_search_engine(index_path)
     return engine.get_statistics()
 
 
+def check_spelling(query, index_path=INDEX_PATH):
+    engine = get_search_engine(index_path)
+    return {
+        "query": query,
+        "did_you_mean": engine.did_you_mean(query),
+        "corrections": engine.corrections(query),
+    }
+
+
+def suggest_completions(prefix, k=10, index_path=INDEX_PATH):
+    engine = get_search_engine(index_path)
+    return engine.suggest(prefix, k)
+
+
 # Example usage for testing
 if __name__ == "__main__":
     # Test search
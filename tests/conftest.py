@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from src.crawler.indexer import TFIDFIndexer
+from src.crawler.suggest import normalize
+from src.services.search_engine import SearchEngine
+from src.utils import utils
+
+WORDS = (
+    "learning neural network ranking retrieval graph bayesian inference signal control "
+    "optimisation sparse matrix dynamics reinforcement classification estimation model"
+).split()
+
+
+def publications(n=40, seed=7):
+    rng = random.Random(seed)
+    docs = {}
+    for i in range(n):
+        title = " ".join(rng.sample(WORDS, 5)).capitalize()
+        abstract = " ".join(rng.choices(WORDS, k=40))
+        docs[f"DOC_{i:04d}"] = {
+            "title": title,
+            "year": 2000 + i % 25,
+            "authors": [{"name": f"Author {i % 7}, A."}, {"name": f"Writer {i % 5}, B."}],
+            "publication_url": f"http://example.org/publications/{i}",
+            "journal": "Journal of Tests",
+            "volume": "1",
+            "pages": "",
+            "doi": f"10.1000/test.{i}",
+            "citations": rng.randrange(0, 200),
+            "abstract": abstract,
+            "content": normalize(f"{title} {abstract}"),
+        }
+    return docs
+
+
+@pytest.fixture(scope="session")
+def index_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp("index") / "index.pkl"
+    indexer = TFIDFIndexer(workers=1)
+    indexer.add_documents(publications().items())
+    indexer.finalize()
+    indexer.save_index(str(path))
+    return str(path)
+
+
+@pytest.fixture(scope="session")
+def engine(index_path):
+    """The search engine the API serves, loaded from a small generated index."""
+    utils._search_engine = SearchEngine(index_path)
+    yield utils._search_engine
+    utils._search_engine = None
@@ -0,0 +1,88 @@
+import pytest
+
+from src.services.boolean_query import (
+    BooleanEvaluator, QuerySyntaxError, Term, contains_sequence, gallop_to, intersect, is_boolean, parse,
+)
+
+
+class Processor:
+    def preprocess_text(self, text):
+        return [word for word in text.lower().split() if word not in ("the", "of")]
+
+
+DOCS = [
+    {"title": "deep learning for ranking", "abstract": "neural ranking models", "authors": ["Ada Lovelace"]},
+    {"title": "deep ranking learning models", "abstract": "learning to rank", "authors": ["Alan Turing", "Ada Byron"]},
+    {"title": "survey of retrieval", "abstract": "deep learning for search", "authors": ["Grace Hopper"]},
+]
+
+
+def evaluator(docs=DOCS):
+    processor = Processor()
+    postings, positions = {}, {}
+    field_postings = {"title": {}, "author": {}}
+    tokens = {"title": [], "author": []}
+    for ordinal, doc in enumerate(docs):
+        for pos, term in enumerate(processor.preprocess_text(f"{doc['title']} {doc['abstract']}")):
+            positions.setdefault((term, ordinal), []).append(pos)
+            postings.setdefault(term, [])
+            if postings[term][-1:] != [ordinal]:
+                postings[term].append(ordinal)
+        tokens["title"].append([processor.preprocess_text(doc["title"])])
+        tokens["author"].append([processor.preprocess_text(name) for name in doc["authors"]])
+        for field in ("title", "author"):
+            for term in {t for seq in tokens[field][ordinal] for t in seq}:
+                field_postings[field].setdefault(term, []).append(ordinal)
+    return BooleanEvaluator(
+        processor, postings, field_postings, len(docs),
+        lambda term, ordinal: positions.get((term, ordinal), ()),
+        lambda field, ordinal: tokens[field][ordinal],
+    )
+
+
+def search(query):
+    return evaluator().evaluate(parse(query))
+
+
+def test_parse_operators_and_fields():
+    assert is_boolean("deep AND learning")
+    assert is_boolean('title:"deep learning"')
+    assert not is_boolean("deep learning")
+    assert parse('title:"deep learning"').items == (("should", Term("title", "deep learning")),)
+    with pytest.raises(QuerySyntaxError):
+        parse("(deep AND")
+
+
+def test_boolean_operators():
+    assert search("deep AND ranking") == [0, 1]
+    assert search("+deep -survey") == [0, 1]
+    assert search("retrieval OR rank") == [1, 2]
+    assert search("deep AND NOT title:ranking") == [2]
+
+
+def test_unscoped_phrase_checks_adjacency():
+    assert search('"deep learning"') == [0, 2]
+    assert search('"learning deep"') == []
+
+
+def test_field_scoped_phrase_checks_adjacency():
+    # Doc 1 has both words in its title but apart; doc 2 only has the phrase in its abstract
+    assert search('title:"deep learning"') == [0]
+    assert search('title:"deep ranking"') == [1]
+    assert search('title:"learning deep"') == []
+
+
+def test_author_phrase_stays_within_one_name():
+    assert search('author:"ada lovelace"') == [0]
+    # "turing ada" spans two author names of doc 1
+    assert search('author:"turing ada"') == []
+    assert search("author:ada") == [0, 1]
+
+
+def test_postings_helpers():
+    postings = [1, 3, 5, 7, 9, 11]
+    assert gallop_to(postings, 7, 0) == 3
+    assert gallop_to(postings, 12, 2) == len(postings)
+    assert intersect([[1, 2, 3, 9], postings, [3, 9, 10]]) == [3, 9]
+    assert contains_sequence(["a", "b", "c"], ["b", "c"])
+    assert not contains_sequence(["a", "b", "c"], ["c", "b"])
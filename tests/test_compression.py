@@ -0,0 +1,53 @@
+import asyncio
+import gzip
+import zlib
+
+from starlette.responses import StreamingResponse
+
+from src.apis.compression import CompressionMiddleware
+
+
+def run(app, headers):
+    """Call an ASGI app once, returning the messages it sent."""
+    scope = {
+        "type": "http", "method": "GET", "path": "/", "query_string": b"",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return messages
+
+
+LINES = [b'{"doc_id": "DOC_%04d", "title": "%s"}\n' % (i, b"x" * 300) for i in range(5)]
+
+
+async def ndjson(scope, receive, send):
+    async def lines():
+        for line in LINES:
+            yield line
+    await StreamingResponse(lines(), media_type="application/x-ndjson")(scope, receive, send)
+
+
+def test_gzip_stream_flushes_each_chunk():
+    messages = run(CompressionMiddleware(ndjson, minimum_size=100), {"Accept-Encoding": "gzip"})
+    start, chunks = messages[0], [m["body"] for m in messages[1:]]
+    assert (b"content-encoding", b"gzip") in start["headers"]
+
+    # Every chunk decodes to its own line before the stream has ended
+    decoder = zlib.decompressobj(wbits=31)
+    for line, chunk in zip(LINES, chunks):
+        assert decoder.decompress(chunk) == line
+    assert gzip.decompress(b"".join(chunks)) == b"".join(LINES)
+
+
+def test_identity_when_compression_is_not_accepted():
+    messages = run(CompressionMiddleware(ndjson, minimum_size=100), {"Accept-Encoding": "identity"})
+    assert all(name != b"content-encoding" for name, _ in messages[0]["headers"])
+    assert [m["body"] for m in messages[1:] if m["body"]] == LINES
@@ -0,0 +1,62 @@
+from src.crawler.dedup import NearDuplicateDetector, shingle_text, shingles, MIN_SHINGLES
+from src.crawler.suggest import normalize
+
+
+ABSTRACT = (
+    "We study retrieval of academic publications with inverted indexes and "
+    "compare ranking functions on a corpus of departmental research output."
+)
+
+
+def publication(title, abstract=ABSTRACT, doi="", citations=0):
+    return {
+        "title": title,
+        "abstract": abstract,
+        "doi": doi,
+        "citations": citations,
+        "content": normalize(f"{title} {abstract}"),
+    }
+
+
+def test_near_duplicates_are_merged_into_the_best_copy():
+    detector = NearDuplicateDetector()
+    detector.add("url:a", publication("Ranking publications with inverted indexes"))
+    displaced = detector.add("doi:10.1/x", publication("Ranking Publications with Inverted Indexes.", doi="10.1/x"))
+
+    assert displaced == ["url:a"]
+    assert detector.removed == {"url:a"}
+
+
+def test_placeholder_abstract_is_not_shingled():
+    doc = publication("Editorial", abstract="[no abstract]")
+    assert shingle_text(doc) == "editorial"
+    # A real abstract that happens to end with the same words is kept
+    assert shingle_text(publication("Notes", abstract="There is no abstract")) == "notes there is no abstract"
+
+
+def test_short_records_are_never_candidates():
+    detector = NearDuplicateDetector()
+    detector.add("url:a", publication("Editorial", abstract="[no abstract]"))
+    detector.add("url:b", publication("Editorial", abstract="[no abstract]"))
+
+    assert len(shingles("one two three four")) < MIN_SHINGLES
+    assert detector.removed == set()
+    assert detector.signatures == {}
+
+
+def test_different_dois_are_never_merged():
+    detector = NearDuplicateDetector()
+    detector.add("doi:10.1/a", publication("Ranking publications with inverted indexes", doi="10.1/a"))
+    detector.add("doi:10.1/b", publication("Ranking publications with inverted indexes", doi="10.1/b"))
+
+    assert detector.removed == set()
+
+
+def test_a_cluster_never_joins_two_dois():
+    detector = NearDuplicateDetector()
+    detector.add("url:a", publication("Ranking publications with inverted indexes"))
+    detector.add("doi:10.1/a", publication("Ranking publications with inverted indexes", doi="10.1/a"))
+    detector.add("doi:10.1/b", publication("Ranking publications with inverted indexes", doi="10.1/b"))
+
+    assert detector.removed == {"url:a"}
+    assert [sorted(c) for c in detector.clusters()] == [["doi:10.1/a", "url:a"]]
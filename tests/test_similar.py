@@ -0,0 +1,80 @@
+import math
+import random
+
+import numpy as np
+
+from src.crawler.similar import build_neighbours
+
+
+def corpus(n, seed=0, vocab=40, length=12):
+    rng = random.Random(seed)
+    doc_ids = [f"doc{i}" for i in range(n)]
+    vectors = {}
+    for doc_id in doc_ids:
+        vector = {}
+        for term in rng.choices(range(vocab), [1 / (r + 1) for r in range(vocab)], k=length):
+            vector[f"t{term}"] = vector.get(f"t{term}", 0) + rng.uniform(0.5, 2)
+        vectors[doc_id] = vector
+    return doc_ids, vectors
+
+
+def norms(vectors):
+    return {doc_id: math.sqrt(sum(w * w for w in v.values())) for doc_id, v in vectors.items()}
+
+
+def brute_force(doc_ids, vectors, top_n):
+    terms = sorted({t for v in vectors.values() for t in v})
+    matrix = np.array([[vectors[d].get(t, 0) for t in terms] for d in doc_ids])
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    scores = matrix @ matrix.T
+    expected = {}
+    for i, doc_id in enumerate(doc_ids):
+        ranked = sorted(((round(float(s), 6), j) for j, s in enumerate(scores[i]) if j != i and s > 0), reverse=True)
+        expected[doc_id] = [(doc_ids[j], s) for s, j in ranked[:top_n]]
+    return expected
+
+
+def scores_only(neighbours):
+    return {doc_id: [score for _, score in pairs] for doc_id, pairs in neighbours.items()}
+
+
+def test_matches_brute_force():
+    doc_ids, vectors = corpus(60)
+    neighbours = build_neighbours(doc_ids, vectors, norms(vectors), top_n=5, block_size=7)
+
+    expected = brute_force(doc_ids, vectors, 5)
+    assert list(neighbours) == doc_ids
+    assert scores_only(neighbours) == scores_only(expected)
+    assert all(doc_id not in [other for other, _ in pairs] for doc_id, pairs in neighbours.items())
+
+
+def test_workers_give_the_same_lists():
+    doc_ids, vectors = corpus(40, seed=1)
+    single = build_neighbours(doc_ids, vectors, norms(vectors), top_n=4, block_size=9)
+    parallel = build_neighbours(doc_ids, vectors, norms(vectors), top_n=4, workers=2, block_size=9)
+    assert parallel == single
+
+
+def test_incremental_build_matches_a_full_one():
+    doc_ids, vectors = corpus(80, seed=2)
+    previous = build_neighbours(doc_ids, vectors, norms(vectors), top_n=4)
+
+    # One document changed, one removed and one added
+    _, replacements = corpus(2, seed=3)
+    vectors = dict(vectors)
+    vectors["doc5"] = replacements["doc0"]
+    del vectors["doc9"]
+    vectors["new"] = replacements["doc1"]
+    doc_ids = [d for d in doc_ids if d != "doc9"] + ["new"]
+
+    incremental = build_neighbours(doc_ids, vectors, norms(vectors), top_n=4, previous=previous, changed={"doc5"})
+    full = build_neighbours(doc_ids, vectors, norms(vectors), top_n=4)
+    assert incremental == full
+
+
+def test_unchanged_corpus_reuses_every_list():
+    doc_ids, vectors = corpus(30, seed=4)
+    previous = build_neighbours(doc_ids, vectors, norms(vectors), top_n=3)
+    # Vectors that would give different lists prove nothing was recomputed
+    shuffled = dict(zip(doc_ids, reversed(list(vectors.values()))))
+    assert build_neighbours(doc_ids, shuffled, norms(shuffled), top_n=3, previous=previous) == previous
@@ -0,0 +1,30 @@
+from src.crawler.suggest import Suggester, build_suggestions, normalize
+
+
+def publication(title, abstract, citations):
+    return {"title": title, "citations": citations, "content": normalize(f"{title} {abstract}")}
+
+
+def test_titles_and_terms_share_a_scale():
+    documents = {
+        f"doc{i}": publication(f"Paper {i}", "learning models for ranking", citations=0)
+        for i in range(50)
+    }
+    documents["cited"] = publication("Learning to Rank", "a survey", citations=500)
+    suggester = Suggester(build_suggestions(documents))
+
+    suggestions = suggester.suggest("lea", k=2)
+    assert [s["type"] for s in suggestions] == ["term", "title"]
+    # The most frequent word and the most cited title both weigh 1
+    assert [s["weight"] for s in suggestions] == [1.0, 1.0]
+    assert all(0 < w <= 1 for w in suggester.weights)
+
+
+def test_multi_word_prefix_mixes_titles_and_terms():
+    documents = {
+        "a": publication("Learning to Rank", "ranking models", citations=10),
+        "b": publication("Neural Networks", "learning representations", citations=0),
+    }
+    texts = [s["text"] for s in Suggester(build_suggestions(documents)).suggest("learning to r", k=5)]
+    assert "Learning to Rank" in texts
+    assert "learning to ranking" in texts